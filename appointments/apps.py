@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+class AppointmentsConfig(AppConfig):
+    name = "appointments"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,207 @@
+import threading
+from contextlib import contextmanager
+from datetime import time, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Appointment
+
+MINUTES_PER_DAY = 24 * 60
+MAX_RANGE_DAYS = 62
+
+# pg_advisory_xact_lock(namespace, día): un lock por día de agenda
+LOCK_NAMESPACE = 0x41505054  # "APPT"
+_local_lock = threading.RLock()
+
+# cancelada = el horario queda libre
+FREE_STATUSES = ("cancelled",)
+
+
+# =========================================================
+# 🕘 HORARIO DE LA CLÍNICA
+# =========================================================
+def _minutes(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def clinic_windows(day):
+    """Ventanas abiertas del día en minutos [(inicio, fin)]; [] si cierra."""
+    if day.weekday() not in settings.CLINIC_DAYS:
+        return []
+    return [(_minutes(start), _minutes(end)) for start, end in settings.CLINIC_HOURS]
+
+
+def _as_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+# =========================================================
+# 🧮 OCUPACIÓN POR DÍA (un query para todo el rango)
+# =========================================================
+def occupancy(start, end, exclude_ids=()):
+    """
+    {fecha: ocupación por minuto} de las citas no canceladas en el rango.
+    Cada día es un arreglo de 1440 contadores (citas simultáneas en ese
+    minuto) armado con un arreglo de diferencias + suma acumulada.
+    """
+    rows = (
+        Appointment.objects
+        .filter(date__range=(start, end))
+        .exclude(status__in=FREE_STATUSES)
+        .exclude(pk__in=exclude_ids)
+        .order_by()
+        .values_list("date", "start_time", "duration_minutes")
+    )
+
+    deltas = {}
+    for day, start_time, duration in rows:
+        begin = start_time.hour * 60 + start_time.minute
+        finish = min(begin + duration, MINUTES_PER_DAY)
+        if finish <= begin:
+            continue
+        diff = deltas.setdefault(day, [0] * (MINUTES_PER_DAY + 1))
+        diff[begin] += 1
+        diff[finish] -= 1
+
+    return {
+        day: bytes(min(count, 255) for count in accumulate(diff[:MINUTES_PER_DAY]))
+        for day, diff in deltas.items()
+    }
+
+
+def _is_free(day_occupancy, begin, finish):
+    if day_occupancy is None:
+        return True
+    return max(day_occupancy[begin:finish]) < settings.CLINIC_CAPACITY
+
+
+def free_slots(start, end, duration=None, step=None):
+    """
+    Horarios libres [(fecha, [(inicio, fin)])] dentro del horario de la
+    clínica: candidatos cada `step` minutos desde el inicio de cada
+    ventana que caben completos y no llenan la capacidad.
+    """
+    duration = duration or settings.CLINIC_SLOT_DURATION
+    step = step or settings.CLINIC_SLOT_STEP
+
+    now = timezone.localtime()
+    busy = occupancy(start, end)
+    days = []
+
+    day = start
+    while day <= end:
+        if day >= now.date():
+            earliest = now.hour * 60 + now.minute if day == now.date() else 0
+            day_occupancy = busy.get(day)
+            slots = [
+                (_as_time(begin), _as_time(begin + duration))
+                for window_start, window_end in clinic_windows(day)
+                for begin in range(window_start, window_end - duration + 1, step)
+                if begin >= earliest and _is_free(day_occupancy, begin, begin + duration)
+            ]
+            if slots:
+                days.append((day, slots))
+        day += timedelta(days=1)
+
+    return days
+
+
+# =========================================================
+# 🔒 VALIDACIÓN AL AGENDAR
+# =========================================================
+@contextmanager
+def booking_lock(*days):
+    """
+    Serializa las reservas de los mismos días: en PostgreSQL con un
+    advisory lock por día (se libera al terminar la transacción); en
+    otros motores con un lock del proceso (desarrollo con SQLite).
+    """
+    if connection.vendor == "postgresql":
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # un solo statement; orden fijo para que dos reservas que
+                # tocan los mismos días no se bloqueen mutuamente
+                cursor.execute(
+                    "SELECT count(pg_advisory_xact_lock(%s, day)) "
+                    "FROM unnest(%s::int[]) AS day",
+                    [LOCK_NAMESPACE, sorted({day.toordinal() for day in days})],
+                )
+            yield
+    else:
+        # el lock envuelve la transacción: se suelta después del COMMIT
+        with _local_lock, transaction.atomic():
+            yield
+
+def find_conflicts(occurrences, exclude_ids=()):
+    """
+    occurrences: [(fecha, hora, duración, …)]. Devuelve las que se
+    empalman hasta llenar la capacidad (tal cual, con sus elementos
+    extra), con un solo query de ocupación para todo el rango. Cada una
+    que cabe ocupa su horario para las siguientes: dos de la lista que
+    se empalman entre sí también cuentan. Llamar dentro de `booking_lock`.
+    """
+    if not occurrences:
+        return []
+
+    days = [occurrence[0] for occurrence in occurrences]
+    busy = occupancy(min(days), max(days), exclude_ids=exclude_ids)
+
+    conflicts = []
+    for occurrence in occurrences:
+        day, start_time, duration = occurrence[:3]
+        begin = start_time.hour * 60 + start_time.minute
+        finish = min(begin + duration, MINUTES_PER_DAY)
+        if finish <= begin:
+            continue
+        if not _is_free(busy.get(day), begin, finish):
+            conflicts.append(occurrence)
+            continue
+
+        day_occupancy = busy.get(day)
+        if not isinstance(day_occupancy, bytearray):
+            day_occupancy = busy[day] = bytearray(day_occupancy or MINUTES_PER_DAY)
+        day_occupancy[begin:finish] = bytes(
+            min(count + 1, 255) for count in day_occupancy[begin:finish]
+        )
+    return conflicts
+
+
+def check_available(day, start_time, duration, exclude_ids=()):
+    """
+    Lanza ValidationError si la cita se empalma con otras hasta llenar la
+    capacidad. Llamar dentro de `booking_lock(day)`.
+    """
+    if find_conflicts([(day, start_time, duration)], exclude_ids=exclude_ids):
+        finish = min(start_time.hour * 60 + start_time.minute + duration, MINUTES_PER_DAY)
+        raise serializers.ValidationError({
+            "start_time": [
+                f"El horario {start_time:%H:%M}–{_as_time(finish):%H:%M} del "
+                f"{day:%Y-%m-%d} ya está ocupado"
+            ]
+        })
+
+
+def needs_check(instance, data):
+    """
+    Solo se valida al crear, al mover la cita (fecha/hora/duración) o al
+    reactivar una cancelada: cambiar el estado de una cita que ya ocupa
+    su horario no debe fallar por empalmes previos.
+    """
+    if instance is None:
+        return data.get("status", "scheduled") not in FREE_STATUSES
+
+    status = data.get("status", instance.status)
+    if status in FREE_STATUSES:
+        return False
+    if instance.status in FREE_STATUSES:
+        return True
+    return any(
+        field in data and data[field] != getattr(instance, field)
+        for field in ("date", "start_time", "duration_minutes")
+    )
+
@@ -0,0 +1,511 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import Appointment
+
+BITACORA_FORMATS = ("docx", "pdf")
+CACHE_PREFIX = "bitacora:v1"
+# con menos documentos pendientes el arranque del pool cuesta más que renderizar
+POOL_MIN_DOCUMENTS = 8
+# documentos recién renderizados por cada set_many (un INSERT en la BD)
+CACHE_WRITE_BATCH = 50
+
+CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+MONTHS = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+    "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+]
+
+
+# =========================================================
+# 📋 DATOS (un query por paciente / uno por lote)
+# =========================================================
+def _attended_rows(patient_id, start, end):
+    return (
+        Appointment.objects
+        .filter(
+            patient_id=patient_id,
+            status="completed",
+            date__range=(start, end),
+        )
+        .values_list("date", "patient__full_name")
+        .distinct()
+        .order_by("date")
+    )
+
+
+def _name_and_dates(rows):
+    name = rows[0][1] if rows else None
+    return name, [day for day, _ in rows]
+
+
+def attended_sessions(patient_id, start, end):
+    """
+    (nombre del paciente, fechas con sesión asistida) en un solo query.
+    Sin sesiones el nombre es None, como antes.
+    """
+    return _name_and_dates(list(_attended_rows(patient_id, start, end)))
+
+
+async def aattended_sessions(patient_id, start, end):
+    """attended_sessions con el ORM async."""
+    return _name_and_dates([row async for row in _attended_rows(patient_id, start, end)])
+
+
+def attended_sessions_by_patient(start, end):
+    """[(patient_id, nombre, [fechas])] de todos los pacientes, un query."""
+    rows = (
+        Appointment.objects
+        .filter(status="completed", date__range=(start, end))
+        .values_list("patient_id", "patient__full_name", "date")
+        .distinct()
+        .order_by("patient_id", "date")
+    )
+    return [
+        (patient_id, name, [day for _, _, day in group])
+        for (patient_id, name), group in groupby(rows, key=lambda r: (r[0], r[1]))
+    ]
+
+
+def format_date(day):
+    # como toLocaleDateString("es-MX") en AttendanceTemplate.tsx
+    return f"{day.day:02d} de {MONTHS[day.month - 1]} de {day.year}"
+
+
+def document_context(name, start, end, dates):
+    """Mismas variables que llena el frontend con docxtemplater."""
+    return {
+        "paciente": name or "",
+        "fecha": format_date(timezone.localdate()),
+        "periodoInicio": format_date(start),
+        "periodoFin": format_date(end),
+        "sesiones": [
+            {
+                "numeroSesion": str(number),
+                "fechaSesion": format_date(day),
+                "firma": "",
+            }
+            for number, day in enumerate(dates, start=1)
+        ],
+        "nombreMedico": settings.BITACORA_PROFESSIONAL_NAME,
+        "cedulaProfesional": settings.BITACORA_PROFESSIONAL_LICENSE,
+        "firmaMedico": "",
+    }
+
+
+def document_filename(name, fmt):
+    name = re.sub(r"\s+", "_", name or "paciente")
+    return f"Asistencias_{name}.{fmt}"
+
+
+# =========================================================
+# 🗄 CACHE (paciente, rango, versión de los datos)
+# =========================================================
+def _cache():
+    return caches[getattr(settings, "BITACORA_CACHE_ALIAS", "shared")]
+
+
+def cache_key(patient_id, start, end, fmt, context):
+    """
+    La versión de los datos es el hash de todo lo que termina en el
+    documento (sesiones, nombre, fecha del reporte, médico) + el template:
+    cualquier cambio produce otra llave y no hace falta invalidar.
+    """
+    template = settings.BITACORA_TEMPLATE
+    version = hashlib.sha256(repr((
+        sorted(context.items(), key=lambda item: item[0]),
+        os.path.getmtime(template),
+    )).encode()).hexdigest()[:16]
+    return f"{CACHE_PREFIX}:{patient_id}:{start}:{end}:{fmt}:{version}"
+
+
+def cached_document(patient_id, start, end, fmt, context):
+    cache = _cache()
+    key = cache_key(patient_id, start, end, fmt, context)
+
+    content = cache.get(key)
+    if content is None:
+        content = render_document(context, fmt)
+        cache.set(key, content, getattr(settings, "BITACORA_CACHE_TTL", 86400))
+    return content
+
+
+async def acached_document(patient_id, start, end, fmt, context):
+    """
+    cached_document con el cache async; el render (sin BD) corre en el
+    pool de hilos, no en el de la vista.
+    """
+    cache = _cache()
+    key = cache_key(patient_id, start, end, fmt, context)
+
+    content = await cache.aget(key)
+    if content is None:
+        content = await sync_to_async(render_document, thread_sensitive=False)(context, fmt)
+        await cache.aset(key, content, getattr(settings, "BITACORA_CACHE_TTL", 86400))
+    return content
+
+
+# =========================================================
+# 🖨 RENDER (funciones puras: corren en el pool de procesos)
+# =========================================================
+def render_document(context, fmt):
+    if fmt == "docx":
+        return render_docx(context)
+    if fmt == "pdf":
+        return render_pdf(context)
+    raise ValueError(f"Formato no soportado: {fmt}")
+
+
+TAG_RE = re.compile(r"\{\s*([#/]?)\s*(\w+)\s*\}")
+PARAGRAPH_RE = re.compile(r"<w:p[ >].*?</w:p>", re.S)
+TEXT_RE = re.compile(r"(<w:t(?: [^>]*)?>)(.*?)(</w:t>)", re.S)
+
+
+def render_docx(context):
+    """
+    Llena frontend/public/bitacora_template.docx con la sintaxis de
+    docxtemplater que ya usa ({tag} y {#sesiones}…{/sesiones} dentro de
+    una fila de tabla) sin dependencias externas.
+    """
+    with open(settings.BITACORA_TEMPLATE, "rb") as f:
+        template = zipfile.ZipFile(io.BytesIO(f.read()))
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as docx:
+        for item in template.infolist():
+            data = template.read(item.filename)
+            if item.filename == "word/document.xml":
+                data = _fill_document_xml(data.decode("utf-8"), context).encode("utf-8")
+            docx.writestr(item, data)
+
+    return output.getvalue()
+
+
+def _fill_document_xml(xml, context):
+    xml = PARAGRAPH_RE.sub(_merge_tag_runs, xml)
+
+    # bucles: la fila de tabla con {#lista} … {/lista} se repite
+    for match in list(TAG_RE.finditer(xml)):
+        if match.group(1) == "#":
+            xml = _expand_row_loop(xml, match.group(2), context.get(match.group(2), []))
+
+    return TAG_RE.sub(
+        lambda m: escape(str(context.get(m.group(2), ""))) if not m.group(1) else "",
+        xml,
+    )
+
+
+def _merge_tag_runs(match):
+    """
+    Word parte "{paciente}" en varios <w:r>: se junta el texto del
+    párrafo en el primer <w:t> (conserva el formato de ese run).
+    """
+    paragraph = match.group(0)
+    texts = TEXT_RE.findall(paragraph)
+    joined = "".join(text for _, text, _ in texts)
+    if "{" not in joined or len(texts) < 2:
+        return paragraph
+
+    first = [True]
+
+    def replace(text_match):
+        if first[0]:
+            first[0] = False
+            opening = text_match.group(1)
+            if "xml:space" not in opening:
+                opening = opening[:-1] + ' xml:space="preserve">'
+            return opening + joined + text_match.group(3)
+        return text_match.group(1) + text_match.group(3)
+
+    return TEXT_RE.sub(replace, paragraph)
+
+
+def _expand_row_loop(xml, name, items):
+    open_tag = re.search(r"\{\s*#\s*%s\s*\}" % name, xml)
+    close_tag = re.search(r"\{\s*/\s*%s\s*\}" % name, xml)
+    if not open_tag or not close_tag:
+        return xml
+
+    row_start = max(xml.rfind("<w:tr>", 0, open_tag.start()), xml.rfind("<w:tr ", 0, open_tag.start()))
+    row_end = xml.find("</w:tr>", close_tag.end())
+    if row_start < 0 or row_end < 0:
+        return xml
+    row_end += len("</w:tr>")
+
+    row = xml[row_start:row_end]
+    row = row.replace(open_tag.group(0), "").replace(close_tag.group(0), "")
+
+    rows = "".join(
+        TAG_RE.sub(lambda m: escape(str(item.get(m.group(2), ""))), row)
+        for item in items
+    )
+    return xml[:row_start] + rows + xml[row_end:]
+
+
+def render_pdf(context):
+    """
+    PDF desde el mismo DOCX con LibreOffice cuando está instalado
+    (BITACORA_SOFFICE); si no, un PDF sencillo con el mismo contenido.
+    """
+    soffice = settings.BITACORA_SOFFICE or shutil.which("soffice")
+    if soffice:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "bitacora.docx")
+            with open(source, "wb") as f:
+                f.write(render_docx(context))
+            subprocess.run(
+                [soffice, "--headless", "--convert-to", "pdf", "--outdir", tmp, source],
+                check=True,
+                capture_output=True,
+                timeout=120,
+            )
+            with open(os.path.join(tmp, "bitacora.pdf"), "rb") as f:
+                return f.read()
+
+    return _SimplePdf(context).render()
+
+
+class _SimplePdf:
+    """PDF mínimo (Helvetica, carta) con el layout de la bitácora."""
+    WIDTH, HEIGHT = 612, 792
+    MARGIN = 56
+    ROW = 22
+    COLUMNS = (70, 230, 200)  # No. sesión, fecha, firma
+
+    def __init__(self, context):
+        self.context = context
+        self.pages = []
+        self.ops = []
+        self.y = 0
+
+    def render(self):
+        c = self.context
+        self._new_page()
+        self._text(f"Fecha: {c['fecha']}", self.WIDTH - self.MARGIN - 180, size=10)
+        self._advance(30)
+        self._text("RELACIÓN DE ASISTENCIAS", self.MARGIN, size=16, bold=True)
+        self._advance(28)
+        self._text(f"Paciente: {c['paciente']}", self.MARGIN, size=11)
+        self._advance(18)
+        self._text(f"Periodo: {c['periodoInicio']} al {c['periodoFin']}", self.MARGIN, size=11)
+        self._advance(30)
+
+        self._row(("No. Sesión", "Fecha", "Firma del Paciente"), bold=True)
+        for session in c["sesiones"]:
+            if self.y < self.MARGIN + 120:
+                self._new_page()
+                self._row(("No. Sesión", "Fecha", "Firma del Paciente"), bold=True)
+            self._row((session["numeroSesion"], session["fechaSesion"], ""))
+
+        self._advance(60)
+        self._text("ATENTAMENTE:", self.MARGIN, size=11, bold=True)
+        self._advance(40)
+        self._text("_______________________", self.MARGIN, size=11)
+        self._advance(16)
+        self._text(c["nombreMedico"], self.MARGIN, size=11)
+        self._advance(16)
+        self._text(f"Cédula Profesional: {c['cedulaProfesional']}", self.MARGIN, size=11)
+
+        self.pages.append(self.ops)
+        return self._serialize()
+
+    def _new_page(self):
+        if self.ops:
+            self.pages.append(self.ops)
+        self.ops = []
+        self.y = self.HEIGHT - self.MARGIN
+
+    def _advance(self, points):
+        self.y -= points
+
+    def _text(self, value, x, size=11, bold=False):
+        font = "F2" if bold else "F1"
+        data = value.encode("cp1252", "replace")
+        data = data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+        self.ops.append(
+            b"BT /%s %d Tf %d %d Td (%s) Tj ET" % (font.encode(), size, x, self.y, data)
+        )
+
+    def _row(self, cells, bold=False):
+        x = self.MARGIN
+        top = self.y
+        for width, value in zip(self.COLUMNS, cells):
+            self.ops.append(b"%d %d %d %d re S" % (x, top - self.ROW, width, self.ROW))
+            self.y = top - 15
+            self._text(value, x + 6, size=10, bold=bold)
+            x += width
+        self.y = top - self.ROW
+
+    def _serialize(self):
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # Pages, se llena abajo
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        ]
+        kids = []
+        for ops in self.pages:
+            stream = b"\n".join(ops)
+            objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+            objects.append(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                % (self.WIDTH, self.HEIGHT, len(objects))
+            )
+            kids.append(b"%d 0 R" % len(objects))
+        objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        out.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref)
+        )
+        return out.getvalue()
+
+
+# =========================================================
+# 🗜 LOTE: ZIP EN STREAMING
+# =========================================================
+class _ZipStream(io.RawIOBase):
+    """Destino no buscable para ZipFile: acumula y entrega por partes."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _render_pool():
+    """
+    Pool del proceso, creado la primera vez y reutilizado. Procesos con
+    "spawn", no fork: bajo uvicorn el worker ya tiene otros hilos (LISTEN,
+    miniaturas) y un fork podría copiar un lock tomado por uno de ellos.
+    Cada hijo arranca Django una vez (initializer).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            processes = getattr(settings, "BITACORA_RENDER_PROCESSES", None) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def batch_documents(start, end, fmt):
+    """
+    Genera (nombre de archivo, bytes) de la bitácora de cada paciente con
+    sesiones en el rango. Las que no están en cache se renderizan en el
+    pool de procesos (BITACORA_RENDER_PROCESSES) y se guardan en cache.
+    """
+    documents = []
+    for patient_id, name, dates in attended_sessions_by_patient(start, end):
+        context = document_context(name, start, end, dates)
+        key = cache_key(patient_id, start, end, fmt, context)
+        documents.append((f"{patient_id}_{document_filename(name, fmt)}", key, context))
+
+    cache = _cache()
+    cached = cache.get_many([key for _, key, _ in documents])
+    pending = [context for _, key, context in documents if key not in cached]
+
+    processes = getattr(settings, "BITACORA_RENDER_PROCESSES", None) or os.cpu_count() or 1
+    pool, futures = None, []
+    if len(pending) >= POOL_MIN_DOCUMENTS and processes > 1:
+        pool = _render_pool()
+        futures = [pool.submit(render_document, context, fmt) for context in pending]
+        rendered = (future.result() for future in futures)
+    else:
+        rendered = (render_document(context, fmt) for context in pending)
+
+    ttl = getattr(settings, "BITACORA_CACHE_TTL", 86400)
+    fresh = {}
+    try:
+        # en el orden de `documents`: cada uno sale en cuanto está listo
+        for filename, key, _ in documents:
+            content = cached.get(key)
+            if content is None:
+                content = next(rendered)
+                fresh[key] = content
+                if len(fresh) >= CACHE_WRITE_BATCH:
+                    cache.set_many(fresh, ttl)
+                    fresh = {}
+            yield filename, content
+    except BrokenProcessPool:
+        # un hijo murió: el siguiente lote arranca un pool nuevo
+        _discard_pool(pool)
+        raise
+    finally:
+        # también con la descarga cancelada: lo ya renderizado queda
+        if fresh:
+            cache.set_many(fresh, ttl)
+        # descarga cancelada: lo que no empezó no se renderiza
+        for future in futures:
+            future.cancel()
+
+
+def batch_zip(start, end, fmt):
+    """ZIP de batch_documents, entregado por partes (StreamingHttpResponse)."""
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED)
+
+    for filename, content in batch_documents(start, end, fmt):
+        archive.writestr(filename, content)
+        yield stream.pop()
+
+    archive.close()
+    yield stream.pop()
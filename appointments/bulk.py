@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from sync.changes import record_deletions
+
+from .availability import FREE_STATUSES, booking_lock, find_conflicts
+from .calendar import invalidate_calendar
+from .live import publish, refresh_event
+from .models import Appointment, refresh_appointment_dates
+from .stats import apply_stats
+
+MAX_BULK_CHANGES = 1000
+
+
+def sync_bulk_changes(before=(), after=()):
+    """
+    bulk_create / update no emiten signals: esto hace lo mismo que los
+    receivers de appointments/signals.py para muchas citas a la vez.
+
+    before / after: tuplas (fecha, status, patient_id) de las citas
+    afectadas antes y después de la escritura (vacío al crear / borrar).
+    """
+    before, after = list(before), list(after)
+
+    changes = Counter(after)
+    changes.subtract(before)
+    apply_stats(Counter({key: delta for key, delta in changes.items() if delta}))
+
+    invalidate_calendar({
+        (day, patient_id) for day, _, patient_id in chain(before, after)
+    })
+
+    patient_ids = {patient_id for _, _, patient_id in chain(before, after)}
+    if patient_ids:
+        refresh_appointment_dates(patient_ids)
+        # calendario en vivo: un solo evento, el cliente recarga el rango
+        publish([refresh_event(
+            {day for day, _, _ in chain(before, after)}, patient_ids
+        )])
+
+
+def bulk_set_status(changes=None, queryset=None, status=None):
+    """
+    Cambia el estado de muchas citas: un SELECT de los días a reservar,
+    otro con lock de filas, un UPDATE por estado destino y la
+    sincronización de rollup / calendario.
+
+    - changes: {id: status}
+    - queryset + status: todas las citas del queryset al mismo estado
+
+    `attended` queda como en seed_appointments_existing: solo las citas
+    `completed` son asistidas. Devuelve {id: resultado}.
+    """
+    if queryset is None:
+        queryset = Appointment.objects.filter(pk__in=list(changes))
+
+    def target(pk):
+        return changes[pk] if changes is not None else status
+
+    with transaction.atomic():
+        # reactivar una cancelada vuelve a ocupar su horario: el
+        # booking_lock de esos días va antes que el lock de filas, en el
+        # mismo orden que AppointmentSerializer.update (al revés, un PATCH
+        # en paralelo puede terminar en deadlock)
+        lock_days = {
+            day
+            for pk, day, current in queryset.values_list("pk", "date", "status")
+            if current in FREE_STATUSES and target(pk) not in FREE_STATUSES
+        }
+
+        with booking_lock(*lock_days) if lock_days else nullcontext():
+            rows = {
+                pk: (day, start_time, duration, current, patient_id)
+                for pk, day, start_time, duration, current, patient_id in (
+                    queryset
+                    .select_for_update()
+                    .order_by("pk")
+                    .values_list("pk", "date", "start_time", "duration_minutes", "status", "patient_id")
+                )
+            }
+
+            results = {
+                pk: {"id": pk, "ok": False, "errors": {"id": ["La cita no existe"]}}
+                for pk in (changes or ()) if pk not in rows
+            }
+
+            reactivated = []
+            for pk, (day, start_time, duration, current, _) in rows.items():
+                if current not in FREE_STATUSES or target(pk) in FREE_STATUSES:
+                    continue
+                if day not in lock_days:
+                    # otro request la canceló o movió entre la lectura y el lock
+                    results[pk] = {
+                        "id": pk,
+                        "ok": False,
+                        "errors": {"status": ["La cita cambió mientras tanto; vuelve a intentarlo"]},
+                    }
+                    continue
+                reactivated.append((day, start_time, duration, pk))
+
+            for day, start_time, _, pk in find_conflicts(reactivated):
+                results[pk] = {
+                    "id": pk,
+                    "ok": False,
+                    "errors": {"status": [
+                        f"El horario {start_time:%H:%M} del {day:%Y-%m-%d} ya está ocupado"
+                    ]},
+                }
+
+            by_status = defaultdict(list)
+            for pk in rows:
+                if pk not in results:
+                    by_status[target(pk)].append(pk)
+
+            before, after = [], []
+            now = timezone.now()
+            for new_status, ids in by_status.items():
+                Appointment.objects.filter(pk__in=ids).update(
+                    status=new_status,
+                    attended=new_status == "completed",
+                    updated_at=now,
+                )
+                for pk in ids:
+                    day, _, _, current, patient_id = rows[pk]
+                    before.append((day, current, patient_id))
+                    after.append((day, new_status, patient_id))
+                    results[pk] = {
+                        "id": pk,
+                        "ok": True,
+                        "status": new_status,
+                        "attended": new_status == "completed",
+                        "previous_status": current,
+                    }
+
+            sync_bulk_changes(before, after)
+
+    return results
+
+
+def bulk_delete(queryset):
+    """
+    Borra las citas del queryset sin un post_delete por cita: un SELECT
+    con lock de filas, un INSERT de tombstones, un DELETE y la
+    sincronización de rollup / calendario (un evento "refresh" en vivo
+    en lugar de uno "deleted" por cita). Devuelve cuántas borró.
+    """
+    # sin savepoint, como el Collector de Django: si algo falla se
+    # revierte la transacción del llamador entera
+    with transaction.atomic(savepoint=False):
+        rows = list(
+            queryset
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "date", "status", "patient_id")
+        )
+        if not rows:
+            return 0
+
+        record_deletions(Appointment, [(pk, patient_id) for pk, _, _, patient_id in rows])
+        # DELETE directo: .delete() pasaría por el Collector, que manda un
+        # post_delete por fila (ningún modelo apunta a Appointment)
+        deleted = Appointment.objects.filter(pk__in=[pk for pk, _, _, _ in rows])
+        deleted._raw_delete(deleted.db)
+
+        sync_bulk_changes(before=[row[1:] for row in rows])
+
+    return len(rows)
@@ -0,0 +1,297 @@
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import CharField, F, Func
+from django.utils.dateparse import parse_date
+
+from backend.caches import is_shared
+
+from .models import Appointment
+
+SQL_VENDORS = ("postgresql", "sqlite")
+
+
+class IsoTimestamp(Func):
+    """
+    date + start_time (+ duration_minutes) como texto ISO 8601 sin zona,
+    igual que datetime.isoformat() para horas sin microsegundos.
+    """
+    output_field = CharField()
+
+    def __init__(self, plus_minutes=None):
+        expressions = [F("date"), F("start_time")]
+        if plus_minutes:
+            expressions.append(F(plus_minutes))
+        super().__init__(*expressions)
+
+    def _compile_parts(self, compiler, connection):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        return sqls, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (date, time, *minutes), params = self._compile_parts(compiler, connection)
+        value = f"({date} + {time})"
+        if minutes:
+            value = f"({value} + interval '1 minute' * {minutes[0]})"
+        return f"""to_char({value}, 'YYYY-MM-DD"T"HH24:MI:SS')""", params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (date, time, *minutes), params = self._compile_parts(compiler, connection)
+        modifier = f", '+' || {minutes[0]} || ' minutes'" if minutes else ""
+        return (
+            f"strftime('%%Y-%%m-%%dT%%H:%%M:%%S', {date} || ' ' || {time}{modifier})",
+            params,
+        )
+
+
+def calendar_queryset(start=None, end=None, patient_id=None):
+    qs = Appointment.objects.all()
+
+    if start and end:
+        qs = qs.filter(date__gte=start, date__lt=end)
+
+    if patient_id:
+        qs = qs.filter(patient_id=patient_id)
+
+    return qs.order_by("date", "start_time", "id")
+
+
+def _calendar_values(qs):
+    """(values_list, conversión por fila o None si ya vienen listas)."""
+    if connection.vendor in SQL_VENDORS:
+        return qs.values_list(
+            "id",
+            "patient__full_name",
+            IsoTimestamp(),
+            IsoTimestamp(plus_minutes="duration_minutes"),
+            "status",
+            "attended",
+        ), None
+
+    return qs.values_list(
+        "id", "patient__full_name", "date", "start_time",
+        "duration_minutes", "status", "attended",
+    ), _python_row
+
+
+def _python_row(values):
+    pk, title, day, time, minutes, status, attended = values
+    start_dt = datetime.combine(day, time)
+    end_dt = start_dt + timedelta(minutes=minutes)
+    return (
+        pk, title, start_dt.isoformat(), end_dt.isoformat(),
+        status, attended,
+    )
+
+
+def calendar_rows(qs):
+    """
+    Tuplas (id, título, inicio, fin, status, attended) sin instanciar
+    modelos; inicio y fin ya vienen formateados desde SQL.
+    """
+    values, convert = _calendar_values(qs)
+    if convert is None:
+        return values
+    return [convert(row) for row in values]
+
+
+async def acalendar_rows(qs):
+    """calendar_rows con el ORM async (lista ya evaluada)."""
+    values, convert = _calendar_values(qs)
+    return [convert(row) if convert else row async for row in values]
+
+
+def _event(row):
+    pk, title, start, end, status, attended = row
+    return {
+        "id": pk,
+        "title": title,
+        "start": start,
+        "end": end,
+        "extendedProps": {
+            "status": status,
+            "attended": attended,
+        },
+    }
+
+
+def _dumps(value):
+    # mismas opciones que el JSONRenderer de DRF
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_events(rows):
+    """
+    JSON de FullCalendar listo para enviar: mismos bytes que producía
+    Response(events) con el JSONRenderer de DRF.
+    """
+    return _dumps([_event(row) for row in rows]).encode()
+
+
+# =========================================================
+# 🗓 CACHE POR SEMANA ISO
+# =========================================================
+# Cada cubeta = una semana (lunes a domingo) de un paciente o de todos,
+# guardada como [(fecha ISO, evento ya en JSON), ...]. Un rango
+# arbitrario se arma con las semanas que toca, filtrando los extremos.
+CACHE_PREFIX = "calendar:v1"
+STATS_KEYS = {
+    "hits": f"{CACHE_PREFIX}:stats:hits",
+    "misses": f"{CACHE_PREFIX}:stats:misses",
+}
+# aciertos / fallos se cuentan en memoria y se suman al cache compartido
+# a lo más cada tantos segundos (no una escritura por lectura)
+STATS_FLUSH_SECONDS = 60
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flush_at = time.monotonic() + STATS_FLUSH_SECONDS
+
+
+# con un cache por proceso la invalidación solo llega al worker que
+# escribió: los demás sirven semanas viejas a lo más estos segundos
+LOCAL_CACHE_TTL = 30
+
+
+def _alias():
+    return getattr(settings, "CALENDAR_CACHE_ALIAS", "shared")
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _ttl():
+    ttl = getattr(settings, "CALENDAR_CACHE_TTL", 86400)
+    if not is_shared(_alias()):
+        return min(ttl, LOCAL_CACHE_TTL)
+    return ttl
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def bucket_key(monday, patient_id=None):
+    year, week, _ = monday.isocalendar()
+    return f"{CACHE_PREFIX}:{year}-W{week:02d}:{patient_id or 'all'}"
+
+
+async def acached_calendar(start, end, patient_id=None):
+    """
+    Igual que encode_events(calendar_rows(calendar_queryset(...))) pero
+    leyendo las semanas desde el cache. Las semanas que faltan se
+    consultan juntas (un solo query) y se guardan. Cache y ORM async:
+    la vista /calendar/ no ocupa un hilo mientras espera.
+    """
+    cache = _cache()
+    mondays = []
+    monday = week_start(start)
+    while monday < end:
+        mondays.append(monday)
+        monday += timedelta(days=7)
+
+    keys = {monday: bucket_key(monday, patient_id) for monday in mondays}
+    found = await cache.aget_many(keys.values())
+    missing = [monday for monday in mondays if keys[monday] not in found]
+    due = _count_stats(len(mondays) - len(missing), len(missing))
+    if due:
+        await sync_to_async(_flush_stats)(cache, due)
+
+    if missing:
+        buckets = {monday: [] for monday in missing}
+        qs = calendar_queryset(
+            missing[0], missing[-1] + timedelta(days=7), patient_id
+        )
+        for row in await acalendar_rows(qs):
+            day = row[2][:10]
+            bucket = buckets.get(week_start(date.fromisoformat(day)))
+            if bucket is not None:
+                bucket.append((day, _dumps(_event(row))))
+
+        fresh = {keys[monday]: events for monday, events in buckets.items()}
+        await cache.aset_many(fresh, _ttl())
+        found.update(fresh)
+
+    first, last = start.isoformat(), end.isoformat()
+    events = [
+        event
+        for monday in mondays
+        for day, event in found[keys[monday]]
+        if first <= day < last
+    ]
+    return ("[" + ",".join(events) + "]").encode()
+
+
+def invalidate_calendar(changes):
+    """
+    changes: pares (fecha, patient_id) de citas creadas, modificadas,
+    movidas o borradas. Al hacer COMMIT se borran su semana del paciente
+    y la general.
+    Las escrituras masivas (update / bulk_create) no emiten signals:
+    deben llamarla explícitamente.
+    """
+    keys = set()
+    for day, patient_id in changes:
+        if isinstance(day, str):
+            day = parse_date(day)
+        if day is None:
+            continue
+        monday = week_start(day)
+        keys.add(bucket_key(monday))
+        if patient_id:
+            keys.add(bucket_key(monday, patient_id))
+
+    if keys:
+        # después del COMMIT: antes, otra lectura podría volver a guardar
+        # la semana vieja y dejarla todo el TTL (fuera de una transacción
+        # on_commit corre en el acto)
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def _count_stats(hits, misses):
+    """Suma en memoria; devuelve lo pendiente si ya toca escribirlo."""
+    global _stats_flush_at
+    with _stats_lock:
+        _stats.update(hits=hits, misses=misses)
+        if time.monotonic() < _stats_flush_at:
+            return None
+        _stats_flush_at = time.monotonic() + STATS_FLUSH_SECONDS
+        due = +_stats
+        _stats.clear()
+        return due
+
+
+def _flush_stats(cache, counts):
+    for name, amount in counts.items():
+        try:
+            cache.incr(STATS_KEYS[name], amount)
+        except ValueError:
+            # primera vez: add para no pisar a otro worker
+            if not cache.add(STATS_KEYS[name], amount, timeout=None):
+                cache.incr(STATS_KEYS[name], amount)
+
+
+def calendar_cache_stats():
+    """Totales del cache compartido + lo que este proceso aún no escribe."""
+    values = _cache().get_many(STATS_KEYS.values())
+    with _stats_lock:
+        hits = values.get(STATS_KEYS["hits"], 0) + _stats["hits"]
+        misses = values.get(STATS_KEYS["misses"], 0) + _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 2) if total else 0,
+    }
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+from auth.authentication import is_revoked, issued_at
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "calendar"
+# NOTIFY acepta hasta 8000 bytes por mensaje
+NOTIFY_MAX_BYTES = 7500
+
+
+# =========================================================
+# 📨 EVENTOS
+# =========================================================
+# {"type": "created" | "updated" | "deleted", "id", "patient", "dates",
+#  "event"?}  → una cita (dates = fecha actual y anterior si se movió)
+# {"type": "refresh", "start", "end", "patients"} → escritura en bloque:
+#  el cliente vuelve a pedir /calendar/ de ese rango
+def saved_event(instance, created):
+    start = datetime.combine(instance.date, instance.start_time)
+    end = start + timedelta(minutes=instance.duration_minutes)
+
+    dates = {instance.date.isoformat()}
+    previous = getattr(instance, "_loaded_date", None)
+    if previous:
+        dates.add(previous.isoformat())
+
+    return {
+        "type": "created" if created else "updated",
+        "id": instance.pk,
+        "patient": instance.patient_id,
+        "dates": sorted(dates),
+        # mismo formato que /appointments/calendar/
+        "event": {
+            "id": instance.pk,
+            "title": instance.patient.full_name,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "extendedProps": {
+                "status": instance.status,
+                "attended": instance.attended,
+            },
+        },
+    }
+
+
+def deleted_event(instance):
+    return {
+        "type": "deleted",
+        "id": instance.pk,
+        "patient": instance.patient_id,
+        "dates": [instance.date.isoformat()],
+    }
+
+
+def refresh_event(days, patient_ids):
+    days = sorted(days)
+    return {
+        "type": "refresh",
+        "start": days[0].isoformat(),
+        "end": (days[-1] + timedelta(days=1)).isoformat(),
+        "patients": sorted(patient_ids),
+    }
+
+
+# =========================================================
+# 📡 SUSCRIPTORES DE ESTE PROCESO
+# =========================================================
+class Subscription:
+    """
+    Una conexión SSE: rango visible [start, end) y paciente opcional.
+    Los eventos llegan desde cualquier hilo a una cola del event loop.
+    """
+
+    def __init__(self, start, end, patient_id=None):
+        self.start = start.isoformat()
+        self.end = end.isoformat()
+        self.patient_id = patient_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        # cliente lento: se descartan eventos y se le pide recargar
+        self.lagging = False
+
+    def wants(self, event):
+        if event["type"] == "refresh":
+            if self.patient_id and self.patient_id not in event["patients"]:
+                return False
+            return event["start"] < self.end and self.start < event["end"]
+
+        if self.patient_id and event["patient"] != self.patient_id:
+            return False
+        return any(self.start <= day < self.end for day in event["dates"])
+
+    def push(self, events):
+        # corre en el event loop (call_soon_threadsafe)
+        try:
+            self.queue.put_nowait(events)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+
+class Broker:
+    """Reparte los eventos a las suscripciones de este proceso."""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, start, end, patient_id=None):
+        subscription = Subscription(start, end, patient_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        if _uses_notify():
+            start_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            wanted = [event for event in events if subscription.wants(event)]
+            if not wanted:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, wanted)
+            except RuntimeError:
+                # loop cerrado: la conexión ya terminó
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+# =========================================================
+# 🌊 STREAM SSE
+# =========================================================
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(start, end, patient_id=None, token=None):
+    """
+    Cuerpo text/event-stream de una conexión. Empieza con `ready` (al
+    reconectar el cliente recarga el rango: lo ocurrido mientras estuvo
+    desconectado no se repite) y manda un comentario cada LIVE_HEARTBEAT
+    segundos para que proxies y balanceadores no la cierren.
+
+    Con `token` (el access token de la conexión) termina con `expired`
+    al llegar su `exp` o si se revoca (se revisa en cada heartbeat): el
+    cliente reconecta con un token nuevo.
+    """
+    subscription = broker.subscribe(start, end, patient_id)
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MS}\n" + _sse("ready", {
+            "start": subscription.start, "end": subscription.end,
+        })
+        while True:
+            timeout = settings.LIVE_HEARTBEAT
+            if token is not None:
+                timeout = max(min(timeout, token["exp"] - time.time()), 0)
+            try:
+                events = await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if token is not None and await _token_ended(token):
+                    yield _sse("expired", {})
+                    return
+                yield ": ping\n\n"
+                continue
+
+            if subscription.lagging:
+                # se perdieron eventos: mejor recargar todo el rango
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.lagging = False
+                events = [refresh_event([start, end - timedelta(days=1)], [])]
+
+            for event in events:
+                yield _sse(event["type"], event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def _token_ended(token):
+    if token["exp"] <= time.time():
+        return True
+    return await sync_to_async(is_revoked)(
+        token[api_settings.USER_ID_CLAIM], issued_at(token)
+    )
+
+
+# =========================================================
+# 📤 PUBLICAR
+# =========================================================
+def publish(events):
+    """
+    Envía eventos de calendario cuando la transacción hace COMMIT.
+
+    - LIVE_BACKEND="local": solo a las conexiones de este proceso
+    - LIVE_BACKEND="postgres": NOTIFY (PostgreSQL lo entrega al hacer
+      COMMIT y lo descarta con ROLLBACK) → todos los workers ASGI
+    """
+    events = [event for event in events if event]
+    if not events:
+        return
+
+    if _uses_notify():
+        with connection.cursor() as cursor:
+            for payload in _payloads(events):
+                cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+        return
+
+    transaction.on_commit(lambda: broker.dispatch(events))
+
+
+def _uses_notify():
+    # LIVE_BACKEND="postgres" con otra BD (tests, SQLite local) → "local"
+    return settings.LIVE_BACKEND == "postgres" and connection.vendor == "postgresql"
+
+
+def _payloads(events):
+    """Listas JSON de eventos que caben en un NOTIFY."""
+    chunk, size = [], 2
+    for event in events:
+        encoded = json.dumps(event, separators=(",", ":"))
+        if chunk and size + len(encoded) + 1 > NOTIFY_MAX_BYTES:
+            yield "[" + ",".join(chunk) + "]"
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield "[" + ",".join(chunk) + "]"
+
+
+# =========================================================
+# 👂 LISTEN (un hilo por proceso, solo con LIVE_BACKEND="postgres")
+# =========================================================
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen, name="calendar-listen", daemon=True)
+            _listener.start()
+
+
+def _listen():
+    # conexión propia del hilo (las de Django son por hilo)
+    while True:
+        try:
+            connection.ensure_connection()
+            raw = connection.connection
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+            while True:
+                if not select.select([raw], [], [], 60)[0]:
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    notify = raw.notifies.pop(0)
+                    broker.dispatch(json.loads(notify.payload))
+        except Exception:
+            logger.exception("LISTEN %s perdió la conexión; reintentando", NOTIFY_CHANNEL)
+            connection.close()
+            time.sleep(1)
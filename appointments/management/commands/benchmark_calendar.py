@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from appointments.calendar import calendar_queryset, calendar_rows, encode_events
+from appointments.models import Appointment
+from patients.models import Patient
+
+START = date(2031, 1, 6)  # lunes, lejos de datos reales
+
+
+def legacy_calendar(start, end):
+    """El loop anterior: instancias + datetime.combine + JSONRenderer."""
+    qs = (
+        Appointment.objects
+        .select_related("patient")
+        .only(
+            "id", "date", "start_time", "duration_minutes", "status",
+            "attended", "patient__full_name",
+        )
+        .filter(date__gte=start, date__lt=end)
+    )
+
+    events = []
+    # mismo desempate que la ruta rápida (id) para comparar bytes
+    for a in qs.order_by("date", "start_time", "id"):
+        start_dt = datetime.combine(a.date, a.start_time)
+        end_dt = start_dt + timedelta(minutes=a.duration_minutes)
+        events.append({
+            "id": a.id,
+            "title": a.patient.full_name,
+            "start": start_dt.isoformat(),
+            "end": end_dt.isoformat(),
+            "extendedProps": {
+                "status": a.status,
+                "attended": a.attended,
+            },
+        })
+    return JSONRenderer().render(events)
+
+
+def fast_calendar(start, end):
+    return encode_events(calendar_rows(calendar_queryset(start, end)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark de appointments/calendar: costo por evento del "
+        "loop anterior vs la ruta rápida (values_list + JSON directo)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--events", type=int, nargs="+", default=[100, 500, 2000]
+        )
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🗄 Motor: {connection.vendor}")
+        self.stdout.write(
+            f"{'eventos':>8} {'ruta':>8} {'p50 ms':>8} {'µs/evento':>10}"
+        )
+
+        try:
+            with transaction.atomic():
+                patients = Patient.objects.bulk_create([
+                    Patient(full_name=f"Paciente Ñandú {i}", phone="5500000000")
+                    for i in range(50)
+                ])
+                for count in sorted(options["events"]):
+                    Appointment.objects.filter(date__gte=START).delete()
+                    end = self._fill(patients, count)
+
+                    legacy = legacy_calendar(START, end)
+                    if legacy != fast_calendar(START, end):
+                        self.stdout.write(self.style.ERROR(
+                            "⚠️ La ruta rápida no produce los mismos bytes"
+                        ))
+                        return
+
+                    for label, render in (
+                        ("anterior", legacy_calendar),
+                        ("rápida", fast_calendar),
+                    ):
+                        p50 = self._measure(render, START, end, options["repeat"])
+                        self.stdout.write(
+                            f"{count:>8} {label:>8} {p50:>8.2f} "
+                            f"{p50 * 1000 / count:>10.2f}"
+                        )
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS(
+                "✅ Salida idéntica; datos de prueba revertidos"
+            ))
+
+    def _fill(self, patients, count):
+        rng = random.Random(count)
+        per_day = 20
+        Appointment.objects.bulk_create([
+            Appointment(
+                patient=rng.choice(patients),
+                date=START + timedelta(days=i // per_day),
+                start_time=dtime(8 + (i % per_day) // 2, 30 * (i % 2)),
+                duration_minutes=rng.choice([30, 45, 60, 90]),
+                status=rng.choice(["scheduled", "completed", "no_show"]),
+                attended=rng.random() < 0.5,
+            )
+            for i in range(count)
+        ])
+        return START + timedelta(days=count // per_day + 1)
+
+    def _measure(self, render, start, end, repeat):
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            render(start, end)
+            timings.append((time.perf_counter() - begin) * 1000)
+        return statistics.median(timings)
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,221 @@
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auth.tokens import tokens_for_user
+from patients.models import Patient
+
+# modo → (aplicación, argumentos extra de gunicorn)
+SERVERS = {
+    "wsgi": ("backend.wsgi:application", []),
+    "asgi": (
+        "backend.asgi:application",
+        ["--worker-class", "uvicorn_worker.UvicornWorker"],
+    ),
+}
+
+# (nombre, peso, url) — lecturas calientes + una lenta que bloquea
+MIX = [
+    ("calendar", 40, lambda c: (
+        f"/api/appointments/calendar/?start={c['month']}&end={c['next_month']}"
+    )),
+    ("patient", 25, lambda c: f"/api/patients/{c['rng'].choice(c['patients'])}/"),
+    ("report", 15, lambda c: (
+        f"/api/appointments/patient-report/?patient={c['rng'].choice(c['patients'])}"
+    )),
+    ("sessions", 10, lambda c: (
+        f"/api/appointments/attended-sessions/?patient={c['rng'].choice(c['patients'])}"
+        f"&start={c['year_ago']}&end={c['today']}"
+    )),
+    ("list", 7, lambda c: "/api/patients/"),
+    # vista síncrona (DRF) en ambos modos; bajo ASGI el cuerpo sale por
+    # bloques (backend/streaming.py). Se lee completo: su latencia es la
+    # descarga entera, no el primer byte
+    ("export", 3, lambda c: "/api/appointments/export/?output=csv"),
+]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga mixta contra gunicorn WSGI (sync) y gunicorn + uvicorn "
+        "(ASGI, vistas async): req/s y latencias p50 / p95 / p99 por "
+        "concurrencia. Usa la BD de DJANGO_SETTINGS_MODULE (solo lecturas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True,
+                            help="Usuario existente con el que se firman las requests")
+        parser.add_argument("--servers", nargs="+", choices=list(SERVERS),
+                            default=list(SERVERS))
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 64])
+        parser.add_argument("--duration", type=float, default=10, help="Segundos por nivel")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['username']}")
+
+        patients = list(Patient.objects.order_by("?").values_list("pk", flat=True)[:200])
+        if not patients:
+            raise CommandError("No hay pacientes: siembra datos primero (seed_patients)")
+
+        today = date.today()
+        month = today.replace(day=1)
+        ctx = {
+            "token": tokens_for_user(user)["access"],
+            "patients": patients,
+            "today": today,
+            "year_ago": today - timedelta(days=365),
+            "month": month,
+            "next_month": (month + timedelta(days=32)).replace(day=1),
+        }
+
+        self.stdout.write(
+            f"🗄 Motor: {connection.vendor}, {options['workers']} worker(s), "
+            f"{options['duration']:.0f}s por nivel"
+        )
+        self.stdout.write("Mezcla: " + ", ".join(f"{name} {weight}%" for name, weight, _ in MIX))
+        self.stdout.write(
+            f"{'modo':<6} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errores':>8}"
+        )
+
+        slowest = {}
+        for mode in options["servers"]:
+            with self._server(mode, options["workers"]) as port:
+                for concurrency in options["concurrency"]:
+                    results, elapsed = self._load(port, ctx, concurrency, options["duration"])
+                    latencies = [ms for _, ms, ok in results if ok]
+                    errors = sum(1 for _, _, ok in results if not ok)
+                    self.stdout.write(
+                        f"{mode:<6} {concurrency:>5} {len(results) / elapsed:>8.1f} "
+                        f"{_percentile(latencies, 50):>8.1f} "
+                        f"{_percentile(latencies, 95):>8.1f} "
+                        f"{_percentile(latencies, 99):>8.1f} {errors:>8}"
+                    )
+                slowest[mode] = results
+
+        # p99 por ruta en la concurrencia más alta: ¿quién espera detrás de export?
+        self.stdout.write(f"\np99 por ruta (concurrencia {options['concurrency'][-1]}):")
+        self.stdout.write(f"{'ruta':<10}" + "".join(f"{mode:>10}" for mode in slowest))
+        for name, _, _ in MIX:
+            row = f"{name:<10}"
+            for results in slowest.values():
+                row += f"{_percentile([ms for n, ms, ok in results if n == name and ok], 99):>10.1f}"
+            self.stdout.write(row)
+
+        self.stdout.write(self.style.SUCCESS("✅ Listo"))
+
+    # =========================================================
+    # 🚀 SERVIDOR
+    # =========================================================
+    @contextmanager
+    def _server(self, mode, workers):
+        app, extra = SERVERS[mode]
+        port = _free_port()
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(
+                [
+                    sys.executable, "-m", "gunicorn", app,
+                    "--bind", f"127.0.0.1:{port}",
+                    "--workers", str(workers),
+                    "--log-level", "warning",
+                    *extra,
+                ],
+                env=os.environ.copy(),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            try:
+                self._wait_ready(process, port, log)
+                yield port
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    def _wait_ready(self, process, port, log):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"El servidor no arrancó:\n{log.read().decode()[-2000:]}")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                conn.request("GET", "/api/")
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("El servidor no respondió en 30 s")
+
+    # =========================================================
+    # 📈 CARGA
+    # =========================================================
+    def _load(self, port, ctx, concurrency, duration):
+        """`concurrency` clientes en bucle cerrado durante `duration` s."""
+        results = []
+        lock = threading.Lock()
+        names = [name for name, _, _ in MIX]
+        weights = [weight for _, weight, _ in MIX]
+        urls = {name: url for name, _, url in MIX}
+        headers = {"Authorization": f"Bearer {ctx['token']}"}
+        deadline = time.monotonic() + duration
+
+        def client(seed):
+            local = dict(ctx, rng=random.Random(seed))
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            mine = []
+            while time.monotonic() < deadline:
+                name = local["rng"].choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    conn.request("GET", urls[name](local), headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    ok = False
+                mine.append((name, (time.perf_counter() - start) * 1000, ok))
+            conn.close()
+            with lock:
+                results.extend(mine)
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - start
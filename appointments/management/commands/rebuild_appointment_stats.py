@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from appointments.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el rollup AppointmentDailyStats desde las citas "
+        "(después de cargas masivas o para corregir desviaciones)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="YYYY-MM-DD")
+        parser.add_argument("--end", help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"] or "")
+        end = parse_date(options["end"] or "")
+
+        self.stdout.write("🔄 Reconstruyendo estadísticas diarias...")
+        written = rebuild_daily_stats(start, end)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {written} filas escritas"
+        ))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.10 on 2026-10-16 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    AppointmentDailyStats = apps.get_model("appointments", "AppointmentDailyStats")
+
+    appointments = Appointment.objects.order_by()
+    rows = [
+        AppointmentDailyStats(date=day, status=status, count=total)
+        for day, status, total in (
+            appointments.values("date", "status")
+            .annotate(total=Count("id"))
+            .values_list("date", "status", "total")
+        )
+    ]
+    rows += [
+        AppointmentDailyStats(
+            date=day, status=status, patient_id=patient_id, count=total
+        )
+        for day, status, patient_id, total in (
+            appointments.values("date", "status", "patient_id")
+            .annotate(total=Count("id"))
+            .values_list("date", "status", "patient_id", "total")
+        )
+    ]
+    AppointmentDailyStats.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_appointment_date_idx_and_more'),
+        ('patients', '0010_history_prescription_patient_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('scheduled', 'Programada'), ('completed', 'Asistió'), ('cancelled', 'Cancelada'), ('no_show', 'No asistió')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('patient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='patients.patient')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('patient__isnull', True)), fields=('date', 'status'), name='daily_stats_clinic_uniq'), models.UniqueConstraint(condition=models.Q(('patient__isnull', False)), fields=('patient', 'date', 'status'), name='daily_stats_patient_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
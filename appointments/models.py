@@ -1,7 +1,46 @@
-from django.db import models
+from datetime import date
+
+from django.db import models, transaction
+from django.db.models import (
+    Case, DateField, F, Max, Min, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
 from patients.models import Patient
 
 
+class AppointmentSeries(models.Model):
+    """
+    Plan de tratamiento: sesiones en días fijos de la semana a la misma
+    hora. Las citas se crean de una vez (appointments/series.py) y se
+    editan o cancelan juntas con `Appointment.series`.
+    """
+    patient = models.ForeignKey(
+        Patient,
+        related_name="appointment_series",
+        on_delete=models.CASCADE
+    )
+
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    weekdays = models.JSONField()  # [0 = lunes … 6 = domingo]
+    start_time = models.TimeField()
+    duration_minutes = models.PositiveIntegerField(default=60)
+
+    skip_holidays = models.BooleanField(default=True)
+    skip_dates = models.JSONField(default=list, blank=True)
+
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.patient.full_name} - {self.start_date} ({self.weekdays})"
+
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ("scheduled", "Programada"),
@@ -29,7 +68,35 @@ class Appointment(models.Model):
     attended = models.BooleanField(default=False)
     notes = models.TextField(blank=True)
 
+    series = models.ForeignKey(
+        AppointmentSeries,
+        related_name="appointments",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
+    # /appointments/changes/ (sync/changes.py); los .update() en bloque
+    # lo ponen a mano
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # paciente original: si una cita cambia de paciente hay que
+        # refrescar también las fechas del anterior
+        instance._loaded_patient_id = instance.__dict__.get("patient_id")
+        # fecha original: al mover una cita cambia de semana en el cache
+        instance._loaded_date = instance.__dict__.get("date")
+        # estado original: para mover el conteo en AppointmentDailyStats
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # los post_save (rollup diario) corren en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta:
         indexes = [
@@ -40,9 +107,107 @@ class Appointment(models.Model):
             models.Index(
                 fields=["patient_id"],
                 name="appointment_patient_idx"
+            ),
+            models.Index(
+                fields=["updated_at", "id"],
+                name="appointment_updated_idx"
             )
         ]
 
     def __str__(self):
         return f"{self.patient.full_name} - {self.date} {self.start_time}"
 
+
+class AppointmentDailyStats(models.Model):
+    """
+    Rollup de citas por día y estado. `patient=None` = toda la clínica;
+    con paciente = variante por paciente. Se mantiene desde los signals
+    de Appointment (appointments/stats.py) y se reconstruye con
+    `manage.py rebuild_appointment_stats`.
+    """
+    date = models.DateField()
+    status = models.CharField(
+        max_length=20,
+        choices=Appointment.STATUS_CHOICES
+    )
+    patient = models.ForeignKey(
+        Patient,
+        related_name="daily_stats",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "status"],
+                condition=Q(patient__isnull=True),
+                name="daily_stats_clinic_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["patient", "date", "status"],
+                condition=Q(patient__isnull=False),
+                name="daily_stats_patient_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.count}"
+
+
+
+def refresh_appointment_dates(patient_ids=None):
+    """
+    Recalcula `Patient.last_appointment_date` / `next_appointment_date`
+    en un solo UPDATE con subconsultas.
+
+    - última: cita no cancelada más reciente hasta hoy
+    - próxima: cita programada más cercana desde hoy
+
+    `patient_ids=None` recalcula todos los pacientes.
+    """
+    today = timezone.localdate()
+    active = (
+        Appointment.objects
+        .filter(patient_id=OuterRef("pk"))
+        .exclude(status="cancelled")
+        .order_by()
+        .values("patient_id")
+    )
+
+    last = Subquery(
+        active.filter(date__lte=today)
+        .annotate(last=Max("date"))
+        .values("last")
+    )
+    next_ = Subquery(
+        active.filter(date__gte=today, status="scheduled")
+        .annotate(next=Min("date"))
+        .values("next")
+    )
+
+    patients = Patient.objects.all()
+    if patient_ids is not None:
+        patients = patients.filter(pk__in=patient_ids)
+        # sus citas cambiaron: el paciente cuenta como cambio en /changes/
+        updated_at = Value(timezone.now())
+    else:
+        # recálculo diario: solo si las fechas se movieron (si no, todos
+        # los clientes volverían a bajar todos los pacientes cada día)
+        no_date = Value(date.min, output_field=DateField())
+        unchanged = (
+            Exact(Coalesce("last_appointment_date", no_date), Coalesce(last, no_date))
+            & Exact(Coalesce("next_appointment_date", no_date), Coalesce(next_, no_date))
+        )
+        updated_at = Case(
+            When(unchanged, then=F("updated_at")),
+            default=Value(timezone.now()),
+        )
+
+    return patients.update(
+        last_appointment_date=last,
+        next_appointment_date=next_,
+        updated_at=updated_at,
+    )
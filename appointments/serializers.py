@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Appointment
+
+from .availability import booking_lock, check_available, needs_check
+from .models import Appointment, AppointmentSeries
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -11,6 +13,34 @@ class AppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = "__all__"
+        read_only_fields = ["series"]
+
+    # =========================================================
+    # 🔒 EMPALMES: validación y guardado bajo el mismo lock
+    # =========================================================
+    def create(self, validated_data):
+        with booking_lock(validated_data["date"]):
+            self._check_available(None, validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with booking_lock(instance.date, validated_data.get("date", instance.date)):
+            self._check_available(instance, validated_data)
+            return super().update(instance, validated_data)
+
+    def _check_available(self, instance, data):
+        if not needs_check(instance, data):
+            return
+
+        def value(field):
+            return data.get(field, getattr(instance, field, None))
+
+        check_available(
+            value("date"),
+            value("start_time"),
+            value("duration_minutes") or Appointment._meta.get_field("duration_minutes").default,
+            exclude_ids=[instance.pk] if instance else (),
+        )
 
 
 class AppointmentListSerializer(serializers.ModelSerializer):
@@ -29,3 +59,70 @@ class AppointmentListSerializer(serializers.ModelSerializer):
             "duration_minutes",
             "status",
         ]
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    patient_name = serializers.CharField(
+        source="patient.full_name",
+        read_only=True
+    )
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False
+    )
+    skip_dates = serializers.ListField(
+        child=serializers.DateField(),
+        required=False
+    )
+
+    class Meta:
+        model = AppointmentSeries
+        fields = "__all__"
+
+    def validate_weekdays(self, value):
+        return sorted(set(value))
+
+    def validate_skip_dates(self, value):
+        # JSONField: fechas ISO
+        return sorted({day.isoformat() for day in value})
+
+    def validate(self, attrs):
+        if not attrs.get("count") and not attrs.get("end_date"):
+            raise serializers.ValidationError(
+                "Indica el número de sesiones (count) o la fecha final (end_date)"
+            )
+        if attrs.get("end_date") and attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError(
+                {"end_date": ["Debe ser posterior a start_date"]}
+            )
+        return attrs
+
+
+class AppointmentSeriesUpdateSerializer(serializers.Serializer):
+    start_time = serializers.TimeField(required=False)
+    duration_minutes = serializers.IntegerField(min_value=1, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class AppointmentStatusChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Appointment.STATUS_CHOICES)
+    attended = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        # como en seed_appointments_existing: asistió ⇔ completed
+        if "attended" in attrs and attrs["attended"] != (attrs["status"] == "completed"):
+            raise serializers.ValidationError(
+                {"attended": ["Solo las citas con status completed son asistidas"]}
+            )
+        return attrs
+
+
+class AppointmentBulkFilterSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    from_status = serializers.ChoiceField(
+        choices=Appointment.STATUS_CHOICES,
+        default="scheduled"
+    )
+    status = serializers.ChoiceField(choices=Appointment.STATUS_CHOICES)
+    patient = serializers.IntegerField(required=False)
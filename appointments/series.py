@@ -0,0 +1,188 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .availability import booking_lock, find_conflicts
+from .bulk import sync_bulk_changes
+from .models import Appointment, AppointmentSeries
+
+MAX_SERIES_SESSIONS = 60
+EDITABLE_FIELDS = ("start_time", "duration_minutes", "notes")
+
+
+# =========================================================
+# 🔁 EXPANSIÓN DE LA REGLA
+# =========================================================
+def is_holiday(day):
+    holidays = settings.CLINIC_HOLIDAYS
+    return f"{day:%m-%d}" in holidays or day.isoformat() in holidays
+
+
+def expand_series(start_date, weekdays, count=None, end_date=None,
+                  skip_dates=(), skip_holidays=True):
+    """
+    Fechas de la serie: `weekdays` desde `start_date` hasta juntar
+    `count` sesiones o llegar a `end_date` (lo que pase primero).
+    Los días saltados no cuentan como sesión. Devuelve (fechas, saltadas).
+    """
+    weekdays = set(weekdays)
+    skip_dates = {str(day) for day in skip_dates}
+    dates, skipped = [], []
+
+    day = start_date
+    while (count is None or len(dates) < count) and (end_date is None or day <= end_date):
+        if day.weekday() in weekdays:
+            if day.isoformat() in skip_dates or (skip_holidays and is_holiday(day)):
+                skipped.append(day)
+            else:
+                dates.append(day)
+                if len(dates) > MAX_SERIES_SESSIONS:
+                    raise serializers.ValidationError({
+                        "end_date": [f"Una serie no puede tener más de {MAX_SERIES_SESSIONS} sesiones"]
+                    })
+        day += timedelta(days=1)
+
+    return dates, skipped
+
+
+# =========================================================
+# 📅 ALTA, EDICIÓN Y CANCELACIÓN EN BLOQUE
+# =========================================================
+def create_series(data, skip_conflicts=False):
+    """
+    Crea la serie y todas sus citas en una transacción: empalmes
+    validados con un solo query de ocupación y un bulk_create.
+    `data` = validated_data de AppointmentSeriesSerializer.
+    Devuelve (serie, citas, {"holidays": [...], "conflicts": [...]}).
+    """
+    dates, skipped = expand_series(
+        data["start_date"],
+        data["weekdays"],
+        count=data.get("count"),
+        end_date=data.get("end_date"),
+        skip_dates=data.get("skip_dates", ()),
+        skip_holidays=data.get("skip_holidays", True),
+    )
+    if not dates:
+        raise serializers.ValidationError({"weekdays": ["La serie no tiene sesiones"]})
+
+    start_time = data["start_time"]
+    duration = data.get("duration_minutes", 60)
+
+    with booking_lock(*dates):
+        conflicts = sorted({
+            day for day, _, _ in find_conflicts([(day, start_time, duration) for day in dates])
+        })
+        if conflicts and not skip_conflicts:
+            raise serializers.ValidationError({
+                "conflicts": [f"{day:%Y-%m-%d} {start_time:%H:%M} ya está ocupado" for day in conflicts]
+            })
+
+        dates = [day for day in dates if day not in conflicts]
+        if not dates:
+            raise serializers.ValidationError({"conflicts": ["Todas las sesiones están ocupadas"]})
+
+        series = AppointmentSeries.objects.create(**data)
+        appointments = Appointment.objects.bulk_create([
+            Appointment(
+                patient_id=series.patient_id,
+                date=day,
+                start_time=start_time,
+                duration_minutes=duration,
+                notes=series.notes,
+                series=series,
+            )
+            for day in dates
+        ])
+        sync_bulk_changes(after=[(day, "scheduled", series.patient_id) for day in dates])
+
+    return series, appointments, {"holidays": skipped, "conflicts": conflicts}
+
+
+def pending_appointments(series, start=None):
+    """Citas de la serie que todavía se pueden mover o cancelar."""
+    return Appointment.objects.filter(
+        series=series,
+        status="scheduled",
+        date__gte=start or timezone.localdate(),
+    )
+
+
+def update_series(series, changes, start=None):
+    """
+    Cambia hora / duración / notas de las sesiones pendientes en un solo
+    UPDATE (validando empalmes si se mueve el horario). Devuelve cuántas.
+    """
+    changes = {field: value for field, value in changes.items() if field in EDITABLE_FIELDS}
+
+    with transaction.atomic():
+        # mismo orden que AppointmentSerializer.update: primero el
+        # booking_lock de los días y después las filas (al revés, un PATCH
+        # a una sesión en paralelo puede terminar en deadlock)
+        days = sorted(set(pending_appointments(series, start).values_list("date", flat=True)))
+
+        updated = 0
+        if days:
+            with booking_lock(*days):
+                # una sesión que otro request movió de día entre la lectura y
+                # el lock se queda como la dejó ese request
+                rows = list(
+                    pending_appointments(series, start)
+                    .filter(date__in=days)
+                    .select_for_update()
+                    .values_list("id", "date", "status", "patient_id")
+                )
+                ids = [pk for pk, _, _, _ in rows]
+
+                if "start_time" in changes or "duration_minutes" in changes:
+                    start_time = changes.get("start_time", series.start_time)
+                    duration = changes.get("duration_minutes", series.duration_minutes)
+                    conflicts = find_conflicts(
+                        [(day, start_time, duration) for _, day, _, _ in rows],
+                        exclude_ids=ids,
+                    )
+                    if conflicts:
+                        raise serializers.ValidationError({
+                            "conflicts": [
+                                f"{day:%Y-%m-%d} {start_time:%H:%M} ya está ocupado"
+                                for day, _, _ in conflicts
+                            ]
+                        })
+
+                updated = Appointment.objects.filter(pk__in=ids).update(
+                    **changes, updated_at=timezone.now()
+                )
+                # fecha y estado no cambian: solo se refresca el calendario
+                sync_bulk_changes(
+                    before=[row[1:] for row in rows],
+                    after=[row[1:] for row in rows],
+                )
+
+        AppointmentSeries.objects.filter(pk=series.pk).update(**changes)
+
+    for field, value in changes.items():
+        setattr(series, field, value)
+    return updated
+
+
+def cancel_series(series, start=None):
+    """Cancela las sesiones pendientes en un solo UPDATE. Devuelve cuántas."""
+    with transaction.atomic():
+        rows = list(
+            pending_appointments(series, start)
+            .select_for_update()
+            .values_list("id", "date", "status", "patient_id")
+        )
+        cancelled = Appointment.objects.filter(
+            pk__in=[pk for pk, _, _, _ in rows]
+        ).update(status="cancelled", attended=False, updated_at=timezone.now())
+
+        sync_bulk_changes(
+            before=[(day, status, patient_id) for _, day, status, patient_id in rows],
+            after=[(day, "cancelled", patient_id) for _, day, _, patient_id in rows],
+        )
+
+    return cancelled
@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from patients.models import Patient
+from sync.changes import record_deletion
+
+from .calendar import invalidate_calendar
+from .live import deleted_event, publish, saved_event
+from .models import Appointment, refresh_appointment_dates
+from .stats import apply_stats, stats_changes
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def update_patient_dates(sender, instance, **kwargs):
+    patient_ids = {instance.patient_id}
+
+    previous = getattr(instance, "_loaded_patient_id", None)
+    if previous:
+        patient_ids.add(previous)
+
+    refresh_appointment_dates(patient_ids)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_calendar_weeks(sender, instance, **kwargs):
+    changes = {(instance.date, instance.patient_id)}
+
+    previous_date = getattr(instance, "_loaded_date", None)
+    if previous_date:
+        changes.add((
+            previous_date,
+            getattr(instance, "_loaded_patient_id", None) or instance.patient_id,
+        ))
+
+    invalidate_calendar(changes)
+
+
+@receiver(post_save, sender=Appointment)
+def publish_saved_appointment(sender, instance, created, **kwargs):
+    # calendario en vivo (SSE); sale al hacer COMMIT
+    publish([saved_event(instance, created)])
+
+
+@receiver(post_delete, sender=Appointment)
+def publish_deleted_appointment(sender, instance, **kwargs):
+    publish([deleted_event(instance)])
+
+
+@receiver(post_save, sender=Appointment)
+def update_daily_stats(sender, instance, **kwargs):
+    # Appointment.save() abre la transacción: cita y rollup van juntos
+    apply_stats(stats_changes(instance))
+
+
+@receiver(post_delete, sender=Appointment)
+def discount_daily_stats(sender, instance, **kwargs):
+    apply_stats(stats_changes(instance, deleted=True))
+
+
+@receiver(post_delete, sender=Appointment)
+def record_appointment_deletion(sender, instance, **kwargs):
+    # tombstone para /appointments/changes/
+    record_deletion(instance, patient_id=instance.patient_id)
+
+
+@receiver(post_save, sender=Appointment)
+def record_patient_change(sender, instance, created, **kwargs):
+    # cambió de paciente: ?patient=<anterior> la ve como borrada
+    previous = getattr(instance, "_loaded_patient_id", None)
+    if not created and previous and previous != instance.patient_id:
+        record_deletion(instance, patient_id=previous)
+
+
+@receiver(post_save, sender=Appointment)
+def remember_loaded_values(sender, instance, **kwargs):
+    # después de los receivers de arriba: la cita guardada es el nuevo original
+    instance._loaded_patient_id = instance.patient_id
+    instance._loaded_date = instance.date
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=Patient)
+def invalidate_patient_calendar(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_loaded_full_name", None)
+    if created or previous is None or previous == instance.full_name:
+        return
+
+    # el nombre es el título de cada evento: todas sus semanas
+    weeks = Appointment.objects.filter(patient=instance).dates("date", "week")
+    invalidate_calendar((monday, instance.pk) for monday in weeks)
+    instance._loaded_full_name = instance.full_name
@@ -0,0 +1,174 @@
+import operator
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Appointment, AppointmentDailyStats
+
+
+# =========================================================
+# 🔄 MANTENIMIENTO INCREMENTAL
+# =========================================================
+def stats_changes(instance, deleted=False):
+    """
+    Counter {(fecha, status, patient_id): ±1} de una cita guardada o
+    borrada, comparando contra los valores con que se cargó de la BD.
+    """
+    changes = Counter()
+    loaded = (
+        getattr(instance, "_loaded_date", None),
+        getattr(instance, "_loaded_status", None),
+        getattr(instance, "_loaded_patient_id", None),
+    )
+    current = (instance.date, instance.status, instance.patient_id)
+
+    if deleted:
+        changes[loaded if loaded[0] is not None else current] -= 1
+        return changes
+
+    changes[current] += 1
+    if loaded[0] is not None:
+        changes[loaded] -= 1
+
+    return Counter({key: delta for key, delta in changes.items() if delta})
+
+
+def apply_stats(changes):
+    """
+    Suma los deltas al rollup. Antes de sumar se insertan en 0 las filas
+    que falten (un INSERT … ON CONFLICT DO NOTHING), así dos transacciones
+    que crean el mismo día no se pisan; después un UPDATE por valor de
+    delta que toca a la vez las filas de la clínica y las de los
+    pacientes (una cita guardada = 1 o 2 UPDATEs; una serie = 1).
+    Las escrituras masivas (bulk_create / update) no emiten signals:
+    deben llamarla explícitamente o correr rebuild_appointment_stats.
+    """
+    # la fila de la clínica recibe la suma de todos sus pacientes
+    clinic = Counter()
+    for (day, status, _), delta in changes.items():
+        clinic[(day, status)] += delta
+
+    by_delta = defaultdict(list)
+    for (day, status), delta in clinic.items():
+        if delta:
+            by_delta[delta].append(Q(patient__isnull=True, date=day, status=status))
+    for (day, status, patient_id), delta in changes.items():
+        if delta:
+            by_delta[delta].append(Q(patient_id=patient_id, date=day, status=status))
+
+    if not by_delta:
+        return
+
+    with transaction.atomic(savepoint=False):
+        missing = [
+            AppointmentDailyStats(date=day, status=status)
+            for (day, status), delta in clinic.items() if delta > 0
+        ] + [
+            AppointmentDailyStats(date=day, status=status, patient_id=patient_id)
+            for (day, status, patient_id), delta in changes.items() if delta > 0
+        ]
+        if missing:
+            AppointmentDailyStats.objects.bulk_create(missing, ignore_conflicts=True)
+
+        # delta negativo sin fila: el paciente se está borrando
+        # (CASCADE ya quitó las suyas) → solo se descuenta la clínica
+        for delta, conditions in by_delta.items():
+            AppointmentDailyStats.objects.filter(
+                reduce(operator.or_, conditions)
+            ).update(count=F("count") + delta)
+
+
+def rebuild_daily_stats(start=None, end=None):
+    """
+    Recalcula el rollup desde `appointments_appointment` (rango opcional).
+    Devuelve el número de filas escritas.
+    """
+    appointments = Appointment.objects.order_by()
+    existing = AppointmentDailyStats.objects.all()
+
+    if start:
+        appointments = appointments.filter(date__gte=start)
+        existing = existing.filter(date__gte=start)
+    if end:
+        appointments = appointments.filter(date__lte=end)
+        existing = existing.filter(date__lte=end)
+
+    with transaction.atomic():
+        existing.delete()
+
+        rows = [
+            AppointmentDailyStats(date=day, status=status, count=total)
+            for day, status, total in (
+                appointments.values("date", "status")
+                .annotate(total=Count("id"))
+                .values_list("date", "status", "total")
+            )
+        ]
+        rows += [
+            AppointmentDailyStats(
+                date=day, status=status, patient_id=patient_id, count=total
+            )
+            for day, status, patient_id, total in (
+                appointments.values("date", "status", "patient_id")
+                .annotate(total=Count("id"))
+                .values_list("date", "status", "patient_id", "total")
+                .iterator(chunk_size=5000)
+            )
+        ]
+        AppointmentDailyStats.objects.bulk_create(rows, batch_size=5000)
+
+    return len(rows)
+
+
+# =========================================================
+# 📊 REPORTES
+# =========================================================
+def _summary_queryset(start=None, end=None, patient_id=None):
+    qs = AppointmentDailyStats.objects.filter(
+        **({"patient_id": patient_id} if patient_id else {"patient__isnull": True})
+    )
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+
+    return (
+        qs.values("status")
+        .annotate(total=Sum("count"))
+        .order_by("status")
+    )
+
+
+def attendance_summary(start=None, end=None, patient_id=None):
+    """
+    Totales de asistencia de la clínica (o de un paciente) sumando filas
+    del rollup: un solo query sin importar cuántas citas haya.
+    """
+    return _summarize(list(_summary_queryset(start, end, patient_id)))
+
+
+async def aattendance_summary(start=None, end=None, patient_id=None):
+    """attendance_summary con el ORM async."""
+    return _summarize([row async for row in _summary_queryset(start, end, patient_id)])
+
+
+def _summarize(rows):
+    by_status = [row for row in rows if row["total"]]
+    totals = {row["status"]: row["total"] for row in by_status}
+    total = sum(totals.values())
+
+    def rate(value):
+        return round((value / total * 100), 2) if total else 0
+
+    return {
+        "total": total,
+        "attended": totals.get("completed", 0),
+        "no_show": totals.get("no_show", 0),
+        "cancelled": totals.get("cancelled", 0),
+        "attendance_rate": rate(totals.get("completed", 0)),
+        "no_show_rate": rate(totals.get("no_show", 0)),
+        "cancellation_rate": rate(totals.get("cancelled", 0)),
+        "by_status": by_status,
+    }
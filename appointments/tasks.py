@@ -0,0 +1,41 @@
+import logging
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
+
+from backend.caches import is_shared
+from jobs.registry import task
+
+from .bitacora import BITACORA_FORMATS, batch_documents
+from .models import refresh_appointment_dates
+from .stats import rebuild_daily_stats
+
+logger = logging.getLogger(__name__)
+
+
+@task("appointments.rebuild_stats")
+def rebuild_stats(start=None, end=None):
+    """rebuild_appointment_stats en segundo plano (fechas ISO opcionales)."""
+    return rebuild_daily_stats(parse_date(start or ""), parse_date(end or ""))
+
+
+@task("appointments.refresh_dates")
+def refresh_dates(patient_ids=None):
+    # "próxima" y "última" cita dependen de hoy: se programa diario
+    return refresh_appointment_dates(patient_ids)
+
+
+@task("appointments.render_bitacoras")
+def render_bitacoras(start, end, output="docx"):
+    """
+    Deja en cache las bitácoras del rango: el ZIP de
+    attended-sessions/batch sale después sin renderizar nada. Solo sirve
+    con BITACORA_CACHE_ALIAS compartido (el default, en la BD).
+    """
+    if output not in BITACORA_FORMATS:
+        raise ValueError(f"Formato no soportado: {output}")
+    if not is_shared(settings.BITACORA_CACHE_ALIAS):
+        # en LocMem quedarían solo en el proceso del worker
+        logger.warning("BITACORA_CACHE_ALIAS no es compartido: no se prerenderiza")
+        return 0
+    return sum(1 for _ in batch_documents(parse_date(start), parse_date(end), output))
@@ -1,6 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from django.db.models import Count
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils.dateparse import parse_date
 
 from rest_framework.viewsets import ModelViewSet
@@ -8,17 +10,55 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    NotAuthenticated,
+    ParseError,
+    PermissionDenied,
+)
 
-
-from .models import Appointment
+from backend.async_views import AsyncAPIView, authenticate, json_response, unauthorized
+from backend.params import parse_date_param
+from backend.streaming import streaming_content
+from patients.exporter import ExportMixin
+from sync.changes import changes_response
+from users.roles import ADMIN, has_role
+
+from .availability import MAX_RANGE_DAYS, free_slots
+from .bulk import MAX_BULK_CHANGES, bulk_set_status
+from .bitacora import (
+    BITACORA_FORMATS,
+    CONTENT_TYPES,
+    aattended_sessions,
+    acached_document,
+    batch_zip,
+    document_context,
+    document_filename,
+)
+from .live import event_stream
+from .calendar import (
+    acached_calendar,
+    acalendar_rows,
+    calendar_cache_stats,
+    calendar_queryset,
+    encode_events,
+)
+from .models import Appointment, AppointmentSeries
+from .series import cancel_series, create_series, update_series
+from .stats import aattendance_summary, attendance_summary
 from .serializers import (
     AppointmentSerializer,
     AppointmentListSerializer,
+    AppointmentBulkFilterSerializer,
+    AppointmentSeriesSerializer,
+    AppointmentSeriesUpdateSerializer,
+    AppointmentStatusChangeSerializer,
 )
 
 
-class AppointmentViewSet(ModelViewSet):
+class AppointmentViewSet(ExportMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
+    export_dataset = "appointments"
 
     queryset = (
         Appointment.objects
@@ -32,7 +72,12 @@ class AppointmentViewSet(ModelViewSet):
     def get_serializer_class(self):
         if self.action == "list":
             return AppointmentListSerializer
-        if self.action == "calendar":
+        if self.action in ("series", "series_detail"):
+            return AppointmentSeriesSerializer
+        if self.action in (
+            "calendar_cache", "availability", "bulk_status",
+            "bitacora_document", "bitacora_batch",
+        ):
             return None
         return AppointmentSerializer
 
@@ -49,99 +94,361 @@ class AppointmentViewSet(ModelViewSet):
         return qs
 
     # =========================================================
-    # 📅 FULLCALENDAR
+    # 📅 FULLCALENDAR (los eventos: CalendarView, async)
+    # =========================================================
+    @action(detail=False, methods=["get"], url_path="calendar-cache")
+    def calendar_cache(self, request):
+        """Contadores de aciertos / fallos del cache de calendar."""
+        if not has_role(request.user, ADMIN):
+            raise PermissionDenied("Solo Admin puede ver estadísticas")
+        return Response(calendar_cache_stats())
+
+    # =========================================================
+    # 🔄 SINCRONIZACIÓN INCREMENTAL
     # =========================================================
     @action(detail=False, methods=["get"])
-    def calendar(self, request):
-        start = request.query_params.get("start")
-        end = request.query_params.get("end")
+    def changes(self, request):
+        """
+        Citas creadas / modificadas / borradas desde ?since=<token>
+        (sin token: todas). Respuesta {"changed", "deleted", "token",
+        "more"}: con `more` se vuelve a pedir con el nuevo token; si no,
+        ese token es el `since` del siguiente sondeo. Acepta ?patient=.
+        """
         patient_id = request.query_params.get("patient")
-
-        qs = (
-            Appointment.objects
-            .select_related("patient")
-            .only(
-                "id",
-                "date",
-                "start_time",
-                "duration_minutes",
-                "status",
-                "attended",
-                "patient__full_name",
+        if patient_id and not patient_id.isdigit():
+            return Response(
+                {"detail": "patient debe ser un id"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        return changes_response(
+            self,
+            self.get_queryset(),
+            deleted_filter={"patient_id": int(patient_id)} if patient_id else None,
         )
 
-        if start and end:
-            qs = qs.filter(date__gte=start, date__lt=end)
+    # =========================================================
+    # ✅ CIERRE DEL DÍA: ESTADOS EN BLOQUE
+    # =========================================================
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """
+        Cambia el estado de muchas citas con pocos UPDATEs.
+        Body: {"changes": [{"id", "status", "attended"?}, ...]}
+          o   {"date", "status", "from_status"?, "patient"?}
+              (p.ej. todas las `scheduled` del día → `completed`)
+        Devuelve un resultado por id.
+        """
+        if "changes" not in request.data:
+            serializer = AppointmentBulkFilterSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            data = serializer.validated_data
+
+            queryset = Appointment.objects.filter(
+                date=data["date"], status=data["from_status"]
+            )
+            if "patient" in data:
+                queryset = queryset.filter(patient_id=data["patient"])
+
+            if queryset.order_by("pk")[MAX_BULK_CHANGES:].exists():
+                return Response(
+                    {"detail": f"more than {MAX_BULK_CHANGES} appointments match; narrow it down with patient"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            results = bulk_set_status(queryset=queryset, status=data["status"])
+            return Response({
+                "updated": sum(r["ok"] for r in results.values()),
+                "results": list(results.values()),
+            })
 
-        if patient_id:
-            qs = qs.filter(patient_id=patient_id)
+        changes = request.data["changes"]
+        if not isinstance(changes, list) or len(changes) > MAX_BULK_CHANGES:
+            return Response(
+                {"detail": f"changes must be a list of at most {MAX_BULK_CHANGES} items"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # resultados en el orden del request; los válidos se llenan después
+        valid, results = {}, []
+        for item in changes:
+            serializer = AppointmentStatusChangeSerializer(data=item)
+            if serializer.is_valid():
+                pk = serializer.validated_data["id"]
+                valid[pk] = serializer.validated_data["status"]
+                results.append(pk)
+            else:
+                results.append({
+                    "id": item.get("id") if isinstance(item, dict) else None,
+                    "ok": False,
+                    "errors": serializer.errors,
+                })
+
+        applied = bulk_set_status(changes=valid) if valid else {}
+        results = [
+            applied[result] if isinstance(result, int) else result
+            for result in results
+        ]
 
-        events = []
-        for a in qs.order_by("date", "start_time"):
-            start_dt = datetime.combine(a.date, a.start_time)
-            end_dt = start_dt + timedelta(minutes=a.duration_minutes)
-
-            events.append({
-                "id": a.id,
-                "title": a.patient.full_name,
-                "start": start_dt.isoformat(),
-                "end": end_dt.isoformat(),
-                "extendedProps": {
-                    "status": a.status,
-                    "attended": a.attended,
-                },
+        return Response({
+            "updated": sum(1 for result in results if result["ok"]),
+            "results": results,
+        })
+
+    # =========================================================
+    # 🔁 SERIES (PLAN DE TRATAMIENTO)
+    # =========================================================
+    @action(detail=False, methods=["post"])
+    def series(self, request):
+        """
+        Crea todas las sesiones de un plan en una transacción.
+        Body: patient, start_date, weekdays, start_time, duration_minutes,
+        count | end_date, skip_dates, skip_holidays, notes.
+        ?skip_conflicts=1 agenda las sesiones libres y reporta el resto.
+        """
+        serializer = AppointmentSeriesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        series, appointments, skipped = create_series(
+            serializer.validated_data,
+            skip_conflicts=request.query_params.get("skip_conflicts") in ("1", "true"),
+        )
+
+        return Response({
+            **AppointmentSeriesSerializer(series).data,
+            "appointments": [
+                {"id": appointment.id, "date": appointment.date}
+                for appointment in appointments
+            ],
+            "skipped": skipped,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        methods=["get", "patch", "delete"],
+        url_path=r"series/(?P<series_id>\d+)",
+        url_name="series-detail",
+    )
+    def series_detail(self, request, series_id=None):
+        """
+        GET: la serie y sus citas. PATCH (start_time, duration_minutes,
+        notes) y DELETE (cancelar) aplican a las sesiones pendientes
+        desde ?from= (default hoy) en un solo UPDATE.
+        """
+        series = get_object_or_404(
+            AppointmentSeries.objects.select_related("patient"), pk=series_id
+        )
+        start = parse_date_param(request.query_params, "from")
+
+        if request.method == "PATCH":
+            serializer = AppointmentSeriesUpdateSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            updated = update_series(series, serializer.validated_data, start)
+            return Response({
+                **AppointmentSeriesSerializer(series).data,
+                "updated": updated,
             })
 
-        return Response(events)
+        if request.method == "DELETE":
+            return Response({"cancelled": cancel_series(series, start)})
+
+        return Response({
+            **AppointmentSeriesSerializer(series).data,
+            "appointments": list(
+                series.appointments
+                .order_by("date", "start_time")
+                .values("id", "date", "start_time", "status")
+            ),
+        })
 
     # =========================================================
-    # 📋 BITÁCORA (SESIONES ASISTIDAS)
+    # 🕘 HORARIOS LIBRES
     # =========================================================
-    @action(detail=False, methods=["get"], url_path="attended-sessions")
-    def bitacora(self, request):
-        patient_id = request.query_params.get("patient")
+    @action(detail=False, methods=["get"])
+    def availability(self, request):
+        """
+        Horarios libres dentro del horario de la clínica.
+        ?start=&end=&duration= (minutos, default CLINIC_SLOT_DURATION)
+        """
+        start, end = self._parse_dates(request)
+        duration = request.query_params.get("duration") or ""
 
-        if not patient_id:
+        if not start or not end or end < start:
             return Response(
-                {"detail": "patient parameter is required"},
+                {"detail": "start and end parameters are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if (end - start).days >= MAX_RANGE_DAYS:
+            return Response(
+                {"detail": f"date range must be shorter than {MAX_RANGE_DAYS} days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if duration and (not duration.isdigit() or not 0 < int(duration) <= 24 * 60):
+            return Response(
+                {"detail": "duration must be a number of minutes"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        start, end = self._parse_dates(request)
-        if not start or not end:
+        days = free_slots(start, end, duration=int(duration) if duration else None)
+
+        return Response({
+            "date_range": {"start": start, "end": end},
+            "days": [
+                {
+                    "date": day,
+                    "slots": [
+                        {"start": f"{begin:%H:%M}", "end": f"{finish:%H:%M}"}
+                        for begin, finish in slots
+                    ],
+                }
+                for day, slots in days
+            ],
+        })
+
+    # =========================================================
+    # 📋 BITÁCORA (SESIONES ASISTIDAS; JSON y documento: vistas async)
+    # =========================================================
+    @action(detail=False, methods=["get"], url_path="attended-sessions/batch")
+    def bitacora_batch(self, request):
+        """
+        ZIP con la bitácora de todos los pacientes con sesiones en el mes.
+        ?month=YYYY-MM&output=docx|pdf
+
+        Síncrona como export: el ZIP sale por partes (backend/streaming.py)
+        y el render va al pool de procesos de bitacora.py.
+        """
+        if not has_role(request.user, ADMIN):
+            raise PermissionDenied("Solo Admin puede generar bitácoras en lote")
+
+        try:
+            month = parse_date(f"{request.query_params.get('month') or ''}-01")
+        except ValueError:
+            month = None
+        fmt = request.query_params.get("output") or "docx"
+
+        if not month:
             return Response(
-                {"detail": "start and end parameters are required"},
+                {"detail": "month parameter is required (YYYY-MM)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if fmt not in BITACORA_FORMATS:
+            return Response(
+                {"detail": f"output must be one of {BITACORA_FORMATS}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = (
-            Appointment.objects
-            .select_related("patient")
-            .filter(
+        end = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        response = StreamingHttpResponse(
+            streaming_content(request, batch_zip(month, end, fmt)),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="bitacoras_{month:%Y-%m}_{fmt}.zip"'
+        )
+        return response
+
+    # =========================================================
+    # 🏥 REPORTE DE ASISTENCIA DE LA CLÍNICA
+    # =========================================================
+    @action(detail=False, methods=["get"], url_path="attendance_report")
+    def attendance_report(self, request):
+        """
+        Asistencia, inasistencia y cancelaciones de toda la clínica en
+        ?start=&end= (opcionales), sumando el rollup diario.
+        """
+        start, end = self._parse_dates(request)
+
+        return Response({
+            "date_range": {"start": start, "end": end},
+            **attendance_summary(start, end),
+        })
+
+    # =========================================================
+    # 🛠 HELPERS
+    # =========================================================
+    def _parse_dates(self, request):
+        return parse_dates(request.query_params)
+
+
+def parse_dates(params):
+    """?start=&end= (None si faltan); ParseError → 400 si no son fechas reales."""
+    return parse_date_param(params, "start"), parse_date_param(params, "end")
+
+
+# =========================================================
+# ⚡ LECTURAS ASYNC (ASGI)
+# =========================================================
+# Las rutas más pedidas, fuera del ViewSet (DRF no tiene vistas async):
+# mismas URLs y mismas respuestas, con el ORM y el cache async. Bajo
+# uvicorn no ocupan un hilo mientras esperan a la BD.
+class CalendarView(AsyncAPIView):
+    async def get(self, request):
+        """
+        Eventos de FullCalendar. Ruta rápida: tuplas con inicio/fin
+        calculados en SQL y JSON ya serializado (sin renderer de DRF).
+        Con start y end el resultado se arma desde el cache por semana.
+        """
+        start, end = parse_dates(request.GET)
+        patient_id = request.GET.get("patient")
+
+        if start and end and (not patient_id or patient_id.isdigit()):
+            content = await acached_calendar(
+                start, end, int(patient_id) if patient_id else None
+            )
+        else:
+            content = encode_events(await acalendar_rows(calendar_queryset(
+                start=request.GET.get("start"),
+                end=request.GET.get("end"),
                 patient_id=patient_id,
-                status="completed",
-                date__range=(start, end),
+            )))
+
+        return HttpResponse(content, content_type="application/json")
+
+
+class PatientReportView(AsyncAPIView):
+    async def get(self, request):
+        """📊 Reporte estadístico por paciente (rollup diario)."""
+        patient_id = request.GET.get("patient")
+        start, end = parse_dates(request.GET)
+
+        if not patient_id:
+            return json_response(
+                {"detail": "patient parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            .order_by("date")
-        )
 
-        # 📅 Fechas únicas (YYYY-MM-DD)
-        dates = (
-            qs.values_list("date", flat=True)
-            .distinct()
-        )
+        return json_response({
+            "patient_id": patient_id,
+            **await aattendance_summary(start, end, patient_id=patient_id),
+        })
 
-        print(dates)
 
-        patient_name = qs.first().patient.full_name if qs.exists() else None
-        first_date = dates.first()
+class BitacoraView(AsyncAPIView):
+    async def get(self, request):
+        """📋 Sesiones asistidas de un paciente para la bitácora."""
+        patient_id = request.GET.get("patient")
 
-        return Response({
+        if not patient_id:
+            return json_response(
+                {"detail": "patient parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start, end = parse_dates(request.GET)
+        if not start or not end:
+            return json_response(
+                {"detail": "start and end parameters are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # 📅 Fechas únicas (YYYY-MM-DD) + nombre, en un solo query
+        patient_name, dates = await aattended_sessions(patient_id, start, end)
+
+        return json_response({
             "patient": patient_name,
             "month": (
-                first_date.strftime("%B %Y").upper()
-                if first_date
+                dates[0].strftime("%B %Y").upper()
+                if dates
                 else ""
             ),
             "date_range": {
@@ -153,56 +460,83 @@ class AppointmentViewSet(ModelViewSet):
             ],
         })
 
-    # =========================================================
-    # 📊 REPORTE ESTADÍSTICO POR PACIENTE
-    # =========================================================
-    @action(detail=False, methods=["get"], url_path="patient-report")
-    def patient_report(self, request):
-        patient_id = request.query_params.get("patient")
-        start = request.query_params.get("start")
-        end = request.query_params.get("end")
 
-        if not patient_id:
-            return Response(
-                {"detail": "patient parameter is required"},
+class BitacoraDocumentView(AsyncAPIView):
+    async def get(self, request):
+        """
+        📋 Bitácora ya llenada (mismo template que el frontend).
+        ?patient=&start=&end=&output=docx|pdf
+        """
+        patient_id = request.GET.get("patient")
+        start, end = parse_dates(request.GET)
+        fmt = request.GET.get("output") or "docx"
+
+        if not patient_id or not start or not end:
+            return json_response(
+                {"detail": "patient, start and end parameters are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if fmt not in BITACORA_FORMATS:
+            return json_response(
+                {"detail": f"output must be one of {BITACORA_FORMATS}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = Appointment.objects.filter(patient_id=patient_id)
-
-        if start:
-            qs = qs.filter(date__gte=start)
-        if end:
-            qs = qs.filter(date__lte=end)
-
-        total = qs.count()
-        attended = qs.filter(status="completed").count()
-        no_show = qs.filter(status="no_show").count()
-        cancelled = qs.filter(status="cancelled").count()
-
-        attendance_rate = round(
-            (attended / total * 100), 2
-        ) if total else 0
+        patient_name, dates = await aattended_sessions(patient_id, start, end)
+        if not dates:
+            return json_response(
+                {"detail": "No hay sesiones asistidas en el periodo"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        by_status = (
-            qs.values("status")
-            .annotate(total=Count("id"))
+        context = document_context(patient_name, start, end, dates)
+        response = HttpResponse(
+            await acached_document(patient_id, start, end, fmt, context),
+            content_type=CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{document_filename(patient_name, fmt)}"'
+        )
+        return response
+
+
+# =========================================================
+# 📡 CALENDARIO EN VIVO (SSE, requiere ASGI)
+# =========================================================
+async def calendar_stream(request):
+    """
+    Server-Sent Events con las citas creadas, modificadas y borradas
+    dentro de ?start&end (rango visible de FullCalendar, end exclusivo)
+    y ?patient opcional. Cada conexión es una corrutina esperando en su
+    cola: no ocupa un hilo ni una conexión a la BD mientras está ociosa.
+    """
+    try:
+        user = await sync_to_async(authenticate)(request, query_token=True)
+    except AuthenticationFailed as error:
+        return unauthorized(error.detail)
+    if user is None:
+        return unauthorized(NotAuthenticated.default_detail)
+
+    try:
+        start, end = parse_dates(request.GET)
+    except ParseError as error:
+        return json_response({"detail": error.detail}, status=400)
+    if not start or not end or end <= start:
+        return json_response({"detail": "start and end parameters are required"}, status=400)
+    if (end - start).days > MAX_RANGE_DAYS:
+        return json_response(
+            {"detail": f"date range must be at most {MAX_RANGE_DAYS} days"}, status=400
         )
 
-        return Response({
-            "patient_id": patient_id,
-            "total": total,
-            "attended": attended,
-            "no_show": no_show,
-            "cancelled": cancelled,
-            "attendance_rate": attendance_rate,
-            "by_status": by_status,
-        })
+    patient_id = request.GET.get("patient")
+    if patient_id and not patient_id.isdigit():
+        return json_response({"detail": "patient debe ser un id"}, status=400)
 
-    # =========================================================
-    # 🛠 HELPERS
-    # =========================================================
-    def _parse_dates(self, request):
-        start = parse_date(request.query_params.get("start"))
-        end = parse_date(request.query_params.get("end"))
-        return start, end
+    response = StreamingHttpResponse(
+        event_stream(start, end, int(patient_id) if patient_id else None, token=request.auth),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx: entregar cada evento en cuanto se escribe
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,149 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.caches import is_shared
+
+User = get_user_model()
+
+REVOKED_KEY = "auth:revoked:{}"
+# copia por proceso (cache "default") de lo leído del cache compartido;
+# 0 = sin revocación
+LOCAL_REVOKED_KEY = "auth:revoked-local:{}"
+
+
+# =========================================================
+# 🚫 REVOCACIÓN
+# =========================================================
+def _revocations():
+    return caches[settings.TOKEN_REVOCATION_CACHE_ALIAS]
+
+
+def _local_ttl():
+    return getattr(settings, "TOKEN_REVOCATION_LOCAL_TTL", 5)
+
+
+def revoke_tokens(user_ids):
+    """
+    Invalida los access tokens emitidos hasta ahora (roles cambiaron,
+    usuario desactivado, nueva contraseña). Basta con recordarlo lo que
+    dura un access token, en TOKEN_REVOCATION_CACHE_ALIAS (compartido
+    para que llegue a todos los workers).
+
+    Se escribe al hacer COMMIT, con la hora en microsegundos: un token
+    emitido después ya lee los datos nuevos y sigue valiendo, aunque
+    sea en el mismo segundo.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def revoke():
+        lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        now = time.time()
+        _revocations().set_many(
+            {REVOKED_KEY.format(pk): now for pk in user_ids},
+            timeout=lifetime,
+        )
+        caches["default"].set_many(
+            {LOCAL_REVOKED_KEY.format(pk): now for pk in user_ids},
+            timeout=_local_ttl(),
+        )
+
+    transaction.on_commit(revoke)
+
+
+def issued_at(token):
+    """
+    Hora de emisión: `iat_us` (microsegundos, auth/tokens.py) o, en
+    tokens anteriores, `iat` en segundos (un token de ese mismo segundo
+    se toma como revocado).
+    """
+    if "iat_us" in token:
+        return token["iat_us"] / 10**6
+    return token.get("iat", 0)
+
+
+def is_revoked(user_id, issued):
+    """
+    Una query al cache compartido por usuario cada
+    TOKEN_REVOCATION_LOCAL_TTL segundos; mientras, la copia del proceso.
+    """
+    local = caches["default"]
+    revoked_at = local.get(LOCAL_REVOKED_KEY.format(user_id))
+    if revoked_at is None:
+        revoked_at = _revocations().get(REVOKED_KEY.format(user_id)) or 0
+        local.set(LOCAL_REVOKED_KEY.format(user_id), revoked_at, _local_ttl())
+    return bool(revoked_at) and issued <= revoked_at
+
+
+# =========================================================
+# 🔑 AUTENTICACIÓN
+# =========================================================
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication sin SELECT a auth_user: el usuario se arma con los
+    claims firmados (user_id, username, roles; ver auth/tokens.py).
+
+    - Tokens sin claim "roles" (emitidos antes) → carga normal desde BD
+    - TOKEN_REVOCATION_CACHE_ALIAS por proceso (LocMem) → también desde
+      BD: la revocación hecha en otro worker no llegaría
+    - JWT_TOKEN_CACHE_TTL > 0 → los tokens ya verificados se recuerdan
+      unos segundos en memoria del worker (evita decodificar y verificar
+      la firma en cada request)
+    """
+    _validated = {}
+    max_cached_tokens = 1024
+
+    def get_validated_token(self, raw_token):
+        ttl = getattr(settings, "JWT_TOKEN_CACHE_TTL", 0)
+        if not ttl:
+            return super().get_validated_token(raw_token)
+
+        now = time.monotonic()
+        cached = self._validated.get(raw_token)
+        if cached is not None and cached[1] > now:
+            token = cached[0]
+            # el TTL en memoria nunca extiende la vida del token
+            if token["exp"] > time.time():
+                return token
+
+        token = super().get_validated_token(raw_token)
+        if len(self._validated) >= self.max_cached_tokens:
+            self._validated.clear()
+        self._validated[raw_token] = (token, now + ttl)
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed(
+                "El token no identifica a un usuario", code="token_not_valid"
+            )
+
+        if is_revoked(user_id, issued_at(validated_token)):
+            raise AuthenticationFailed("Token revocado", code="token_revoked")
+
+        if "roles" not in validated_token or not is_shared(
+            settings.TOKEN_REVOCATION_CACHE_ALIAS
+        ):
+            return super().get_user(validated_token)
+
+        user = User(
+            pk=user_id,
+            username=validated_token.get("username", ""),
+            is_active=True,
+        )
+        # instancia de una fila existente: usable en FKs (therapist=...)
+        user._state.adding = False
+        user._state.db = "default"
+        # users.roles.get_roles lo usa sin consultar auth_user_groups
+        user._roles = frozenset(validated_token["roles"])
+        return user
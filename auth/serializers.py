@@ -1,32 +1,48 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from auth.tokens import add_user_claims, tokens_for_user
 
 class EmailTokenObtainSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        email = attrs.get("email")
-        password = attrs.get("password")
-
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Credenciales incorrectas")
-
+        # users.backends.EmailBackend: un SELECT + el hash
         user = authenticate(
-            username=user.username,
-            password=password
+            request=self.context.get("request"),
+            email=attrs.get("email"),
+            password=attrs.get("password"),
         )
 
         if not user:
             raise serializers.ValidationError("Credenciales incorrectas")
 
-        refresh = RefreshToken.for_user(user)
+        return tokens_for_user(user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Igual que TokenRefreshSerializer, pero el nuevo access token lleva
+    los roles actuales (no los del momento del login).
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM],
+            is_active=True,
+        ).first()
+        if user is None:
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
 
-        return {
-            "refresh": str(refresh),
-            "access": str(refresh.access_token),
-        }
+        access = add_user_claims(refresh.access_token, user)
+        return {"access": str(access)}
@@ -0,0 +1,26 @@
+import time
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.roles import get_roles
+
+
+def add_user_claims(token, user):
+    """
+    username y roles viajan firmados en el token: con
+    StatelessJWTAuthentication las requests no consultan auth_user.
+    `iat_us` (antes de leer los roles) lo compara con las revocaciones.
+    """
+    token["iat_us"] = time.time_ns() // 1000
+    token["username"] = user.get_username()
+    token["roles"] = sorted(get_roles(user))
+    return token
+
+
+def tokens_for_user(user):
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
+    return {
+        "refresh": str(refresh),
+        # access_token copia los claims del refresh
+        "access": str(refresh.access_token),
+    }
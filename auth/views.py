@@ -1,12 +1,19 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from auth.serializers import EmailTokenObtainSerializer
+from rest_framework_simplejwt.views import TokenRefreshView
+from auth.serializers import ClaimsTokenRefreshSerializer, EmailTokenObtainSerializer
 
 class EmailLoginView(APIView):
     permission_classes = []
 
     def post(self, request):
-        serializer = EmailTokenObtainSerializer(data=request.data)
+        serializer = EmailTokenObtainSerializer(
+            data=request.data, context={"request": request}
+        )
         serializer.is_valid(raise_exception=True)
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+class ClaimsTokenRefreshView(TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
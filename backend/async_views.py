@@ -0,0 +1,76 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+
+from auth.authentication import StatelessJWTAuthentication
+
+
+def json_response(data, status=200):
+    """Mismos bytes que Response(data) con el JSONRenderer de DRF."""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
+    )
+
+
+def authenticate(request, query_token=False):
+    """
+    Usuario del access token del header Authorization; None si no hay
+    credenciales. `query_token=True` acepta también ?token= (EventSource
+    no puede mandar headers; en el resto no, la URL queda en los logs).
+    Deja el token validado en request.auth, como DRF. Lanza
+    AuthenticationFailed si el token no sirve.
+    """
+    authenticator = StatelessJWTAuthentication()
+    raw_token = request.GET.get("token") if query_token else None
+    if not raw_token:
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    request.auth = authenticator.get_validated_token(raw_token)
+    return authenticator.get_user(request.auth)
+
+
+def unauthorized(detail):
+    # InvalidToken trae un dict (detail, code, messages), como en DRF
+    data = detail if isinstance(detail, dict) else {"detail": str(detail)}
+    response = json_response(data, status=401)
+    response["WWW-Authenticate"] = 'Bearer realm="api"'
+    return response
+
+
+class AsyncAPIView(View):
+    """
+    View async de Django para las lecturas más pedidas bajo ASGI (DRF no
+    tiene vistas async): mismo JWT que la API, solo usuarios autenticados
+    y sin CSRF, igual que APIView. Los handlers usan el ORM async y
+    responden con json_response; las APIException (ParseError, NotFound…)
+    se responden como en DRF.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await sync_to_async(authenticate)(request)
+        except exceptions.AuthenticationFailed as error:
+            return unauthorized(error.detail)
+        if user is None:
+            return unauthorized(exceptions.NotAuthenticated.default_detail)
+
+        request.user = user
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as error:
+            data = error.detail if isinstance(error.detail, (dict, list)) else {
+                "detail": error.detail
+            }
+            return json_response(data, status=error.status_code)
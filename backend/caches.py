@@ -0,0 +1,86 @@
+import base64
+import pickle
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache as DjangoDatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError, connections, router, transaction
+from django.utils.timezone import now as tz_now
+
+
+def is_shared(alias):
+    """
+    ¿Lo que escribe un proceso lo ven los demás (workers web y
+    `run_worker`)? LocMem y Dummy viven dentro de cada proceso: una
+    invalidación o una revocación ahí solo llega al que la hizo.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+class DatabaseCache(DjangoDatabaseCache):
+    """
+    DatabaseCache de Django con lecturas y escrituras por lote:
+
+    - set_many: COUNT (cull) + DELETE + un INSERT de todas las llaves;
+      Django hace un set por llave (3 queries cada una)
+    - aget_many / aset_many: un solo salto al hilo de la BD; los de
+      BaseCache llaman aget / aset llave por llave (un query cada una)
+    """
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+
+        rows = {
+            self.make_and_validate_key(key, version=version): base64.b64encode(
+                pickle.dumps(value, self.pickle_protocol)
+            ).decode("latin1")
+            for key, value in data.items()
+        }
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            expires = datetime.max
+        else:
+            expires = datetime.fromtimestamp(
+                timeout, tz=timezone.utc if settings.USE_TZ else None
+            )
+
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        expires = connection.ops.adapt_datetimefield_value(expires.replace(microsecond=0))
+        placeholders = ", ".join(["%s"] * len(rows))
+
+        try:
+            with transaction.atomic(using=db), connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                count = cursor.fetchone()[0]
+                if count > self._max_entries:
+                    self._cull(db, cursor, tz_now().replace(microsecond=0), count)
+
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {quote_name('cache_key')} IN ({placeholders})",
+                    list(rows),
+                )
+                cursor.execute(
+                    f"INSERT INTO {table} ({quote_name('cache_key')}, "
+                    f"{quote_name('value')}, {quote_name('expires')}) VALUES "
+                    + ", ".join(["(%s, %s, %s)"] * len(rows)),
+                    [value for key, encoded in rows.items() for value in (key, encoded, expires)],
+                )
+        except DatabaseError:
+            # como set(): otra escritura de la misma llave ganó, no es error
+            return list(data)
+        return []
+
+    async def aget_many(self, keys, version=None):
+        return await sync_to_async(self.get_many)(keys, version=version)
+
+    async def aset_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.set_many)(data, timeout, version=version)
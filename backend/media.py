@@ -0,0 +1,276 @@
+import mimetypes
+import os
+import re
+import time
+from stat import S_ISREG
+from urllib.parse import quote, urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import models
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views import View
+from rest_framework import exceptions, serializers
+
+from backend.async_views import authenticate, json_response, unauthorized
+from backend.streaming import is_asgi, streaming_content
+from users.roles import ADMIN, has_role
+
+SIGNER_SALT = "backend.media"
+CHUNK_SIZE = 64 * 1024
+
+# nombre.{hash 12 hex}.ext → contenido inmutable (ver patients/photos.py)
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# exportaciones completas (patients/tasks.py): solo Admin o URL firmada
+ADMIN_ONLY_PREFIXES = ("exports/",)
+
+
+# =========================================================
+# 🔐 URLs FIRMADAS
+# =========================================================
+def signed_media_url(name):
+    """
+    URL de /media/ firmada para que <img>/<a> funcionen sin el header
+    Authorization. La expiración se redondea a MEDIA_URL_TTL, así la URL
+    es estable durante ese periodo y el navegador puede cachearla.
+    """
+    try:
+        default_storage.path(name)
+    except NotImplementedError:
+        # S3 u otro storage remoto: ya da URLs firmadas propias
+        return default_storage.url(name)
+
+    ttl = getattr(settings, "MEDIA_URL_TTL", 24 * 60 * 60)
+    expires = (int(time.time()) // ttl + 2) * ttl
+    signature = signing.Signer(salt=SIGNER_SALT).signature(f"{name}:{expires}")
+
+    query = urlencode({"exp": expires, "sig": signature})
+    return f"{default_storage.url(name)}?{query}"
+
+
+def has_valid_signature(name, params):
+    try:
+        expires = int(params.get("exp", ""))
+    except ValueError:
+        return False
+
+    if expires < time.time():
+        return False
+
+    expected = signing.Signer(salt=SIGNER_SALT).signature(f"{name}:{expires}")
+    return signing.constant_time_compare(expected, params.get("sig", ""))
+
+
+class SignedUrlMixin:
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        url = signed_media_url(value.name)
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class SignedFileField(SignedUrlMixin, serializers.FileField):
+    pass
+
+
+class SignedImageField(SignedUrlMixin, serializers.ImageField):
+    pass
+
+
+class MediaModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer cuyos FileField / ImageField salen como URL firmada.
+    """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: SignedFileField,
+        models.ImageField: SignedImageField,
+    }
+
+
+# =========================================================
+# 📦 VISTA
+# =========================================================
+def media_access_error(request, path):
+    """
+    None si el request puede leer `path` (JWT o URL firmada; exports/
+    solo Admin); si no, la respuesta 401 / 403, como la daría DRF.
+    """
+    try:
+        user = authenticate(request)
+    except exceptions.AuthenticationFailed as error:
+        return unauthorized(error.detail)
+
+    if user is not None and (
+        not path.startswith(ADMIN_ONLY_PREFIXES) or has_role(user, ADMIN)
+    ):
+        return None
+    if has_valid_signature(path, request.GET):
+        return None
+    if user is None:
+        return unauthorized(exceptions.NotAuthenticated.default_detail)
+    return json_response(
+        {"detail": exceptions.PermissionDenied.default_detail}, status=403
+    )
+
+
+class MediaView(View):
+    """
+    Sirve MEDIA_ROOT a usuarios autenticados (JWT o URL firmada).
+
+    - Range (un solo rango) → 206 / 416
+    - ETag + Last-Modified → 304
+    - nombres con hash de contenido → Cache-Control immutable
+    - MEDIA_ACCEL_REDIRECT_PREFIX → delega la transferencia a nginx
+      (X-Accel-Redirect) y el worker de Python queda libre
+
+    Vista async: bajo ASGI no ocupa el hilo de vistas síncronas; el disco
+    se lee por bloques en el pool de hilos (backend/streaming.py).
+    """
+
+    async def get(self, request, path):
+        error = await sync_to_async(media_access_error)(request, path)
+        if error is not None:
+            return error
+
+        try:
+            fullpath = safe_join(settings.MEDIA_ROOT, path)
+            stat = await sync_to_async(os.stat, thread_sensitive=False)(fullpath)
+        except (SuspiciousFileOperation, OSError):
+            stat = None
+        if stat is None or not S_ISREG(stat.st_mode):
+            return json_response({"detail": exceptions.NotFound.default_detail}, status=404)
+
+        etag = quote_etag(f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+        content_type = (
+            mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+        )
+
+        if self._not_modified(request, etag, stat.st_mtime):
+            response = HttpResponseNotModified()
+            return self._set_cache_headers(response, path, etag, stat.st_mtime)
+
+        accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "")
+        if accel_prefix:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = accel_prefix + quote(path)
+            return self._set_cache_headers(response, path, etag, stat.st_mtime)
+
+        byte_range = self._requested_range(request, etag, stat)
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                streaming_content(
+                    request, self._read_range(fullpath, start, end), thread_sensitive=False
+                ),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        elif is_asgi(request):
+            # FileResponse bajo ASGI se leería entero a memoria
+            response = StreamingHttpResponse(
+                streaming_content(
+                    request, self._read_range(fullpath, 0, stat.st_size - 1),
+                    thread_sensitive=False,
+                ),
+                content_type=content_type,
+            )
+            response["Content-Length"] = str(stat.st_size)
+        else:
+            # FileResponse usa wsgi.file_wrapper → sendfile en gunicorn
+            response = FileResponse(
+                open(fullpath, "rb"), content_type=content_type
+            )
+
+        response["Accept-Ranges"] = "bytes"
+        return self._set_cache_headers(response, path, etag, stat.st_mtime)
+
+    # =========================================================
+    # 🛠 HELPERS
+    # =========================================================
+    def _not_modified(self, request, etag, mtime):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return etag in tags or "*" in tags
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        return bool(if_modified_since and int(mtime) <= if_modified_since)
+
+    def _requested_range(self, request, etag, stat):
+        header = request.headers.get("Range")
+        if not header:
+            return None
+
+        # If-Range: solo parcial si el archivo no cambió
+        if_range = request.headers.get("If-Range")
+        if if_range and if_range != etag:
+            since = parse_http_date_safe(if_range)
+            if not since or int(stat.st_mtime) > since:
+                return None
+
+        match = RANGE_RE.match(header.strip())
+        if not match:
+            return None  # varios rangos / sintaxis rara → archivo completo
+
+        first, last = match.groups()
+        size = stat.st_size
+
+        if not first:
+            if not last or int(last) == 0:
+                return "unsatisfiable" if last else None
+            return max(size - int(last), 0), size - 1
+
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size:
+            return "unsatisfiable"
+        if end < start:
+            return None
+        return start, end
+
+    def _read_range(self, fullpath, start, end):
+        with open(fullpath, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def _set_cache_headers(self, response, path, etag, mtime):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(mtime)
+
+        # datos clínicos: nunca en caches compartidas
+        if HASHED_NAME_RE.search(path):
+            response["Cache-Control"] = "private, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,225 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre un orden compuesto.
+
+    La posición se guarda como los valores de `ordering` de la última
+    fila, así que cualquier página cuesta lo mismo que la primera:
+    WHERE (a, b) > (x, y) ... LIMIT n, sin OFFSET.
+
+    Los campos de `ordering` deben ser NOT NULL y el último debe ser
+    único (normalmente `id`) para que el orden sea total. La vista puede
+    cambiar el orden por request con `get_keyset_ordering(queryset)`.
+    """
+    ordering = ("-created_at", "id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Cursor inválido"
+
+    @property
+    def page_size(self):
+        return getattr(settings, "API_PAGE_SIZE", 20)
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.get("r"))
+
+        if cursor:
+            position = self._parse_position(queryset, cursor["p"])
+            queryset = queryset.filter(self._position_filter(position, reverse))
+
+        # 👇 una fila extra para saber si hay más página
+        rows = list(
+            queryset.order_by(*self._order_by(reverse))[:size + 1]
+        )
+        has_more = len(rows) > size
+        rows = rows[:size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    # =========================================================
+    # 🔗 LINKS
+    # =========================================================
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, row, reverse):
+        position = [
+            self._to_json(getattr(row, field.lstrip("-")))
+            for field in self.ordering
+        ]
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor({"p": position, "r": int(reverse)}),
+        )
+
+    # =========================================================
+    # 🔐 CURSOR
+    # =========================================================
+    def encode_cursor(self, cursor):
+        raw = json.dumps(cursor, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # {"p": [valores de `ordering`], "r": 0 | 1}
+        if (
+            not isinstance(cursor, dict)
+            or not isinstance(cursor.get("p"), list)
+            or len(cursor["p"]) != len(self.ordering)
+            or cursor.get("r", 0) not in (0, 1)
+            or not all(
+                isinstance(value, (str, int, float)) and not isinstance(value, bool)
+                for value in cursor["p"]
+            )
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def get_ordering(self, queryset, view):
+        ordering = None
+        if hasattr(view, "get_keyset_ordering"):
+            ordering = view.get_keyset_ordering(queryset)
+        return tuple(ordering or type(self).ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # =========================================================
+    # 🛠 HELPERS
+    # =========================================================
+    def _order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def _parse_position(self, queryset, position):
+        """
+        Valores del cursor convertidos al tipo de cada campo (o anotación,
+        p. ej. search_rank): uno que no corresponde es un cursor inválido,
+        no un error de la query.
+        """
+        parsed = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            try:
+                annotation = queryset.query.annotations.get(name)
+                model_field = (
+                    annotation.output_field if annotation is not None
+                    else queryset.model._meta.get_field(name)
+                )
+                parsed.append(model_field.to_python(value))
+            except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return parsed
+
+    def _position_filter(self, position, reverse):
+        """
+        Comparación lexicográfica (a, b, c) > (x, y, z) respetando la
+        dirección de cada campo:
+            a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND c > z)
+        """
+        condition = Q()
+        equal = Q()
+
+        for field, value in zip(self.ordering, position):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            lookup = "lt" if descending != reverse else "gt"
+
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    def _to_json(self, value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
+
+
+class HistoryPagination(KeysetPagination):
+    """Historial clínico: más reciente primero (índice patient/date)."""
+    ordering = ("-date", "-created_at", "-id")
+
+
+class RecentFirstPagination(KeysetPagination):
+    """Más recientes primero por fecha de alta (p. ej. recetas)."""
+    ordering = ("-created_at", "-id")
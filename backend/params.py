@@ -0,0 +1,13 @@
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+
+
+def parse_date_param(params, name):
+    """
+    ?name=YYYY-MM-DD como date (None si no viene). Con formato correcto
+    pero fecha inexistente (2024-02-30) parse_date lanza ValueError → 400.
+    """
+    try:
+        return parse_date(params.get(name) or "")
+    except ValueError:
+        raise ParseError(f"{name} must be a valid date (YYYY-MM-DD)")
@@ -9,6 +9,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 ROOT_URLCONF = 'backend.urls'
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 LANGUAGE_CODE = 'es-mx'
 TIME_ZONE = 'America/Mexico_City'
@@ -119,7 +120,14 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # ===================================
 # Opción 1: Usar Render Disks (local en servidor)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = '/opt/render/project/src/media'
+# En docker-compose es un volumen compartido con el worker
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', '/opt/render/project/src/media')
+
+# Media se sirve con backend/media.py (autenticado, Range, ETag).
+# URLs firmadas válidas entre 1 y 2 periodos de MEDIA_URL_TTL segundos.
+MEDIA_URL_TTL = int(os.getenv('MEDIA_URL_TTL', 24 * 60 * 60))
+# Con nginx delante (ver frontend/nginx.conf), p.ej. '/protected-media/'
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
 
 # Opción 2: Si decides usar S3 más adelante (comentado por ahora)
 # USE_S3 = os.environ.get('USE_S3', 'False').lower() == 'true'
@@ -165,6 +173,8 @@ INSTALLED_APPS = [
     'users',
     'patients',
     'appointments',
+    'jobs',
+    'sync',
 ]
 
 TEMPLATES = [
@@ -216,9 +226,31 @@ LOGGING = {
     },
 }
 
+# ===================================
+# CACHES
+# ===================================
+# "default": memoria de cada proceso (roles, contadores locales).
+# "shared": lo que todos los workers y el contenedor worker deben ver
+# igual (revocación de tokens, calendar, bitácoras). Por defecto una
+# tabla en PostgreSQL (`manage.py createcachetable`, en entrypoint.sh)
+# con escrituras por lote (backend/caches.py);
+# para Redis: SHARED_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# y SHARED_CACHE_LOCATION=redis://host:6379/1 (requiere el paquete redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND', 'backend.caches.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'django_cache'),
+    },
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "auth.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": [
         "rest_framework.filters.SearchFilter",
@@ -229,3 +261,123 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',         # ← AGREGAR
     ],
 }
+
+# Paginación por cursor (backend/pagination.py)
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 20))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 100))
+
+# Cache de roles por usuario (users/roles.py), en segundos
+ROLE_CACHE_TTL = int(os.getenv('ROLE_CACHE_TTL', 60))
+
+# Cache de appointments/calendar por semana ISO (appointments/calendar.py).
+# Debe ser compartido para que la invalidación llegue a todos los
+# workers; con un alias por proceso el TTL se limita a 30 s.
+CALENDAR_CACHE_ALIAS = os.getenv('CALENDAR_CACHE_ALIAS', 'shared')
+CALENDAR_CACHE_TTL = int(os.getenv('CALENDAR_CACHE_TTL', 24 * 60 * 60))
+
+# Horario de la clínica para appointments/availability (y la validación
+# de empalmes). Días: 0 = lunes … 6 = domingo. Capacidad = citas
+# simultáneas permitidas.
+CLINIC_HOURS = [
+    tuple(window.split('-'))
+    for window in os.getenv('CLINIC_HOURS', '09:00-14:00,16:00-20:00').split(',')
+]
+CLINIC_DAYS = [int(day) for day in os.getenv('CLINIC_DAYS', '0,1,2,3,4,5').split(',')]
+CLINIC_CAPACITY = int(os.getenv('CLINIC_CAPACITY', 1))
+CLINIC_SLOT_DURATION = int(os.getenv('CLINIC_SLOT_DURATION', 60))
+CLINIC_SLOT_STEP = int(os.getenv('CLINIC_SLOT_STEP', 30))
+# Días que las series de citas se saltan: MM-DD (cada año) o YYYY-MM-DD
+CLINIC_HOLIDAYS = [
+    day for day in os.getenv('CLINIC_HOLIDAYS', '01-01,05-01,09-16,12-25').split(',') if day
+]
+
+# Bitácora de asistencias (appointments/bitacora.py): mismo template
+# .docx que usa el frontend; PDF vía LibreOffice si está instalado.
+BITACORA_TEMPLATE = os.getenv(
+    'BITACORA_TEMPLATE',
+    os.path.join(BASE_DIR, 'frontend/public/bitacora_template.docx'),
+)
+BITACORA_SOFFICE = os.getenv('BITACORA_SOFFICE', '')
+BITACORA_CACHE_ALIAS = os.getenv('BITACORA_CACHE_ALIAS', 'shared')
+BITACORA_CACHE_TTL = int(os.getenv('BITACORA_CACHE_TTL', 24 * 60 * 60))
+BITACORA_RENDER_PROCESSES = int(os.getenv('BITACORA_RENDER_PROCESSES', 0))  # 0 = núm. de CPUs
+BITACORA_PROFESSIONAL_NAME = os.getenv(
+    'BITACORA_PROFESSIONAL_NAME', 'Lic. T.F. Salvador Antonio Pomar Castañeda'
+)
+BITACORA_PROFESSIONAL_LICENSE = os.getenv(
+    'BITACORA_PROFESSIONAL_LICENSE', 'CÉD. PROF. 3719269'
+)
+
+# Cola de trabajos en la BD (jobs/, `manage.py run_worker`). Con
+# JOB_QUEUE_ENABLED las miniaturas se generan en el worker en vez de un
+# hilo del proceso web: web y worker deben ver el mismo MEDIA_ROOT.
+JOB_QUEUE_ENABLED = os.environ.get('JOB_QUEUE_ENABLED', 'False').lower() == 'true'
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 15 * 60))  # running sin terminar → reintento
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_BACKOFF_BASE = int(os.getenv('JOB_BACKOFF_BASE', 10))  # segundos, se duplica por intento
+JOB_BACKOFF_MAX = int(os.getenv('JOB_BACKOFF_MAX', 60 * 60))
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+JOB_SCHEDULE = {
+    # nombre → {"task", "every" (segundos), "kwargs"}
+    "refresh-appointment-dates": {
+        "task": "appointments.refresh_dates",
+        "every": 24 * 60 * 60,
+    },
+    "purge-jobs": {
+        "task": "jobs.purge",
+        "every": 24 * 60 * 60,
+    },
+    "purge-tombstones": {
+        "task": "sync.purge_tombstones",
+        "every": 24 * 60 * 60,
+    },
+}
+
+# Sincronización incremental (/appointments/changes/, /patients/changes/).
+# Un token más viejo que SYNC_TOMBSTONE_DAYS responde 410 (resync completo).
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', 500))
+SYNC_OVERLAP_SECONDS = int(os.getenv('SYNC_OVERLAP_SECONDS', 30))  # transacciones lentas
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+
+# Calendario en vivo (/api/appointments/stream/, SSE; requiere ASGI).
+# "local" reparte en el mismo proceso; con varios workers "postgres"
+# (LISTEN/NOTIFY) para que los cambios lleguen a todas las conexiones.
+# Por defecto "postgres" si la BD lo es.
+LIVE_BACKEND = os.getenv(
+    'LIVE_BACKEND',
+    'postgres' if DATABASES['default']['ENGINE'].endswith('postgresql') else 'local'
+)
+LIVE_HEARTBEAT = int(os.getenv('LIVE_HEARTBEAT', 15))  # segundos
+LIVE_RETRY_MS = int(os.getenv('LIVE_RETRY_MS', 3000))  # reconexión de EventSource
+LIVE_QUEUE_SIZE = int(os.getenv('LIVE_QUEUE_SIZE', 100))  # lotes por conexión
+
+# Revocación de access tokens (auth/authentication.py). Con un cache por
+# proceso cada request vuelve a cargar al usuario de la BD.
+TOKEN_REVOCATION_CACHE_ALIAS = os.getenv('TOKEN_REVOCATION_CACHE_ALIAS', 'shared')
+# Cada proceso recuerda lo leído esos segundos: una revocación tarda a lo
+# más eso en llegar a los demás workers (en el que revoca, nada)
+TOKEN_REVOCATION_LOCAL_TTL = int(os.getenv('TOKEN_REVOCATION_LOCAL_TTL', 5))
+
+# Tokens JWT ya verificados que cada worker recuerda (0 = desactivado)
+JWT_TOKEN_CACHE_TTL = int(os.getenv('JWT_TOKEN_CACHE_TTL', 30))
+
+# ===================================
+# AUTENTICACIÓN
+# ===================================
+# Login por email (auth/serializers.py) + usuario/contraseña para el admin
+AUTHENTICATION_BACKENDS = [
+    'users.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+PASSWORD_HASHERS = [
+    'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Costo de PBKDF2; bajarlo solo en tests / desarrollo local
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 1_000_000))
@@ -0,0 +1,42 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+_DONE = object()
+
+
+def is_asgi(request):
+    # Request de DRF o HttpRequest de Django
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+def streaming_content(request, iterable, thread_sensitive=True):
+    """
+    Cuerpo de StreamingHttpResponse que sirve con WSGI y con ASGI.
+
+    Bajo ASGI, Django consume un iterador síncrono entero
+    (sync_to_async(list)) antes de mandar el primer byte: se entrega
+    como iterador async que pide un bloque a la vez. Con WSGI va tal
+    cual (un iterador async ahí se consumiría entero igual).
+
+    thread_sensitive=True recorre `iterable` en el hilo de la vista, el
+    de su conexión a la BD (cursores del lado del servidor de
+    .iterator()); False para lo que solo lee archivos.
+    """
+    if not is_asgi(request):
+        return iterable
+    return _chunks(iter(iterable), thread_sensitive)
+
+
+async def _chunks(iterator, thread_sensitive):
+    next_chunk = sync_to_async(next, thread_sensitive=thread_sensitive)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        # generadores: cierra archivos / cursores aunque el cliente se vaya
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=thread_sensitive)()
@@ -1,10 +1,23 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from patients.views import PatientViewSet, PrescriptionViewSet, ClinicalHistoryViewSet
-from appointments.views import AppointmentViewSet
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from auth.views import EmailLoginView
+from patients.views import (
+    PatientDetailView,
+    PatientViewSet,
+    PrescriptionViewSet,
+    ClinicalHistoryViewSet,
+)
+from appointments.views import (
+    AppointmentViewSet,
+    BitacoraDocumentView,
+    BitacoraView,
+    CalendarView,
+    PatientReportView,
+    calendar_stream,
+)
+from rest_framework_simplejwt.views import TokenObtainPairView
+from auth.views import ClaimsTokenRefreshView, EmailLoginView
+from backend.media import MediaView
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -21,7 +34,28 @@ router.register(
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/login/", EmailLoginView.as_view()),
-    path("api/auth/refresh/", TokenRefreshView.as_view()),
+    path("api/auth/refresh/", ClaimsTokenRefreshView.as_view()),
+    # antes del router: si no, "stream" se toma como id de cita
+    path("api/appointments/stream/", calendar_stream, name="appointment-stream"),
+    # vistas async (ASGI); mismos nombres que tenían en el router
+    path("api/appointments/calendar/", CalendarView.as_view(), name="appointment-calendar"),
+    path(
+        "api/appointments/patient-report/",
+        PatientReportView.as_view(),
+        name="appointment-patient-report",
+    ),
+    path(
+        "api/appointments/attended-sessions/",
+        BitacoraView.as_view(),
+        name="appointment-bitacora",
+    ),
+    path(
+        "api/appointments/attended-sessions/document/",
+        BitacoraDocumentView.as_view(),
+        name="appointment-bitacora-document",
+    ),
+    # GET async; PUT / PATCH / DELETE pasan a PatientViewSet
+    path("api/patients/<int:pk>/", PatientDetailView.as_view(), name="p-detail"),
     path("api/", include(router.urls)),
 ]
 if settings.DEBUG:
@@ -29,4 +63,9 @@ if settings.DEBUG:
         settings.STATIC_URL,
         document_root=settings.STATIC_ROOT
     )
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    re_path(
+        r"^%s(?P<path>.+)$" % settings.MEDIA_URL.lstrip("/"),
+        MediaView.as_view(),
+    ),
+]
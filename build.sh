@@ -10,3 +10,6 @@ python manage.py collectstatic --no-input
 
 # Apply any outstanding database migrations
 python manage.py migrate
+
+# Tabla del cache compartido (CACHES['shared'])
+python manage.py createcachetable
@@ -9,6 +9,7 @@ done
 echo "Database ready"
 
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 
 exec "$@"
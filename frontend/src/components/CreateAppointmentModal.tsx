@@ -15,7 +15,7 @@ export default function CreateAppointmentModal({ open, onClose, onCreated }: any
   useEffect(() => {
     api.get("patients/").then(res => {
       setPatients(
-        res.data.map((p: any) => ({
+        res.data.results.map((p: any) => ({
           value: p.id,
           label: p.full_name,
         }))
@@ -33,7 +33,17 @@ export default function PatientCard({
       <div className="flex items-center gap-4 min-w-0">
         {/* Avatar + estado */}
         <div className="relative shrink-0">
-          {patient.photo ? (
+          {patient.photo_thumb_url ? (
+            <picture>
+              <source srcSet={patient.photo_thumb_url.webp} type="image/webp" />
+              <img
+                src={patient.photo_thumb_url.jpeg}
+                alt={patient.full_name}
+                loading="lazy"
+                className="w-11 h-11 rounded-full object-cover border"
+              />
+            </picture>
+          ) : patient.photo ? (
             <img
               src={patient.photo}
               alt={patient.full_name}
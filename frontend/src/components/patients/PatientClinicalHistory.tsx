@@ -6,13 +6,22 @@ import {ClinicalHistoryForm} from "./ClinicalHistoryForm";
 
 export default function PatientClinicalHistory({ patient }: any) {
   const [items, setItems] = useState<any[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [openForm, setOpenForm] = useState(false);
 
   const loadHistory = async () => {
     const res = await api.get("clinical-history/", {
       params: { patient: patient.id },
     });
-    setItems(res.data);
+    setItems(res.data.results);
+    setNextPage(res.data.next);
+  };
+
+  const loadMore = async () => {
+    if (!nextPage) return;
+    const res = await api.get(nextPage);
+    setItems((prev) => [...prev, ...res.data.results]);
+    setNextPage(res.data.next);
   };
 
   useEffect(() => {
@@ -81,6 +90,12 @@ export default function PatientClinicalHistory({ patient }: any) {
           </div>
         ))}
       </div>
+
+      {nextPage && (
+        <Button onClick={loadMore}>
+          Ver más
+        </Button>
+      )}
     </div>
   );
 }
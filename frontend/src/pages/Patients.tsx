@@ -42,6 +42,7 @@ type PatientTab =
 export default function Patients() {
   const [patients, setPatients] = useState<Patient[]>([]);
   const [search, setSearch] = useState("");
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [view, setView] = useState<View>("list");
   const [selectedPatient, setSelectedPatient] = useState<Patient | null>(null);
 
@@ -59,9 +60,28 @@ export default function Patients() {
     const res = await api.get("patients/", {
       params: { search },
     });
-    setPatients(res.data);
+    setPatients(res.data.results);
+    setNextPage(res.data.next);
   }, [search]);
 
+  // Paginación por cursor: `next` ya trae el cursor opaco
+  const loadMorePatients = useCallback(async () => {
+    if (!nextPage) return;
+    const res = await api.get(nextPage);
+    setPatients((prev) => [...prev, ...res.data.results]);
+    setNextPage(res.data.next);
+  }, [nextPage]);
+
+  // El listado es ligero: la ficha completa se pide al abrir el paciente
+  const openPatient = useCallback(async (p: Patient) => {
+    setSelectedPatient(p);
+    setActiveTab("info");
+    setView("detail");
+
+    const res = await api.get(`patients/${p.id}/`);
+    setSelectedPatient(res.data);
+  }, []);
+
   const loadCalendarAppointments = useCallback(
     async (start?: string, end?: string) => {
       const res = await api.get("/appointments/calendar/", {
@@ -161,11 +181,7 @@ export default function Patients() {
                   <PatientCard
                     key={p.id}
                     patient={p}
-                    onOpen={() => {
-                      setSelectedPatient(p);
-                      setActiveTab("info");
-                      setView("detail");
-                    }}
+                    onOpen={() => openPatient(p)}
                     onPrescription={() => {
                       setSelectedPatient(p);
                       setOpenUploadPrescription(true);
@@ -173,6 +189,15 @@ export default function Patients() {
                   />
                 ))}
               </div>
+
+              {nextPage && (
+                <button
+                  onClick={loadMorePatients}
+                  className="w-full py-3 text-sm text-emerald-700 hover:bg-slate-50 rounded-b-xl"
+                >
+                  Cargar más
+                </button>
+              )}
             </div>
           </>
         )}
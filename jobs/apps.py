@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class JobsConfig(AppConfig):
+    name = "jobs"
+
+    def ready(self):
+        # registra los @task de cada app (<app>/tasks.py)
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules("tasks")
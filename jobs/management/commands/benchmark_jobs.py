@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import TASKS, enqueue
+from jobs.worker import run_threads
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _ms(delta):
+    return delta.total_seconds() * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la cola de trabajos: encolado/s, trabajos/s con N hilos y "
+        "latencia de toma (encolar → empezar) con workers en espera"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--batch", type=int, default=1)
+        parser.add_argument("--sleep-ms", type=int, default=0,
+                            help="Duración de cada trabajo (0 = no-op)")
+        parser.add_argument("--samples", type=int, default=50,
+                            help="Trabajos para medir la latencia de toma")
+
+    def handle(self, *args, **options):
+        task = "jobs.sleep" if options["sleep_ms"] else "jobs.noop"
+        kwargs = {"ms": options["sleep_ms"]} if options["sleep_ms"] else {}
+        started = timezone.now()
+
+        self.stdout.write(
+            f"🗄 Motor: {connection.vendor}, {options['jobs']} trabajos {task}, "
+            f"{options['threads']} hilo(s), batch {options['batch']}"
+        )
+
+        try:
+            self._throughput(task, kwargs, options)
+            self._latency(task, kwargs, options)
+        finally:
+            Job.objects.filter(task=task, created_at__gte=started).delete()
+
+    # =========================================================
+    # 📈 THROUGHPUT
+    # =========================================================
+    def _throughput(self, task, kwargs, options):
+        total = options["jobs"]
+        registered = TASKS[task]
+
+        # encolar de uno en uno (como lo hace una request)
+        single = min(total, 500)
+        start = time.perf_counter()
+        for _ in range(single):
+            enqueue(task, **kwargs)
+        enqueue_rate = single / (time.perf_counter() - start)
+
+        now = timezone.now()
+        Job.objects.bulk_create([
+            Job(task=task, kwargs=kwargs, run_at=now, max_attempts=registered.max_attempts)
+            for _ in range(total - single)
+        ], batch_size=1000)
+
+        start = time.perf_counter()
+        workers = run_threads(
+            options["threads"], batch=options["batch"], burst=True, scheduler=False
+        )
+        elapsed = time.perf_counter() - start
+        processed = sum(worker.processed for worker in workers)
+
+        waits = [
+            _ms(started_at - run_at)
+            for run_at, started_at in Job.objects.filter(
+                task=task, status="done", started_at__isnull=False
+            ).values_list("run_at", "started_at")
+        ]
+
+        self.stdout.write(f"  encolar (1 por transacción): {enqueue_rate:>8.0f} trabajos/s")
+        self.stdout.write(f"  procesar:                     {processed / elapsed:>8.0f} trabajos/s "
+                          f"({processed} en {elapsed:.2f}s)")
+        self.stdout.write(f"  espera en cola p50 / p95:     {_percentile(waits, 50):>8.0f} / "
+                          f"{_percentile(waits, 95):.0f} ms")
+
+    # =========================================================
+    # ⏱ LATENCIA DE TOMA
+    # =========================================================
+    def _latency(self, task, kwargs, options):
+        stop = threading.Event()
+        runner = threading.Thread(
+            target=run_threads,
+            kwargs={"threads": options["threads"], "stop": stop,
+                    "batch": options["batch"], "scheduler": False},
+        )
+        runner.start()
+        time.sleep(0.2)  # workers ya esperando
+
+        latencies = []
+        try:
+            for _ in range(options["samples"]):
+                job = enqueue(task, **kwargs)
+                deadline = time.perf_counter() + 10
+                while time.perf_counter() < deadline:
+                    started_at = (
+                        Job.objects.filter(pk=job.pk, started_at__isnull=False)
+                        .values_list("started_at", flat=True).first()
+                    )
+                    if started_at:
+                        latencies.append(_ms(started_at - job.run_at))
+                        break
+                    time.sleep(0.001)
+        finally:
+            stop.set()
+            runner.join()
+
+        self.stdout.write(
+            f"  latencia de toma p50 / p95:   {_percentile(latencies, 50):>8.1f} / "
+            f"{_percentile(latencies, 95):.1f} ms ({len(latencies)} muestras)"
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado"))
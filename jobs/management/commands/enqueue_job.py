@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.registry import TASKS, enqueue
+
+
+class Command(BaseCommand):
+    help = "Encola una tarea registrada: enqueue_job appointments.rebuild_stats --kwargs '{...}'"
+
+    def add_arguments(self, parser):
+        parser.add_argument("task")
+        parser.add_argument("--kwargs", default="{}", help="Argumentos en JSON")
+        parser.add_argument("--delay", type=int, default=0, help="Segundos de espera")
+        parser.add_argument("--priority", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["task"] not in TASKS:
+            raise CommandError(
+                f"Tarea no registrada: {options['task']} "
+                f"(disponibles: {', '.join(sorted(TASKS))})"
+            )
+
+        try:
+            kwargs = json.loads(options["kwargs"])
+        except ValueError as exc:
+            raise CommandError(f"--kwargs no es JSON válido: {exc}")
+
+        job = enqueue(
+            options["task"],
+            delay=options["delay"],
+            priority=options["priority"],
+            **kwargs,
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ {job} encolado para {job.run_at:%Y-%m-%d %H:%M:%S}"))
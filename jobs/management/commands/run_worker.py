@@ -0,0 +1,77 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.registry import TASKS
+from jobs.worker import run_threads
+
+
+def _serve(threads, batch, burst):
+    """Un proceso: N hilos Worker hasta SIGTERM / SIGINT (o cola vacía con --burst)."""
+    django.setup()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *args: stop.set())
+
+    workers = run_threads(threads, stop=stop, batch=batch, burst=burst)
+    return sum(w.processed for w in workers), sum(w.failed for w in workers)
+
+
+class Command(BaseCommand):
+    help = "Ejecuta los trabajos en cola (jobs.Job): N hilos × M procesos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=1)
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument(
+            "--batch", type=int, default=1,
+            help="Trabajos que toma cada hilo por query",
+        )
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Terminar cuando la cola quede vacía",
+        )
+
+    def handle(self, *args, **options):
+        threads, processes = options["threads"], options["processes"]
+        self.stdout.write(
+            f"👷 {processes} proceso(s) × {threads} hilo(s), "
+            f"{len(TASKS)} tareas registradas: {', '.join(sorted(TASKS))}"
+        )
+
+        if processes == 1:
+            processed, failed = _serve(threads, options["batch"], options["burst"])
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {processed} trabajos terminados, {failed} con error"
+            ))
+            return
+
+        # cada proceso abre sus propias conexiones
+        connections.close_all()
+        children = [
+            multiprocessing.Process(
+                target=_serve,
+                args=(threads, options["batch"], options["burst"]),
+                name=f"job-worker-{index}",
+            )
+            for index in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+
+        for child in children:
+            child.join()
+
+        self.stdout.write(self.style.SUCCESS("✅ Workers detenidos"))
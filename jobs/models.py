@@ -0,0 +1,73 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano. Lo ejecuta `manage.py run_worker`
+    (jobs/worker.py); se encola con jobs.registry.enqueue.
+    """
+    STATUS_CHOICES = [
+        ("queued", "En cola"),
+        ("running", "En proceso"),
+        ("done", "Terminado"),
+        ("failed", "Fallido"),
+    ]
+
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="queued"
+    )
+    priority = models.SmallIntegerField(default=0)  # menor = antes
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    worker = models.CharField(max_length=100, blank=True)
+    periodic = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # la cola: solo las filas pendientes, en orden de toma
+            models.Index(
+                fields=["priority", "run_at"],
+                condition=Q(status="queued"),
+                name="job_queued_idx"
+            ),
+            models.Index(
+                fields=["started_at"],
+                condition=Q(status="running"),
+                name="job_running_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class PeriodicJob(models.Model):
+    """
+    Programación de JOB_SCHEDULE (settings). Los workers la sincronizan
+    al arrancar y encolan un Job cada `interval_seconds`.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    interval_seconds = models.PositiveIntegerField()
+    next_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} cada {self.interval_seconds}s"
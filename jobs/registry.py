@@ -0,0 +1,88 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+# despierta a los workers de este proceso (benchmark, --threads)
+wakeup = threading.Event()
+
+NOTIFY_CHANNEL = "jobs"
+
+
+class Task:
+    def __init__(self, func, name, max_attempts, backoff, priority, on_purge=None):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.priority = priority
+        self.on_purge = on_purge
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        return enqueue(self.name, **kwargs)
+
+
+def task(name, max_attempts=None, backoff=None, priority=0, on_purge=None):
+    """
+    Registra una función como tarea:
+
+        @task("appointments.rebuild_stats")
+        def rebuild_stats(start=None, end=None): ...
+
+    Los argumentos viajan como JSON (fechas → texto ISO).
+    `on_purge(result)` corre por cada trabajo terminado que borra
+    jobs.purge: para lo que el resultado deja fuera de la BD (archivos).
+    """
+    def register(func):
+        TASKS[name] = Task(
+            func,
+            name,
+            max_attempts or settings.JOB_MAX_ATTEMPTS,
+            backoff or settings.JOB_BACKOFF_BASE,
+            priority,
+            on_purge,
+        )
+        return TASKS[name]
+
+    return register
+
+
+def enqueue(name, run_at=None, delay=None, priority=None, periodic="", **kwargs):
+    """
+    Guarda el Job en la misma transacción que el llamador: si esta se
+    revierte, el trabajo no existe. Al confirmar se avisa a los workers
+    (NOTIFY en PostgreSQL) para no esperar al siguiente sondeo.
+    """
+    registered = TASKS.get(name)
+    if registered is None:
+        raise KeyError(f"Tarea no registrada: {name}")
+
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+
+    job = Job.objects.create(
+        task=name,
+        kwargs=kwargs,
+        run_at=run_at,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts,
+        periodic=periodic,
+    )
+    transaction.on_commit(notify)
+    return job
+
+
+def notify():
+    wakeup.set()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, '')", [NOTIFY_CHANNEL])
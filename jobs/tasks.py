@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import TASKS, task
+
+
+@task("jobs.purge")
+def purge(days=None):
+    """
+    Borra los trabajos terminados / fallidos con más de N días y, después,
+    lo que sus resultados dejaron fuera de la BD (Task.on_purge).
+    """
+    days = settings.JOB_RETENTION_DAYS if days is None else days
+    limit = timezone.now() - timedelta(days=days)
+    jobs = Job.objects.filter(status__in=("done", "failed"), finished_at__lt=limit)
+
+    hooks = {name: registered.on_purge for name, registered in TASKS.items() if registered.on_purge}
+    results = list(
+        jobs.filter(status="done", task__in=list(hooks))
+        .exclude(result=None)
+        .values_list("task", "result")
+    ) if hooks else []
+
+    deleted, _ = jobs.delete()
+    for name, result in results:
+        hooks[name](result)
+    return deleted
+
+
+# tareas de benchmark_jobs
+@task("jobs.noop", max_attempts=1)
+def noop(**kwargs):
+    return None
+
+
+@task("jobs.sleep", max_attempts=1)
+def sleep(ms=10, **kwargs):
+    time.sleep(ms / 1000)
+    return None
@@ -0,0 +1,292 @@
+import logging
+import os
+import random
+import select
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, PeriodicJob
+from .registry import NOTIFY_CHANNEL, TASKS, enqueue, wakeup
+
+logger = logging.getLogger(__name__)
+
+# SQLite no tiene SKIP LOCKED: los hilos de un proceso toman turnos y
+# entre procesos decide el UPDATE condicional (status='queued')
+_claim_lock = threading.Lock()
+
+
+# =========================================================
+# 📥 TOMAR TRABAJOS
+# =========================================================
+def claim(worker, limit=1):
+    """
+    Marca como `running` hasta `limit` trabajos vencidos y los devuelve.
+    PostgreSQL: SELECT … FOR UPDATE SKIP LOCKED (cada worker salta las
+    filas que otro está tomando, sin esperar).
+    """
+    now = timezone.now()
+    due = (
+        Job.objects
+        .filter(status="queued", run_at__lte=now)
+        .order_by("priority", "run_at", "id")
+    )
+    claimed = {
+        "status": "running",
+        "worker": worker,
+        "started_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(due.select_for_update(skip_locked=True)[:limit])
+            if jobs:
+                Job.objects.filter(pk__in=[job.pk for job in jobs]).update(**claimed)
+        for job in jobs:
+            job.status, job.worker, job.started_at = "running", worker, now
+            job.attempts += 1
+        return jobs
+
+    with _claim_lock:
+        while True:
+            ids = list(due.values_list("pk", flat=True)[:limit])
+            if not ids:
+                return []
+            Job.objects.filter(pk__in=ids, status="queued").update(**claimed)
+            jobs = list(Job.objects.filter(
+                pk__in=ids, status="running", worker=worker, started_at=now
+            ))
+            # otro proceso los tomó primero: probar con los siguientes
+            if jobs:
+                return jobs
+
+
+# =========================================================
+# ▶️ EJECUTAR
+# =========================================================
+def execute(job):
+    """Corre la tarea y guarda el resultado, el reintento o la falla."""
+    registered = TASKS.get(job.task)
+
+    try:
+        if registered is None:
+            raise KeyError(f"Tarea no registrada: {job.task}")
+        result = registered(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Falló %s (intento %s/%s)", job, job.attempts, job.max_attempts)
+        _fail(job, error, registered.backoff if registered else settings.JOB_BACKOFF_BASE)
+        return False
+
+    finished = _owned(job).update(
+        status="done",
+        result=result,
+        last_error="",
+        finished_at=timezone.now(),
+    )
+    if not finished:
+        logger.warning("%s terminó después de volver a la cola; se descarta el resultado", job)
+    return True
+
+
+def _owned(job):
+    """
+    El trabajo mientras siga siendo de este worker: si requeue_stale lo
+    devolvió a la cola (y quizá otro lo tomó), el UPDATE no toca nada.
+    """
+    return Job.objects.filter(
+        pk=job.pk, status="running", worker=job.worker, started_at=job.started_at
+    )
+
+
+def _fail(job, error, backoff):
+    now = timezone.now()
+    if job.attempts >= job.max_attempts:
+        _owned(job).update(status="failed", last_error=error, finished_at=now)
+        return
+
+    # backoff exponencial con jitter: base · 2^(intento-1), ±20 %
+    delay = min(backoff * 2 ** (job.attempts - 1), settings.JOB_BACKOFF_MAX)
+    delay *= random.uniform(0.8, 1.2)
+    _owned(job).update(
+        status="queued",
+        last_error=error,
+        run_at=now + timedelta(seconds=delay),
+    )
+
+
+def requeue_stale():
+    """
+    Trabajos `running` por más de JOB_TIMEOUT: su worker murió. Vuelven
+    a la cola (o fallan si ya agotaron los intentos).
+    """
+    limit = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    stale = Job.objects.filter(status="running", started_at__lt=limit)
+
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="failed",
+        last_error="Tiempo agotado (el worker no terminó)",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status="queued", run_at=timezone.now())
+    return requeued + failed
+
+
+# =========================================================
+# ⏰ TRABAJOS PERIÓDICOS
+# =========================================================
+def sync_schedule():
+    """Refleja JOB_SCHEDULE en PeriodicJob (altas, cambios y bajas)."""
+    schedule = settings.JOB_SCHEDULE
+    now = timezone.now()
+
+    for name, entry in schedule.items():
+        periodic, created = PeriodicJob.objects.get_or_create(
+            name=name,
+            defaults={
+                "task": entry["task"],
+                "kwargs": entry.get("kwargs", {}),
+                "interval_seconds": entry["every"],
+                "next_run_at": now,
+            },
+        )
+        if not created and (
+            periodic.task, periodic.kwargs, periodic.interval_seconds
+        ) != (entry["task"], entry.get("kwargs", {}), entry["every"]):
+            periodic.task = entry["task"]
+            periodic.kwargs = entry.get("kwargs", {})
+            periodic.interval_seconds = entry["every"]
+            periodic.save(update_fields=["task", "kwargs", "interval_seconds"])
+
+    PeriodicJob.objects.exclude(name__in=list(schedule)).delete()
+
+
+def enqueue_due_periodic():
+    """
+    Encola las programaciones vencidas. Varios workers pueden correrlo a
+    la vez: el UPDATE condicional sobre next_run_at decide quién encola.
+    """
+    now = timezone.now()
+    enqueued = 0
+
+    for periodic in PeriodicJob.objects.filter(next_run_at__lte=now):
+        with transaction.atomic():
+            won = PeriodicJob.objects.filter(
+                pk=periodic.pk, next_run_at=periodic.next_run_at
+            ).update(next_run_at=now + timedelta(seconds=periodic.interval_seconds))
+            if won and periodic.task in TASKS:
+                enqueue(periodic.task, periodic=periodic.name, **periodic.kwargs)
+                enqueued += 1
+
+    return enqueued
+
+
+# =========================================================
+# 👷 WORKER
+# =========================================================
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class Worker:
+    """
+    Un hilo: toma trabajos de `batch` en `batch`, los ejecuta y espera
+    (LISTEN en PostgreSQL, sondeo cada JOB_POLL_INTERVAL) si no hay.
+    `burst=True` termina cuando la cola queda vacía.
+    """
+
+    def __init__(self, index=0, stop=None, batch=1, burst=False, scheduler=False):
+        self.name = worker_name(index)
+        self.stop = stop or threading.Event()
+        self.batch = batch
+        self.burst = burst
+        self.scheduler = scheduler
+        self.processed = 0
+        self.failed = 0
+        self._listening = None
+        self._next_tick = timezone.now()
+
+    def run(self):
+        try:
+            if self.scheduler:
+                sync_schedule()
+            while not self.stop.is_set():
+                if self.scheduler:
+                    self._tick()
+
+                jobs = claim(self.name, self.batch)
+                if not jobs:
+                    if self.burst:
+                        break
+                    self._wait(settings.JOB_POLL_INTERVAL)
+                    continue
+
+                for job in jobs:
+                    if execute(job):
+                        self.processed += 1
+                    else:
+                        self.failed += 1
+                close_old_connections()
+        finally:
+            connection.close()
+
+    def _tick(self):
+        now = timezone.now()
+        if now < self._next_tick:
+            return
+        self._next_tick = now + timedelta(seconds=settings.JOB_POLL_INTERVAL)
+        requeue_stale()
+        enqueue_due_periodic()
+
+    def _wait(self, timeout):
+        wakeup.clear()
+        if connection.vendor != "postgresql":
+            wakeup.wait(timeout)
+            return
+
+        # LISTEN por conexión: si Django la reabrió hay que volver a pedirlo
+        connection.ensure_connection()
+        raw = connection.connection
+        if self._listening is not raw:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            self._listening = raw
+
+        if not hasattr(raw, "notifies"):
+            wakeup.wait(timeout)
+            return
+        if select.select([raw], [], [], timeout)[0]:
+            raw.poll()
+            raw.notifies.clear()
+
+
+def run_threads(threads=1, stop=None, batch=1, burst=False, scheduler=True):
+    """N hilos Worker en este proceso; el primero además programa."""
+    stop = stop or threading.Event()
+    workers = [
+        Worker(index, stop=stop, batch=batch, burst=burst, scheduler=scheduler and index == 0)
+        for index in range(threads)
+    ]
+    pool = [
+        threading.Thread(target=worker.run, name=f"job-worker-{index}")
+        for index, worker in enumerate(workers)
+    ]
+    for thread in pool:
+        thread.start()
+    try:
+        for thread in pool:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in pool:
+            thread.join()
+
+    return workers
@@ -0,0 +1,251 @@
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from appointments.models import Appointment
+from backend.media import signed_media_url
+from backend.streaming import streaming_content
+from jobs.models import Job
+from jobs.registry import enqueue
+from users.roles import ADMIN, has_role
+from .models import ClinicalHistory, Patient
+
+EXPORT_FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 2000
+
+# dataset → (modelo, columnas, campo de fecha para start/end, campo paciente)
+EXPORTS = {
+    "patients": (
+        Patient,
+        [
+            "id", "full_name", "birth_date", "phone", "phone_alt", "email",
+            "emergency_contact", "city", "street", "neighborhood", "state",
+            "postal_code", "diagnosis", "notes", "recommended_by",
+            "chronic_diseases", "recent_surgeries", "last_appointment_date",
+            "next_appointment_date", "created_at",
+        ],
+        "created_at__date",
+        "id",
+    ),
+    "appointments": (
+        Appointment,
+        [
+            "id", "patient_id", "patient__full_name", "date", "start_time",
+            "duration_minutes", "status", "attended", "notes", "created_at",
+        ],
+        "date",
+        "patient_id",
+    ),
+    "clinical-history": (
+        ClinicalHistory,
+        [
+            "id", "patient_id", "patient__full_name", "therapist__username",
+            "date", "diagnosis", "treatment", "evolution", "pain_level",
+            "notes", "created_at",
+        ],
+        "date",
+        "patient_id",
+    ),
+}
+
+
+def export_queryset(dataset, start=None, end=None, patient=None):
+    model, columns, date_field, patient_field = EXPORTS[dataset]
+    qs = model.objects.all()
+
+    if start:
+        qs = qs.filter(**{f"{date_field}__gte": start})
+    if end:
+        qs = qs.filter(**{f"{date_field}__lte": end})
+    if patient:
+        qs = qs.filter(**{patient_field: patient})
+
+    # tuplas, sin instanciar modelos; orden por PK = index scan
+    return columns, qs.order_by("id").values_list(*columns)
+
+
+def export_filters(params):
+    """start / end (YYYY-MM-DD) y patient desde query params u opciones."""
+    return {
+        "start": parse_date(params.get("start") or ""),
+        "end": parse_date(params.get("end") or ""),
+        "patient": params.get("patient") or None,
+    }
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_export(columns, rows, fmt="csv"):
+    """
+    Genera el archivo en bloques de texto. `rows` se recorre con
+    .iterator(chunk_size) → cursor del lado del servidor en PostgreSQL,
+    memoria constante sin importar el tamaño de la tabla.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    rows = rows.iterator(chunk_size=CHUNK_SIZE)
+    buffer = []
+
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            buffer.append(writer.writerow(row))
+            if len(buffer) >= CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer.clear()
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            buffer.append(encoder.encode(dict(zip(columns, row))) + "\n")
+            if len(buffer) >= CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer.clear()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def gzip_stream(chunks):
+    """Comprime al vuelo (formato gzip) bloque por bloque."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, fmt="csv", gzip=False, **filters):
+    columns, rows = export_queryset(dataset, **filters)
+    chunks = iter_export(columns, rows, fmt)
+
+    if gzip:
+        return gzip_stream(chunks)
+    return (chunk.encode() for chunk in chunks)
+
+
+def export_filename(dataset, fmt, gzip=False):
+    return f"{dataset}.{fmt}" + (".gz" if gzip else "")
+
+
+def export_content_type(fmt, gzip=False):
+    if gzip:
+        return "application/gzip"
+    if fmt == "csv":
+        return "text/csv; charset=utf-8"
+    return "application/x-ndjson"
+
+
+def export_options(params):
+    """
+    (formato, gzip, filtros) desde los query params:
+    ?output=csv|ndjson&gzip=1&start=&end=&patient=
+    Lanza ValueError si el formato o las fechas no sirven.
+    """
+    fmt = params.get("output") or "csv"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"output must be one of {EXPORT_FORMATS}")
+    try:
+        filters = export_filters(params)
+    except ValueError:
+        raise ValueError("start and end must be valid dates (YYYY-MM-DD)")
+
+    return fmt, params.get("gzip") in ("1", "true"), filters
+
+
+def export_response(request, dataset):
+    """StreamingHttpResponse de `dataset` según los query params."""
+    fmt, gzip, filters = export_options(request.query_params)
+    response = StreamingHttpResponse(
+        streaming_content(request, export_stream(dataset, fmt, gzip, **filters)),
+        content_type=export_content_type(fmt, gzip),
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{export_filename(dataset, fmt, gzip)}"'
+    )
+    return response
+
+
+class ExportMixin:
+    """
+    Acciones `export` y `export/<job>` para un ViewSet; `export_dataset`
+    es la llave de EXPORTS que descarga.
+    """
+    export_dataset = None
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Exportación en streaming (CSV / NDJSON, opcional gzip).
+        ?output=csv|ndjson&gzip=1&start=&end=&patient=
+
+        Con ?background=1 la genera el worker (tarea patients.export,
+        siempre gzip) y responde 202 con la URL para consultarla.
+
+        Sigue siendo síncrona bajo ASGI (DRF): la vista solo arma la
+        respuesta y el cuerpo sale por bloques (backend/streaming.py), en
+        el hilo de esta petición, el de su cursor del lado del servidor.
+        """
+        if not has_role(request.user, ADMIN):
+            raise PermissionDenied("Solo Admin puede exportar datos")
+
+        try:
+            if request.query_params.get("background") not in ("1", "true"):
+                return export_response(request, self.export_dataset)
+            fmt, _, filters = export_options(request.query_params)
+        except ValueError as error:
+            return Response(
+                {"detail": str(error)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = enqueue(
+            "patients.export", dataset=self.export_dataset, output=fmt, **filters
+        )
+        return Response(
+            {"job": job.pk, "status": job.status, "url": self._export_job_url(request, job)},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<job_id>\d+)")
+    def export_job(self, request, job_id):
+        """
+        Estado de una exportación en segundo plano. Terminada trae `file`:
+        URL firmada del archivo (servido por /media/, ver backend/media.py).
+        """
+        if not has_role(request.user, ADMIN):
+            raise PermissionDenied("Solo Admin puede exportar datos")
+
+        job = Job.objects.filter(
+            pk=job_id, task="patients.export", kwargs__dataset=self.export_dataset
+        ).first()
+        if job is None:
+            return Response(
+                {"detail": "Exportación no encontrada"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        data = {"job": job.pk, "status": job.status, "url": self._export_job_url(request, job)}
+        if job.status == "done":
+            data["file"] = request.build_absolute_uri(signed_media_url(job.result))
+        elif job.status == "failed":
+            data["detail"] = "La exportación falló"
+        return Response(data)
+
+    def _export_job_url(self, request, job):
+        return request.build_absolute_uri(
+            reverse(f"{self.basename}-export-job", args=[job.pk])
+        )
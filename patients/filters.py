@@ -0,0 +1,130 @@
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+
+FTS_TABLE = "patients_patient_fts"
+
+
+class PatientSearchFilter(SearchFilter):
+    """
+    Búsqueda de pacientes por nombre / "recomendado por".
+
+    - PostgreSQL: índices GIN `pg_trgm` sobre `f_unaccent(columna)`
+      (ver migración 0007). Coincidencia parcial sin acentos ni
+      mayúsculas, tolerante a errores de dedo, con ranking por
+      similitud en `search_rank`.
+    - SQLite: tabla virtual FTS5 (`patients_patient_fts`) con
+      `remove_diacritics` (prefijos de palabra, sin ranking).
+    - Otro motor (o SQLite sin FTS5): `SearchFilter` normal.
+    """
+    rank_field = "search_rank"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        connection = connections[queryset.db]
+
+        if connection.vendor == "postgresql":
+            return self._trigram_search(queryset, terms)
+
+        if connection.vendor == "sqlite" and has_fts_table(connection):
+            return self._fts_search(queryset, terms)
+
+        return super().filter_queryset(request, queryset, view)
+
+    @classmethod
+    def is_ranked(cls, queryset):
+        return cls.rank_field in queryset.query.annotations
+
+    # =========================================================
+    # 🐘 POSTGRESQL (pg_trgm + unaccent)
+    # =========================================================
+    def _trigram_search(self, queryset, terms):
+        table = queryset.model._meta.db_table
+        columns = [f'"{table}"."full_name"', f'"{table}"."recommended_by"']
+        phrase = " ".join(terms)
+
+        # Cada término debe aparecer (sin acentos) en alguna columna.
+        # ILIKE '%x%' lo resuelve el índice GIN trigram.
+        contains = Q()
+        for term in terms:
+            pattern = f"%{escape_like(term)}%"
+            any_column = Q()
+            for column in columns:
+                any_column |= Q(RawSQL(
+                    f"f_unaccent({column}) ILIKE f_unaccent(%s)",
+                    [pattern],
+                    output_field=BooleanField(),
+                ))
+            contains &= any_column
+
+        # Tolerancia a errores: similitud de palabra (operador <%,
+        # también servido por el índice GIN).
+        similar = Q()
+        for column in columns:
+            similar |= Q(RawSQL(
+                f"f_unaccent(%s) <%% f_unaccent({column})",
+                [phrase],
+                output_field=BooleanField(),
+            ))
+
+        # float8 para que el valor viaje exacto en el cursor de paginación
+        rank = RawSQL(
+            "GREATEST("
+            + ", ".join(
+                f"word_similarity(f_unaccent(%s), f_unaccent({column}))"
+                for column in columns
+            )
+            + ")::double precision",
+            [phrase] * len(columns),
+            output_field=FloatField(),
+        )
+
+        return (
+            queryset
+            .filter(contains | similar)
+            .annotate(**{self.rank_field: rank})
+        )
+
+    # =========================================================
+    # 🪶 SQLITE (FTS5)
+    # =========================================================
+    def _fts_search(self, queryset, terms):
+        match = " ".join(
+            '"{}"*'.format(term.replace('"', '""')) for term in terms
+        )
+
+        # Sin ranking: un bm25 correlacionado por fila cuesta más que
+        # la búsqueda; se conserva el orden por fecha de alta.
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [match],
+        ))
+
+
+def escape_like(value):
+    return (
+        value
+        .replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+_fts_available = {}
+
+
+def has_fts_table(connection):
+    """
+    Se consulta una sola vez por conexión/alias: la tabla FTS5 solo
+    existe si SQLite se compiló con FTS5 al migrar.
+    """
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _fts_available[connection.alias] = FTS_TABLE in tables
+    return _fts_available[connection.alias]
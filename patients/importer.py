@@ -0,0 +1,230 @@
+import csv
+import json
+
+from django.db import DatabaseError, transaction
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+
+from .models import Patient
+from .serializers import PatientSerializer
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class PatientImportSerializer(PatientSerializer):
+    """
+    Mismas reglas que PatientSerializer (campos del modelo +
+    validate_phone), sin relaciones ni foto.
+    """
+
+    class Meta:
+        model = Patient
+        fields = [
+            "full_name",
+            "birth_date",
+            "phone",
+            "phone_alt",
+            "email",
+            "emergency_contact",
+            "city",
+            "street",
+            "neighborhood",
+            "state",
+            "postal_code",
+            "diagnosis",
+            "notes",
+            "recommended_by",
+            "chronic_diseases",
+            "recent_surgeries",
+        ]
+
+    @cached_property
+    def _row_validators(self):
+        return [
+            (name, field, getattr(self, f"validate_{name}", None))
+            for name, field in self.fields.items()
+            if not field.read_only
+        ]
+
+    def validate_row(self, record):
+        """
+        Equivalente a `run_validation` (mismos campos, validadores y
+        validate_<campo>) pero solo visita las columnas presentes:
+        sin la maquinaria por campo de DRF, ~2x más rápido por fila.
+        """
+        data = {}
+        errors = {}
+
+        for name, field, validate_method in self._row_validators:
+            if name not in record:
+                if field.required:
+                    errors[name] = [ErrorDetail(
+                        field.error_messages["required"], code="required"
+                    )]
+                continue
+
+            try:
+                value = field.run_validation(record[name])
+                if validate_method is not None:
+                    value = validate_method(value)
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+            else:
+                data[name] = value
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+
+def detect_format(filename, default="csv"):
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def _decode(lines, invalid):
+    """
+    Texto de cada línea. Las que no son UTF-8 se decodifican con "�" y
+    su número (desde 1) se agrega a `invalid`: la fila se rechaza en vez
+    de cortar la importación a la mitad.
+    """
+    for number, line in enumerate(lines, start=1):
+        try:
+            yield line.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            invalid.add(number)
+            yield line.decode("utf-8-sig", errors="replace")
+
+
+def _invalid_text():
+    return serializers.ValidationError({"line": [
+        "El texto no es UTF-8 válido; guarda el archivo como UTF-8"
+    ]})
+
+
+def iter_records(lines, fmt):
+    """
+    Genera (número de fila, dict | error) leyendo línea por línea.
+    `lines` es un iterable de bytes (archivo abierto en binario o un
+    UploadedFile): nunca se carga el archivo completo.
+    """
+    invalid = set()
+    text = _decode(lines, invalid)
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        try:
+            if reader.fieldnames and 1 in invalid:
+                # encabezados ilegibles: ninguna columna es confiable
+                yield 1, _invalid_text()
+                return
+
+            # fila 1 = encabezados, como en la hoja de cálculo
+            last_line = reader.line_num
+            for number, record in enumerate(reader, start=2):
+                # líneas de la fila: un campo entre comillas ocupa varias
+                lines_read = range(last_line + 1, reader.line_num + 1)
+                last_line = reader.line_num
+                if not invalid.isdisjoint(lines_read):
+                    yield number, _invalid_text()
+                    continue
+                # "" en CSV = columna vacía → se omite y aplica el default
+                yield number, {
+                    key: value for key, value in record.items()
+                    if key and value not in ("", None)
+                }
+        except csv.Error as exc:
+            # el lector no se recupera: se reporta y termina
+            yield reader.line_num, serializers.ValidationError({"line": [str(exc)]})
+        return
+
+    for number, line in enumerate(text, start=1):
+        if number in invalid:
+            yield number, _invalid_text()
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, serializers.ValidationError({"line": [str(exc)]})
+            continue
+        if not isinstance(record, dict):
+            yield number, serializers.ValidationError(
+                {"line": ["Se esperaba un objeto JSON"]}
+            )
+            continue
+        yield number, record
+
+
+def import_patients(lines, fmt="csv", batch_size=1000, dry_run=False):
+    """
+    Valida e inserta pacientes en lotes (`bulk_create` + una transacción
+    por lote).
+
+    Es un generador de eventos para poder reportar mientras avanza:
+        {"row": n, "errors": {...}}        fila rechazada
+        {"created": x, "failed": y, ...}   resumen final (último evento)
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    # un solo serializer: los campos se construyen una vez
+    serializer = PatientImportSerializer()
+    batch = []
+    batch_rows = []
+    created = failed = 0
+
+    def flush():
+        nonlocal created, failed
+        if not batch:
+            return []
+
+        errors = []
+        if not dry_run:
+            try:
+                with transaction.atomic():
+                    Patient.objects.bulk_create(batch, batch_size=batch_size)
+            except DatabaseError as exc:
+                failed += len(batch)
+                errors = [
+                    {"row": row, "errors": {"database": [str(exc)]}}
+                    for row in batch_rows
+                ]
+                batch.clear()
+                batch_rows.clear()
+                return errors
+
+        created += len(batch)
+        batch.clear()
+        batch_rows.clear()
+        return errors
+
+    for row, record in iter_records(lines, fmt):
+        try:
+            if isinstance(record, serializers.ValidationError):
+                raise record
+            data = serializer.validate_row(record)
+        except serializers.ValidationError as exc:
+            failed += 1
+            yield {"row": row, "errors": exc.detail}
+            continue
+
+        batch.append(Patient(**data))
+        batch_rows.append(row)
+
+        if len(batch) >= batch_size:
+            yield from flush()
+
+    yield from flush()
+
+    yield {
+        "created": created,
+        "failed": failed,
+        "dry_run": dry_run,
+    }
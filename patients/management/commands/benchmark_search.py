@@ -0,0 +1,139 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.filters import SearchFilter
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from patients.models import Patient
+from patients.views import PatientViewSet
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    "José", "María", "Juan", "Guadalupe", "Francisco", "Verónica",
+    "Jesús", "Ana", "Ramón", "Sofía", "Andrés", "Mónica", "Raúl",
+    "Lucía", "Héctor", "Beatriz", "Martín", "Inés", "Iván", "Belén",
+]
+LAST_NAMES = [
+    "Hernández", "García", "Martínez", "López", "González", "Pérez",
+    "Rodríguez", "Sánchez", "Ramírez", "Cruz", "Gómez", "Núñez",
+    "Díaz", "Vázquez", "Jiménez", "Ordóñez", "Domínguez", "Muñoz",
+]
+QUERIES = ["jose", "maria", "perez", "nunez", "ramon gar", "lu", "ordonez"]
+
+
+class LegacyPatientViewSet(PatientViewSet):
+    filter_backends = [SearchFilter]
+
+    def get_keyset_ordering(self, queryset):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la latencia de búsqueda de pacientes (icontains vs "
+        "índice trigram/FTS5) con 10k, 100k y 1M pacientes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="No revertir los pacientes generados",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True).first()
+        if not user:
+            self.stdout.write(self.style.ERROR(
+                "⚠️ No hay usuarios en la BD"
+            ))
+            return
+
+        self.stdout.write(f"🗄 Motor: {connection.vendor}")
+        self.stdout.write(
+            f"{'pacientes':>10} {'backend':>8} {'p50 ms':>9} {'p95 ms':>9}"
+        )
+
+        try:
+            with transaction.atomic():
+                for size in sorted(options["sizes"]):
+                    self._fill(size, options["batch"])
+
+                    for label, view_class in (
+                        ("legacy", LegacyPatientViewSet),
+                        ("indexed", PatientViewSet),
+                    ):
+                        p50, p95 = self._measure(
+                            view_class, user, options["repeat"]
+                        )
+                        self.stdout.write(
+                            f"{size:>10} {label:>8} {p50:>9.2f} {p95:>9.2f}"
+                        )
+
+                if not options["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write("↩️ Pacientes de prueba revertidos")
+
+    def _fill(self, size, batch):
+        missing = size - Patient.objects.count()
+        rng = random.Random(size)
+
+        while missing > 0:
+            chunk = min(batch, missing)
+            Patient.objects.bulk_create([
+                Patient(
+                    full_name=" ".join([
+                        rng.choice(FIRST_NAMES),
+                        rng.choice(LAST_NAMES),
+                        rng.choice(LAST_NAMES),
+                    ]),
+                    phone=str(rng.randint(10**9, 10**10 - 1)),
+                    recommended_by=f"Dr. {rng.choice(LAST_NAMES)}",
+                )
+                for _ in range(chunk)
+            ], batch_size=batch)
+            missing -= chunk
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE patients_patient")
+
+    def _measure(self, view_class, user, repeat):
+        factory = APIRequestFactory()
+        view = view_class.as_view({"get": "list"})
+        timings = []
+
+        for i in range(repeat):
+            request = factory.get(
+                "/api/patients/", {"search": QUERIES[i % len(QUERIES)]}
+            )
+            force_authenticate(request, user=user)
+
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        return (
+            statistics.median(timings),
+            timings[int(len(timings) * 0.95) - 1],
+        )
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,685 @@
+import json
+import random
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment, AppointmentSeries, refresh_appointment_dates
+from appointments.stats import rebuild_daily_stats
+from auth.tokens import tokens_for_user
+from jobs.models import Job
+from patients.exporter import EXPORTS
+from patients.models import ClinicalHistory, Patient, Prescription
+from sync.changes import encode_token
+
+User = get_user_model()
+
+# Tablas grandes: un Seq Scan sobre ellas es una regresión
+WATCHED_TABLES = ("appointments_appointment", "patients_patient")
+
+PASSWORD = "query-budget-password"
+
+
+class Budget:
+    """
+    Presupuesto de una ruta + método: máximo de queries (cache frío) y
+    cómo llamarla. `url` recibe el contexto con los IDs sembrados.
+    """
+
+    def __init__(self, queries, url, params=None, data=None, fmt=None,
+                 status=200, auth=True, seq_scan_ok=False):
+        self.queries = queries
+        self.url = url
+        self.params = params
+        self.data = data
+        self.fmt = fmt
+        self.status = status
+        self.auth = auth
+        self.seq_scan_ok = seq_scan_ok
+
+
+def _csv_upload(ctx):
+    return {
+        "file": SimpleUploadedFile(
+            "pacientes.csv",
+            b"full_name,phone\nAna Presupuesto,5512345678\n,123\n",
+            content_type="text/csv",
+        ),
+    }
+
+
+def _prescription_upload(ctx):
+    return {
+        "patient": ctx["patient"],
+        "file": SimpleUploadedFile("receta.pdf", b"%PDF-1.4\n%%EOF\n"),
+        "description": "Receta",
+    }
+
+
+def _patient_data(ctx):
+    return {"full_name": "Paciente Presupuesto", "phone": "5512345678"}
+
+
+def _appointment_data(ctx):
+    return {
+        "patient": ctx["patient"],
+        "date": "2030-01-15",
+        "start_time": "10:00",
+        "duration_minutes": 60,
+    }
+
+
+def _series_data(ctx):
+    return {
+        "patient": ctx["patient"],
+        "start_date": "2030-03-04",
+        "weekdays": [0, 2, 4],
+        "start_time": "10:00",
+        "count": 12,
+    }
+
+
+def _history_data(ctx):
+    return {
+        "patient": ctx["patient"],
+        "treatment": "Terapia manual",
+        "pain_level": 4,
+    }
+
+
+def _month(ctx):
+    return {"start": "2030-01-01", "end": "2030-02-01"}
+
+
+def _next_week(ctx):
+    today = date.today()
+    return {"start": f"{today}", "end": f"{today + timedelta(days=6)}"}
+
+
+def _last_year(ctx):
+    today = date.today()
+    return {"start": f"{today - timedelta(days=365)}", "end": f"{today}"}
+
+
+def _sync_since(ctx):
+    return {"since": encode_token(timezone.now() - timedelta(hours=1))}
+
+
+# (nombre de la ruta o patrón, método) → Budget
+# Al agregar una ruta nueva hay que agregar aquí su presupuesto.
+# Incluyen las queries del cache "shared" (DatabaseCache): 1 de
+# revocación en cada ruta con token y el DELETE de las semanas del
+# calendario al confirmar cada escritura de citas.
+BUDGETS = {
+    ("api-root", "GET"): Budget(1, lambda c: "/api/"),
+    ("api/auth/login/", "POST"): Budget(
+        2, lambda c: "/api/auth/login/", auth=False, fmt="json",
+        data=lambda c: {"email": c["email"], "password": PASSWORD},
+    ),
+    ("api/auth/refresh/", "POST"): Budget(
+        2, lambda c: "/api/auth/refresh/", auth=False, fmt="json",
+        data=lambda c: {"refresh": c["refresh"]},
+    ),
+    ("^media/(?P<path>.+)$", "GET"): Budget(1, lambda c: f"/media/{c['media']}"),
+
+    # 🧑 Pacientes
+    ("p-list", "GET"): Budget(2, lambda c: "/api/patients/"),
+    ("p-list", "POST"): Budget(
+        4, lambda c: "/api/patients/", data=_patient_data, status=201,
+    ),
+    ("p-detail", "GET"): Budget(4, lambda c: f"/api/patients/{c['patient']}/"),
+    ("p-detail", "PUT"): Budget(
+        7, lambda c: f"/api/patients/{c['patient']}/", data=_patient_data,
+    ),
+    ("p-detail", "PATCH"): Budget(
+        7, lambda c: f"/api/patients/{c['patient']}/", data=_patient_data,
+    ),
+    # citas en bloque (bulk_delete): no crece con las citas del paciente
+    ("p-detail", "DELETE"): Budget(
+        15, lambda c: f"/api/patients/{c['patient']}/", status=204,
+    ),
+    ("p-delete-photo", "DELETE"): Budget(
+        2, lambda c: f"/api/patients/{c['patient']}/delete_photo/", status=204,
+    ),
+    ("p-delete-prescription", "DELETE"): Budget(
+        3,
+        lambda c: f"/api/patients/{c['patient']}/prescriptions/{c['prescription']}/",
+        status=204,
+    ),
+    ("p-import-file", "POST"): Budget(
+        2, lambda c: "/api/patients/import/", data=_csv_upload,
+    ),
+    ("p-export", "GET"): Budget(
+        2, lambda c: "/api/patients/export/", seq_scan_ok=True,
+    ),
+    ("p-export-job", "GET"): Budget(
+        2, lambda c: f"/api/patients/export/{c['export_jobs']['patients']}/",
+    ),
+    # cambios + tombstones
+    ("p-changes", "GET"): Budget(
+        3, lambda c: "/api/patients/changes/", params=_sync_since,
+    ),
+
+    # 📅 Citas
+    ("appointment-list", "GET"): Budget(
+        2, lambda c: "/api/appointments/", params=lambda c: {"patient": c["patient"]},
+    ),
+    # + empalmes: 1 query de ocupación y, en PostgreSQL, 1 de advisory locks
+    ("appointment-list", "POST"): Budget(
+        9, lambda c: "/api/appointments/", data=_appointment_data, status=201,
+    ),
+    ("appointment-detail", "GET"): Budget(
+        2, lambda c: f"/api/appointments/{c['appointment']}/",
+    ),
+    ("appointment-detail", "PUT"): Budget(
+        11, lambda c: f"/api/appointments/{c['appointment']}/", data=_appointment_data,
+    ),
+    ("appointment-detail", "PATCH"): Budget(
+        6, lambda c: f"/api/appointments/{c['appointment']}/",
+        data=lambda c: {"status": "completed"},
+    ),
+    ("appointment-detail", "DELETE"): Budget(
+        7, lambda c: f"/api/appointments/{c['appointment']}/", status=204,
+    ),
+    ("appointment-changes", "GET"): Budget(
+        3, lambda c: "/api/appointments/changes/",
+        params=lambda c: {"patient": c["patient"], **_sync_since(c)},
+    ),
+    # cache frío: get_many de las semanas, la lectura y el set_many (3)
+    ("appointment-calendar", "GET"): Budget(
+        6, lambda c: "/api/appointments/calendar/", params=_month,
+    ),
+    ("appointment-calendar-cache", "GET"): Budget(
+        2, lambda c: "/api/appointments/calendar-cache/",
+    ),
+    # días a reactivar → booking_lock → filas (mismo orden que un PATCH)
+    ("appointment-bulk-status", "POST"): Budget(
+        10, lambda c: "/api/appointments/bulk-status/",
+        data=lambda c: {"changes": [
+            {"id": c["appointment"], "status": "completed"},
+            {"id": c["series_appointment"], "status": "no_show"},
+        ]},
+        fmt="json",
+    ),
+    ("appointment-series", "POST"): Budget(
+        10, lambda c: "/api/appointments/series/", data=_series_data,
+        fmt="json", status=201,
+    ),
+    ("appointment-series-detail", "GET"): Budget(
+        3, lambda c: f"/api/appointments/series/{c['series']}/",
+    ),
+    # días pendientes → booking_lock → filas (mismo orden que un PATCH)
+    ("appointment-series-detail", "PATCH"): Budget(
+        10, lambda c: f"/api/appointments/series/{c['series']}/",
+        data=lambda c: {"start_time": "07:00"}, fmt="json",
+        params=lambda c: {"from": "2031-01-01"},
+    ),
+    ("appointment-series-detail", "DELETE"): Budget(
+        9, lambda c: f"/api/appointments/series/{c['series']}/",
+        params=lambda c: {"from": "2031-01-01"},
+    ),
+    ("appointment-availability", "GET"): Budget(
+        2, lambda c: "/api/appointments/availability/", params=_next_week,
+    ),
+    ("appointment-bitacora", "GET"): Budget(
+        2, lambda c: "/api/appointments/attended-sessions/",
+        params=lambda c: {"patient": c["patient"], **_month(c)},
+    ),
+    ("appointment-bitacora-document", "GET"): Budget(
+        6, lambda c: "/api/appointments/attended-sessions/document/",
+        params=lambda c: {"patient": c["patient"], **_last_year(c)},
+    ),
+    # + 3 por cada CACHE_WRITE_BATCH documentos renderizados
+    ("appointment-bitacora-batch", "GET"): Budget(
+        9, lambda c: "/api/appointments/attended-sessions/batch/",
+        params=lambda c: {"month": f"{date.today():%Y-%m}"},
+    ),
+    ("appointment-patient-report", "GET"): Budget(
+        2, lambda c: "/api/appointments/patient-report/",
+        params=lambda c: {"patient": c["patient"]},
+    ),
+    ("appointment-attendance-report", "GET"): Budget(
+        2, lambda c: "/api/appointments/attendance_report/", params=_month,
+    ),
+    ("appointment-export", "GET"): Budget(
+        2, lambda c: "/api/appointments/export/", seq_scan_ok=True,
+    ),
+    ("appointment-export-job", "GET"): Budget(
+        2, lambda c: f"/api/appointments/export/{c['export_jobs']['appointments']}/",
+    ),
+
+    # 💊 Recetas
+    ("prescription-list", "GET"): Budget(
+        2, lambda c: "/api/prescriptions/", params=lambda c: {"patient": c["patient"]},
+    ),
+    ("prescription-list", "POST"): Budget(
+        3, lambda c: "/api/prescriptions/", data=_prescription_upload, status=201,
+    ),
+    ("prescription-detail", "GET"): Budget(
+        2, lambda c: f"/api/prescriptions/{c['prescription']}/",
+    ),
+
+    # 📋 Historial clínico
+    ("clinical-history-list", "GET"): Budget(
+        2, lambda c: "/api/clinical-history/",
+        params=lambda c: {"patient": c["patient"]},
+    ),
+    ("clinical-history-list", "POST"): Budget(
+        3, lambda c: "/api/clinical-history/", data=_history_data,
+        fmt="json", status=201,
+    ),
+    ("clinical-history-detail", "GET"): Budget(
+        2, lambda c: f"/api/clinical-history/{c['history']}/",
+    ),
+    ("clinical-history-detail", "PUT"): Budget(
+        4, lambda c: f"/api/clinical-history/{c['history']}/", data=_history_data,
+        fmt="json",
+    ),
+    ("clinical-history-detail", "PATCH"): Budget(
+        3, lambda c: f"/api/clinical-history/{c['history']}/",
+        data=lambda c: {"pain_level": 2}, fmt="json",
+    ),
+    ("clinical-history-detail", "DELETE"): Budget(
+        3, lambda c: f"/api/clinical-history/{c['history']}/", status=204,
+    ),
+    ("clinical-history-trends", "GET"): Budget(
+        3, lambda c: "/api/clinical-history/trends/",
+        params=lambda c: {"patient": c["patient"]},
+    ),
+    ("clinical-history-export", "GET"): Budget(
+        2, lambda c: "/api/clinical-history/export/", seq_scan_ok=True,
+    ),
+    ("clinical-history-export-job", "GET"): Budget(
+        2, lambda c: f"/api/clinical-history/export/{c['export_jobs']['clinical-history']}/",
+    ),
+}
+
+# Admin de Django (sesión, HTML) y estáticos de desarrollo
+SKIPPED_PREFIXES = ("admin/", "^static/")
+
+# Rutas que no se pueden medir como una request → motivo. Cualquier
+# otra vista sin clase (sin métodos que recorrer) es una falla.
+SKIPPED_ROUTES = {
+    "appointment-stream": "SSE: la respuesta no termina",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Llama cada ruta de backend/urls.py sobre datos sembrados y falla si "
+        "supera su presupuesto de queries o (PostgreSQL) si algún plan hace "
+        "Seq Scan sobre appointments_appointment / patients_patient"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--patients", type=int, default=2000)
+        parser.add_argument(
+            "--seq-scan-rows",
+            type=int,
+            default=1000,
+            help="Tamaño de tabla a partir del cual un Seq Scan falla",
+        )
+        parser.add_argument(
+            "--verbose-sql",
+            action="store_true",
+            help="Mostrar las queries de las rutas que fallen",
+        )
+
+    def handle(self, *args, **options):
+        # dict.fromkeys: p-detail GET existe en la vista async y en el router
+        routes = list(dict.fromkeys(self._routes()))
+        unknown = [key for key, method in routes if method is None]
+        routes = [route for route in routes if route[1] is not None]
+        missing = [route for route in routes if route not in BUDGETS]
+        stale = [route for route in BUDGETS if route not in routes]
+        failures = [
+            f"{key}: vista sin clase, agregar un presupuesto o a SKIPPED_ROUTES"
+            for key in unknown
+        ]
+        failures += [f"{key} {method}: sin presupuesto" for key, method in missing]
+        failures += [f"{key} {method}: la ruta ya no existe" for key, method in stale]
+
+        media_root = tempfile.mkdtemp(prefix="query-budget-")
+        isolated = {
+            # "shared" tal como está configurado: sus queries (revocación,
+            # calendario, bitácora) cuentan igual que en producción
+            "CACHES": {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "query-budget",
+                },
+                "shared": settings.CACHES["shared"],
+            },
+            # miniaturas a la cola: un hilo competiría por la BD con la
+            # transacción abierta del comando
+            "JOB_QUEUE_ENABLED": True,
+            "MEDIA_ROOT": media_root,
+            "MEDIA_ACCEL_REDIRECT_PREFIX": "",
+            "PASSWORD_HASH_ITERATIONS": 1000,
+        }
+
+        self.stdout.write(f"🗄 Motor: {connection.vendor}")
+        self.stdout.write(
+            f"{'ruta':<30} {'método':<7} {'queries':>7} {'máx':>4} {'ms':>8}"
+        )
+
+        try:
+            with override_settings(**isolated), transaction.atomic():
+                ctx = self._seed(options["patients"])
+                for route in routes:
+                    if route in BUDGETS:
+                        failures += self._check(route, BUDGETS[route], ctx, options)
+                failures += self._check_calendar_cache(ctx)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f"⚠️ {failure}"))
+            raise CommandError(f"{len(failures)} rutas fuera de presupuesto")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(routes)} rutas dentro de presupuesto"
+        ))
+
+    # =========================================================
+    # 🗺 RUTAS
+    # =========================================================
+    def _routes(self):
+        """
+        (nombre o patrón, método) de cada ruta, sin los sufijos .json;
+        método None si la vista no es una clase y no está en SKIPPED_ROUTES.
+        """
+        def walk(patterns, prefix=""):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from walk(pattern.url_patterns, prefix + str(pattern.pattern))
+                    continue
+
+                route = prefix + str(pattern.pattern)
+                if "format" in pattern.pattern.regex.groupindex:
+                    continue
+                key = pattern.name or route
+                if route.startswith(SKIPPED_PREFIXES) or key in SKIPPED_ROUTES:
+                    continue
+
+                methods = self._methods(pattern)
+                if methods is None:
+                    yield key, None
+                    continue
+                yield from ((key, method) for method in methods)
+
+        return walk(get_resolver().url_patterns)
+
+    def _methods(self, pattern):
+        callback = pattern.callback
+        view_class = getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+        if view_class is None:
+            return None
+
+        allowed = getattr(view_class, "http_method_names", [])
+        actions = getattr(callback, "actions", None)
+        if actions:
+            methods = actions
+        else:
+            methods = [m for m in ("get", "post", "put", "patch", "delete") if hasattr(view_class, m)]
+        return [m.upper() for m in methods if m in allowed]
+
+    # =========================================================
+    # 🌱 DATOS
+    # =========================================================
+    def _seed(self, size):
+        rng = random.Random(size)
+        today = date.today()
+
+        user = User.objects.create_user(
+            "query-budget", "query-budget@example.com", PASSWORD
+        )
+        user.groups.add(Group.objects.get(name="Admin"))
+
+        patients = Patient.objects.bulk_create([
+            Patient(full_name=f"Paciente {i}", phone=f"55{i:08d}")
+            for i in range(size)
+        ], batch_size=1000)
+
+        Appointment.objects.bulk_create([
+            Appointment(
+                patient=patient,
+                date=today + timedelta(days=rng.randint(-365, 60)),
+                start_time=dtime(rng.randint(8, 19), rng.choice([0, 30])),
+                status=rng.choice(["scheduled", "completed", "completed", "no_show"]),
+            )
+            for patient in patients
+            for _ in range(10)
+        ], batch_size=5000)
+
+        # una serie de 10 lunes en 2031 (otro paciente: p-detail DELETE
+        # borra las citas del primero una por una)
+        series = AppointmentSeries.objects.create(
+            patient=patients[1],
+            start_date=date(2031, 1, 6),
+            count=10,
+            weekdays=[0],
+            start_time=dtime(8, 0),
+        )
+        Appointment.objects.bulk_create([
+            Appointment(
+                patient=patients[1],
+                date=series.start_date + timedelta(weeks=week),
+                start_time=series.start_time,
+                series=series,
+            )
+            for week in range(10)
+        ])
+
+        ClinicalHistory.objects.bulk_create([
+            ClinicalHistory(
+                patient=patient,
+                therapist=user,
+                treatment=rng.choice(["Terapia manual", "Electroterapia", "Ejercicio"]),
+                pain_level=rng.randint(0, 10),
+            )
+            for patient in patients
+            for _ in range(5)
+        ], batch_size=5000)
+
+        media = default_storage.save("query-budget/receta.pdf", ContentFile(b"%PDF-1.4\n"))
+        Prescription.objects.bulk_create([
+            Prescription(patient=patient, file=media, description="Receta")
+            for patient in patients
+        ], batch_size=5000)
+
+        refresh_appointment_dates()
+        rebuild_daily_stats()
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        patient = patients[0]
+        tokens = tokens_for_user(user)
+        return {
+            "user": user,
+            "email": user.email,
+            "access": tokens["access"],
+            "refresh": tokens["refresh"],
+            "media": media,
+            "patient": patient.pk,
+            "appointment": Appointment.objects.filter(patient=patient).first().pk,
+            "history": ClinicalHistory.objects.filter(patient=patient).first().pk,
+            "prescription": Prescription.objects.filter(patient=patient).first().pk,
+            "series": series.pk,
+            "series_appointment": series.appointments.first().pk,
+            "export_jobs": {
+                dataset: Job.objects.create(
+                    task="patients.export", kwargs={"dataset": dataset},
+                    status="done", result=media,
+                ).pk
+                for dataset in EXPORTS
+            },
+        }
+
+    # =========================================================
+    # 📏 PRESUPUESTO + PLANES
+    # =========================================================
+    def _check(self, route, budget, ctx, options):
+        key, method = route
+        client = APIClient()
+        if budget.auth:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {ctx['access']}")
+
+        url = budget.url(ctx)
+        if budget.params:
+            url += "?" + "&".join(f"{k}={v}" for k, v in budget.params(ctx).items())
+        data = budget.data(ctx) if budget.data else None
+        kwargs = {"format": budget.fmt} if budget.fmt else {}
+
+        # cache frío: el presupuesto es el peor caso
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        savepoint = transaction.savepoint()
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                pending = len(connection.run_on_commit)
+                response = getattr(client, method.lower())(url, data, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                # el COMMIT nunca llega (todo se revierte): lo que correría
+                # al hacerlo (invalidar caches, avisar workers) va aquí
+                callbacks = connection.run_on_commit[pending:]
+                del connection.run_on_commit[pending:]
+                for _, callback, _ in callbacks:
+                    callback()
+                elapsed = (time.perf_counter() - start) * 1000
+
+            queries = [
+                q["sql"] for q in captured.captured_queries
+                if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+            ]
+            plans = [] if budget.seq_scan_ok else self._seq_scans(
+                queries, options["seq_scan_rows"]
+            )
+        finally:
+            transaction.savepoint_rollback(savepoint)
+
+        ok = response.status_code == budget.status and len(queries) <= budget.queries and not plans
+        self.stdout.write(
+            f"{key:<30} {method:<7} {len(queries):>7} {budget.queries:>4} "
+            f"{elapsed:>8.1f} {'✅' if ok else '❌'}"
+        )
+
+        failures = []
+        if response.status_code != budget.status:
+            failures.append(
+                f"{key} {method}: status {response.status_code} "
+                f"(esperado {budget.status})"
+            )
+        if len(queries) > budget.queries:
+            failures.append(
+                f"{key} {method}: {len(queries)} queries (máximo {budget.queries})"
+            )
+        failures += [f"{key} {method}: {plan}" for plan in plans]
+
+        if failures and options["verbose_sql"]:
+            for sql in queries:
+                self.stdout.write(f"    {sql[:200]}")
+        return failures
+
+    def _check_calendar_cache(self, ctx):
+        """
+        /calendar/ con el cache por semana: un acierto no toca la tabla de
+        citas y no cuesta más queries que la misma lectura sin cache.
+        """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ctx['access']}")
+        url = "/api/appointments/calendar/?" + "&".join(
+            f"{k}={v}" for k, v in _month(ctx).items()
+        )
+
+        def measure():
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(url)
+            queries = [
+                q["sql"] for q in captured.captured_queries
+                if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+            ]
+            return response.status_code, queries
+
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        measure()
+        _, warm = measure()
+        uncached_caches = {
+            **settings.CACHES,
+            "calendar-none": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        }
+        with override_settings(CACHES=uncached_caches, CALENDAR_CACHE_ALIAS="calendar-none"):
+            _, uncached = measure()
+
+        self.stdout.write(
+            f"{'calendar: acierto / sin cache':<38} {len(warm):>7} {len(uncached):>4}"
+        )
+        failures = []
+        if len(warm) > len(uncached):
+            failures.append(
+                f"calendar: un acierto cuesta {len(warm)} queries, sin cache {len(uncached)}"
+            )
+        if any("appointments_appointment" in sql for sql in warm):
+            failures.append("calendar: un acierto consulta la tabla de citas")
+        return failures
+
+    def _seq_scans(self, queries, min_rows):
+        if connection.vendor != "postgresql":
+            return []
+
+        found = []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s)",
+                [list(WATCHED_TABLES)],
+            )
+            sizes = dict(cursor.fetchall())
+
+            for sql in queries:
+                if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                    continue
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+
+                for node in _plan_nodes(plan[0]["Plan"]):
+                    table = node.get("Relation Name")
+                    if (
+                        node.get("Node Type") == "Seq Scan"
+                        and table in WATCHED_TABLES
+                        and sizes.get(table, 0) >= min_rows
+                    ):
+                        found.append(f"Seq Scan en {table}: {sql[:120]}")
+        return found
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from patients.exporter import (
+    EXPORT_FORMATS,
+    EXPORTS,
+    export_filters,
+    export_stream,
+)
+
+
+class Command(BaseCommand):
+    help = "Exporta pacientes, citas o historial clínico a CSV / NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(EXPORTS))
+        parser.add_argument(
+            "--output",
+            choices=EXPORT_FORMATS,
+            default="csv",
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--start", help="YYYY-MM-DD")
+        parser.add_argument("--end", help="YYYY-MM-DD")
+        parser.add_argument("--patient", help="ID de paciente")
+        parser.add_argument(
+            "-o", "--file",
+            help="Archivo destino (default: stdout)"
+        )
+
+    def handle(self, *args, **options):
+        chunks = export_stream(
+            options["dataset"],
+            options["output"],
+            options["gzip"],
+            **export_filters(options),
+        )
+
+        if options["file"]:
+            with open(options["file"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            self.stderr.write(self.style.SUCCESS(
+                f"✅ Exportado en {options['file']}"
+            ))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
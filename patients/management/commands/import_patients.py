@@ -0,0 +1,70 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from patients.importer import IMPORT_FORMATS, detect_format, import_patients
+
+
+class Command(BaseCommand):
+    help = "Importa pacientes desde CSV o NDJSON en lotes (bulk_create)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv / .ndjson")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Por defecto se deduce de la extensión"
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=1000,
+            help="Filas por bulk_create / transacción (default: 1000)"
+        )
+        parser.add_argument(
+            "--errors",
+            help="Escribir el reporte de errores (NDJSON) en este archivo"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo validar, sin insertar"
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        errors_out = open(options["errors"], "w") if options["errors"] else None
+        start = time.perf_counter()
+
+        try:
+            with open(options["path"], "rb") as source:
+                for event in import_patients(
+                    source,
+                    fmt=fmt,
+                    batch_size=options["batch"],
+                    dry_run=options["dry_run"],
+                ):
+                    if "row" in event:
+                        line = json.dumps(event, ensure_ascii=False)
+                        if errors_out:
+                            errors_out.write(line + "\n")
+                        else:
+                            self.stderr.write(line)
+                    else:
+                        summary = event
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if errors_out:
+                errors_out.close()
+
+        elapsed = time.perf_counter() - start
+        rows = summary["created"] + summary["failed"]
+        rate = rows / elapsed if elapsed else rows
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {summary['created']} pacientes importados, "
+            f"{summary['failed']} con error "
+            f"({rate:,.0f} filas/s)"
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from patients.models import Patient
+from appointments.models import refresh_appointment_dates
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula last_appointment_date / next_appointment_date de los "
+        "pacientes (programar a diario con --stale)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=5000,
+            help="Pacientes por UPDATE (default: 5000)"
+        )
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Solo pacientes cuya próxima cita ya pasó"
+        )
+
+    def handle(self, *args, **options):
+        patients = Patient.objects.order_by("id")
+
+        if options["stale"]:
+            patients = patients.filter(
+                next_appointment_date__lt=timezone.localdate()
+            )
+
+        ids = list(patients.values_list("id", flat=True))
+        batch = options["batch"]
+        updated = 0
+
+        self.stdout.write(f"🔄 Recalculando {len(ids)} pacientes...")
+
+        for i in range(0, len(ids), batch):
+            with transaction.atomic():
+                updated += refresh_appointment_dates(ids[i:i + batch])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {updated} pacientes actualizados"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-16 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_patient_chronic_diseases_patient_photo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['-created_at', 'id'], name='patient_created_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.10 on 2026-10-16 11:40
+
+from django.db import migrations
+
+
+# Solo PostgreSQL: en SQLite la búsqueda usa FTS5 (patients/signals.py).
+TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE: se envuelve para poder indexarlo
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS patient_name_trgm_idx
+    ON patients_patient USING gin (f_unaccent(full_name) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS patient_recommended_trgm_idx
+    ON patients_patient USING gin (f_unaccent(recommended_by) gin_trgm_ops)
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS patient_recommended_trgm_idx",
+    "DROP INDEX IF EXISTS patient_name_trgm_idx",
+    "DROP FUNCTION IF EXISTS f_unaccent(text)",
+]
+
+
+def run_postgres(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0006_patient_patient_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_postgres(TRIGRAM_SQL),
+            run_postgres(REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.10 on 2026-10-16 13:05
+
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_appointment_dates(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    Appointment = apps.get_model("appointments", "Appointment")
+
+    today = timezone.localdate()
+    active = (
+        Appointment.objects
+        .filter(patient_id=OuterRef("pk"))
+        .exclude(status="cancelled")
+        .order_by()
+        .values("patient_id")
+    )
+
+    Patient.objects.update(
+        last_appointment_date=Subquery(
+            active.filter(date__lte=today)
+            .annotate(last=Max("date"))
+            .values("last")
+        ),
+        next_appointment_date=Subquery(
+            active.filter(date__gte=today, status="scheduled")
+            .annotate(next=Min("date"))
+            .values("next")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_appointment_date_idx_and_more'),
+        ('patients', '0007_patient_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='last_appointment_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='next_appointment_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['-last_appointment_date', 'id'], name='patient_last_appt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['next_appointment_date', 'id'], name='patient_next_appt_idx'),
+        ),
+        migrations.RunPython(backfill_appointment_dates, migrations.RunPython.noop),
+    ]
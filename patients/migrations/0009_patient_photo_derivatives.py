@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0008_patient_last_next_appointment_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='photo_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
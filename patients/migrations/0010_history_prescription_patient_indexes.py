@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-16 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0009_patient_photo_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clinicalhistory',
+            index=models.Index(fields=['patient', '-date', '-created_at', '-id'], name='history_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(fields=['patient', '-created_at', '-id'], name='prescription_patient_idx'),
+        ),
+    ]
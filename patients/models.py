@@ -63,8 +63,42 @@ class Patient(models.Model):
         blank=True
     )
 
+    # {"thumb": {"webp": name, "jpeg": name}, "medium": {...}}
+    # Se generan en segundo plano (patients/photos.py)
+    photo_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False
+    )
+
+    # ===== ACTIVIDAD (desnormalizado desde Appointment) =====
+    # Se mantienen en appointments/signals.py y con
+    # `manage.py rebuild_appointment_dates`.
+    last_appointment_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+    next_appointment_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     # ===== META =====
     created_at = models.DateTimeField(auto_now_add=True)
+    # /patients/changes/ (sync/changes.py); los .update() en bloque lo
+    # ponen a mano
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # foto original: al cambiarla hay que regenerar las miniaturas
+        instance._loaded_photo_name = instance.__dict__.get("photo")
+        # nombre original: es el título de sus eventos en el calendario
+        instance._loaded_full_name = instance.__dict__.get("full_name")
+        return instance
 
     @property
     def age(self):
@@ -90,6 +124,22 @@ class Patient(models.Model):
             models.Index(
                 fields=["email"],
                 name="appointment_email_idx"
+            ),
+            models.Index(
+                fields=["-created_at", "id"],
+                name="patient_created_idx"
+            ),
+            models.Index(
+                fields=["-last_appointment_date", "id"],
+                name="patient_last_appt_idx"
+            ),
+            models.Index(
+                fields=["next_appointment_date", "id"],
+                name="patient_next_appt_idx"
+            ),
+            models.Index(
+                fields=["updated_at", "id"],
+                name="patient_updated_idx"
             )
         ]
 
@@ -121,6 +171,14 @@ class Prescription(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["patient", "-created_at", "-id"],
+                name="prescription_patient_idx"
+            )
+        ]
+
     def __str__(self):
         return f"Receta - {self.patient.full_name}"
 
@@ -154,6 +212,12 @@ class ClinicalHistory(models.Model):
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            models.Index(
+                fields=["patient", "-date", "-created_at", "-id"],
+                name="history_patient_date_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.patient.full_name} - {self.date}"
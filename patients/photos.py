@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from jobs.registry import enqueue
+
+from .models import Patient, patient_photo_path
+
+logger = logging.getLogger(__name__)
+
+# variante → (ancho, alto, recortar a cuadrado)
+PHOTO_VARIANTS = {
+    "thumb": (128, 128, True),
+    "medium": (640, 640, False),
+}
+
+# formato → (extensión, opciones de Pillow)
+PHOTO_FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Un solo hilo: el thumbnailing no debe competir con las requests
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photos")
+
+
+def schedule_photo_derivatives(patient_id, photo_name):
+    """
+    Encola la generación al confirmar la transacción, fuera del hilo
+    de la request. Con PHOTO_DERIVATIVES_SYNC (tests / comandos) corre
+    en línea; con JOB_QUEUE_ENABLED va a la cola de run_worker.
+    """
+    if getattr(settings, "JOB_QUEUE_ENABLED", False):
+        # el Job se guarda en la misma transacción que la foto
+        enqueue("patients.photo_derivatives", patient_id=patient_id, photo_name=photo_name)
+        return
+
+    def run():
+        if getattr(settings, "PHOTO_DERIVATIVES_SYNC", False):
+            generate_photo_derivatives(patient_id, photo_name)
+        else:
+            _executor.submit(_run_in_thread, patient_id, photo_name)
+
+    transaction.on_commit(run)
+
+
+def _run_in_thread(patient_id, photo_name):
+    try:
+        generate_photo_derivatives(patient_id, photo_name)
+    except Exception:
+        logger.exception("No se pudieron generar miniaturas del paciente %s", patient_id)
+    finally:
+        close_old_connections()
+
+
+def generate_photo_derivatives(patient_id, photo_name):
+    """
+    Genera thumb/medium en WebP + JPEG con nombres por hash de contenido:
+        patients/{id}/photos/{nombre}.{variante}.{hash}.{ext}
+    """
+    with default_storage.open(photo_name, "rb") as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    patient = Patient(id=patient_id)
+    stem = os.path.splitext(os.path.basename(photo_name))[0]
+    derivatives = {}
+
+    for variant, (width, height, crop) in PHOTO_VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.LANCZOS)
+
+        derivatives[variant] = {}
+        for fmt, (ext, options) in PHOTO_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            content = buffer.getvalue()
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = patient_photo_path(patient, f"{stem}.{variant}.{digest}.{ext}")
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(content))
+            derivatives[variant][fmt] = name
+
+    # Si la foto cambió mientras tanto, estas miniaturas ya no sirven
+    updated = Patient.objects.filter(
+        pk=patient_id,
+        photo=photo_name,
+    ).update(photo_derivatives=derivatives, updated_at=timezone.now())
+
+    if not updated:
+        delete_photo_derivatives(derivatives)
+
+    return derivatives
+
+
+def delete_photo_derivatives(derivatives):
+    for formats in (derivatives or {}).values():
+        for name in formats.values():
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.warning("No se pudo borrar %s", name)
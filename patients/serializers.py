@@ -1,20 +1,61 @@
 from rest_framework import serializers
+from backend.media import MediaModelSerializer, signed_media_url
 from .models import Patient, Prescription, ClinicalHistory
 from appointments.serializers import AppointmentSerializer
 
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+class PrescriptionSerializer(MediaModelSerializer):
     class Meta:
         model = Prescription
         fields = "__all__"
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PhotoUrlsMixin:
+    """
+    URLs absolutas de las miniaturas de `Patient.photo`:
+    {"webp": url, "jpeg": url} o None si aún no se generan.
+    """
+
+    def get_photo_thumb_url(self, obj):
+        return self._derivative_urls(obj, "thumb")
+
+    def get_photo_medium_url(self, obj):
+        return self._derivative_urls(obj, "medium")
+
+    def _derivative_urls(self, obj, variant):
+        formats = (obj.photo_derivatives or {}).get(variant)
+        if not obj.photo or not formats:
+            return None
+        return {
+            fmt: self._absolute_url(signed_media_url(name))
+            for fmt, name in formats.items()
+        }
+
+    def _absolute_url(self, url):
+        request = self.context.get('request')
+        if request:
+            # Construir URL absoluta correcta
+            return request.build_absolute_uri(url)
+        else:
+            # Fallback si no hay request en el contexto
+            from django.conf import settings
+            if hasattr(settings, 'RENDER_EXTERNAL_HOSTNAME'):
+                hostname = settings.RENDER_EXTERNAL_HOSTNAME
+                return f'https://{hostname}{url}'
+            return url
+
+
+class PatientSerializer(PhotoUrlsMixin, MediaModelSerializer):
     appointments = AppointmentSerializer(many=True, read_only=True)
     prescriptions = PrescriptionSerializer(many=True, read_only=True)
-    last_appointment = serializers.DateTimeField(read_only=True)
+    last_appointment = serializers.DateField(
+        source="last_appointment_date",
+        read_only=True
+    )
 
     photo_url = serializers.SerializerMethodField()
+    photo_thumb_url = serializers.SerializerMethodField()
+    photo_medium_url = serializers.SerializerMethodField()
 
     def validate_phone(self, value):
         if not value.isdigit():
@@ -27,21 +68,50 @@ class PatientSerializer(serializers.ModelSerializer):
         Retorna la URL completa de la foto
         """
         if obj.photo:
-            request = self.context.get('request')
-            if request:
-                # Construir URL absoluta correcta
-                return request.build_absolute_uri(obj.photo.url)
-            else:
-                # Fallback si no hay request en el contexto
-                from django.conf import settings
-                if hasattr(settings, 'RENDER_EXTERNAL_HOSTNAME'):
-                    hostname = settings.RENDER_EXTERNAL_HOSTNAME
-                    return f'https://{hostname}{obj.photo.url}'
-                return obj.photo.url
+            return self._absolute_url(signed_media_url(obj.photo.name))
         return None
+
     class Meta:
         model = Patient
-        fields = "__all__"
+        exclude = ["photo_derivatives"]
+
+
+class PatientListSerializer(PhotoUrlsMixin, MediaModelSerializer):
+    """
+    Serializer ligero para el listado de pacientes.
+    Los contadores vienen anotados desde el queryset.
+    """
+    appointment_count = serializers.IntegerField(read_only=True)
+    prescription_count = serializers.IntegerField(read_only=True)
+    last_appointment = serializers.DateField(
+        source="last_appointment_date",
+        read_only=True
+    )
+    next_appointment = serializers.DateField(
+        source="next_appointment_date",
+        read_only=True
+    )
+    photo_thumb_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Patient
+        fields = [
+            "id",
+            "full_name",
+            "phone",
+            "phone_alt",
+            "email",
+            "street",
+            "neighborhood",
+            "city",
+            "photo",
+            "photo_thumb_url",
+            "created_at",
+            "appointment_count",
+            "prescription_count",
+            "last_appointment",
+            "next_appointment",
+        ]
 
 
 class ClinicalHistorySerializer(serializers.ModelSerializer):
@@ -0,0 +1,96 @@
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from sync.changes import record_deletion
+
+from .filters import FTS_TABLE
+from .models import Patient
+from .photos import delete_photo_derivatives, schedule_photo_derivatives
+
+# Índice FTS5 (external content) + triggers que lo mantienen al día.
+# Se instala después de cada migrate porque SQLite reconstruye la tabla
+# en muchos ALTER y con ella se pierden los triggers.
+SQLITE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        full_name, recommended_by,
+        content='patients_patient', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, full_name, recommended_by)
+        VALUES (new.id, new.full_name, new.recommended_by);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, recommended_by)
+        VALUES ('delete', old.id, old.full_name, old.recommended_by);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, recommended_by)
+        VALUES ('delete', old.id, old.full_name, old.recommended_by);
+        INSERT INTO {FTS_TABLE}(rowid, full_name, recommended_by)
+        VALUES (new.id, new.full_name, new.recommended_by);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+@receiver(post_migrate)
+def install_sqlite_search(sender, using="default", **kwargs):
+    if sender.name != "patients":
+        return
+
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+
+    if "patients_patient" not in connection.introspection.table_names():
+        return
+
+    with connection.cursor() as cursor:
+        try:
+            for statement in SQLITE_FTS_SQL:
+                cursor.execute(statement)
+        except DatabaseError:
+            # SQLite sin FTS5 → la búsqueda cae a SearchFilter
+            pass
+
+
+@receiver(post_save, sender=Patient)
+def refresh_photo_derivatives(sender, instance, **kwargs):
+    previous = getattr(instance, "_loaded_photo_name", None) or ""
+    current = instance.photo.name or ""
+    instance._loaded_photo_name = current
+
+    if previous == current:
+        return
+
+    if instance.photo_derivatives:
+        delete_photo_derivatives(instance.photo_derivatives)
+        Patient.objects.filter(pk=instance.pk).update(photo_derivatives={})
+        instance.photo_derivatives = {}
+
+    if current:
+        schedule_photo_derivatives(instance.pk, current)
+
+
+@receiver(post_delete, sender=Patient)
+def remove_photo_derivatives(sender, instance, **kwargs):
+    delete_photo_derivatives(instance.photo_derivatives)
+
+
+@receiver(post_delete, sender=Patient)
+def record_patient_deletion(sender, instance, **kwargs):
+    # tombstone para /patients/changes/
+    record_deletion(instance)
@@ -0,0 +1,42 @@
+import tempfile
+
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from jobs.registry import task
+
+from .exporter import EXPORTS, export_filename, export_stream
+from .photos import generate_photo_derivatives
+
+
+@task("patients.photo_derivatives")
+def photo_derivatives(patient_id, photo_name):
+    return generate_photo_derivatives(patient_id, photo_name)
+
+
+def delete_export(name):
+    # jobs.purge: el archivo se va con su trabajo
+    default_storage.delete(name)
+
+
+@task("patients.export", on_purge=delete_export)
+def export(dataset, output="csv", start=None, end=None, patient=None):
+    """
+    Exportación completa (gzip) a storage en vez de una respuesta
+    en streaming. Los bloques van a un archivo temporal, no a memoria.
+    Devuelve el nombre del archivo guardado.
+    """
+    if dataset not in EXPORTS:
+        raise ValueError(f"Dataset no soportado: {dataset}")
+
+    name = f"exports/{timezone.now():%Y%m%d-%H%M%S}-{export_filename(dataset, output, gzip=True)}"
+    with tempfile.TemporaryFile() as spool:
+        for chunk in export_stream(
+            dataset, output, gzip=True,
+            start=parse_date(start or ""), end=parse_date(end or ""), patient=patient,
+        ):
+            spool.write(chunk)
+        spool.seek(0)
+        return default_storage.save(name, File(spool, name=name))
@@ -0,0 +1,15 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+
+class QueryBudgetTests(TestCase):
+    """`manage.py check_query_budgets` dentro de `manage.py test`."""
+
+    def test_every_route_within_budget(self):
+        out = StringIO()
+        try:
+            call_command("check_query_budgets", patients=200, stdout=out)
+        except CommandError as error:
+            self.fail(f"{error}\n{out.getvalue()}")
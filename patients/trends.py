@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.db.models import Count, Max, Min, Sum
+
+BUCKETS = ("week", "month")
+
+
+def bucket_start(day, bucket):
+    if bucket == "month":
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())  # lunes ISO
+
+
+class _Accumulator:
+    """
+    Sumas para media y regresión lineal (dolor vs. día) a partir de
+    agregados diarios: n, Σy, y por día x → Σx, Σx², Σxy.
+    """
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.n = 0
+        self.sum_y = 0
+        self.sum_x = 0
+        self.sum_xx = 0
+        self.sum_xy = 0
+        self.low = None
+        self.high = None
+
+    def add(self, day, n, total, low, high):
+        x = (day - self.origin).days
+        self.n += n
+        self.sum_y += total
+        self.sum_x += n * x
+        self.sum_xx += n * x * x
+        self.sum_xy += x * total
+        self.low = low if self.low is None else min(self.low, low)
+        self.high = high if self.high is None else max(self.high, high)
+
+    def as_dict(self):
+        denominator = self.n * self.sum_xx - self.sum_x ** 2
+        slope = (
+            (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+            if denominator else None
+        )
+        return {
+            "count": self.n,
+            "mean": round(self.sum_y / self.n, 2) if self.n else None,
+            "min": self.low,
+            "max": self.high,
+            # puntos de dolor por día (negativo = mejora)
+            "slope": round(slope, 4) if slope is not None else None,
+        }
+
+
+def pain_trends(queryset, bucket="week"):
+    """
+    Estadísticas de dolor por semana/mes. La base de datos agrega por
+    día (una fila por fecha, no por sesión); aquí solo se combinan esos
+    agregados en cubetas.
+    """
+    daily = (
+        queryset
+        .filter(pain_level__isnull=False)
+        .order_by()
+        .values("date")
+        .annotate(
+            n=Count("pain_level"),
+            total=Sum("pain_level"),
+            low=Min("pain_level"),
+            high=Max("pain_level"),
+        )
+        .order_by("date")
+        .values_list("date", "n", "total", "low", "high")
+    )
+
+    buckets = {}
+    overall = None
+
+    for day, n, total, low, high in daily:
+        if overall is None:
+            overall = _Accumulator(day)
+        overall.add(day, n, total, low, high)
+
+        start = bucket_start(day, bucket)
+        if start not in buckets:
+            buckets[start] = _Accumulator(start)
+        buckets[start].add(day, n, total, low, high)
+
+    return {
+        "summary": overall.as_dict() if overall else _Accumulator(None).as_dict(),
+        "buckets": [
+            {"start": start, **acc.as_dict()}
+            for start, acc in buckets.items()
+        ],
+    }
+
+
+def treatment_frequency(queryset, limit=20):
+    return list(
+        queryset
+        .order_by()
+        .values("treatment")
+        .annotate(count=Count("id"))
+        .order_by("-count", "treatment")[:limit]
+    )
@@ -1,57 +1,159 @@
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 from .models import Patient, Prescription, ClinicalHistory
-from .serializers import PatientSerializer, PrescriptionSerializer, ClinicalHistorySerializer
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import SearchFilter
-from django.db.models import Max
+from .filters import PatientSearchFilter
+from .importer import IMPORT_FORMATS, detect_format, import_patients
+from .exporter import ExportMixin
+from .trends import BUCKETS, pain_trends, treatment_frequency
+from .serializers import (
+    PatientSerializer,
+    PatientListSerializer,
+    PrescriptionSerializer,
+    ClinicalHistorySerializer,
+)
+from appointments.bulk import bulk_delete
+from appointments.models import Appointment
+from sync.changes import changes_response
+from users.roles import ADMIN, FISIO, has_role
+from backend.pagination import (
+    KeysetPagination,
+    HistoryPagination,
+    RecentFirstPagination,
+)
+from rest_framework.exceptions import NotFound, PermissionDenied
+from backend.async_views import AsyncAPIView, json_response
+from backend.params import parse_date_param
+from backend.streaming import streaming_content
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.http import StreamingHttpResponse
 
 
 
 
-class PatientViewSet(ModelViewSet):
+class PatientViewSet(ExportMixin, ModelViewSet):
 
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
+    export_dataset = "patients"
     parser_classes = [MultiPartParser, FormParser]
 
-    filter_backends = [SearchFilter]
+    pagination_class = KeysetPagination
+
+    filter_backends = [PatientSearchFilter]
     search_fields = ["full_name", "recommended_by",]
 
+    def get_serializer_class(self):
+        if self.action in ("list", "changes"):
+            return PatientListSerializer
+        return PatientSerializer
+
     def get_queryset(self):
         # 👈 base queryset SIN filtros peligrosos
-        return Patient.objects.all()
+        qs = Patient.objects.all()
+
+        if self.action == "list":
+            return self._annotate_summary(self._filter_activity(qs))
+
+        if self.action == "retrieve":
+            # citas y recetas en 2 queries fijas (sin N+1)
+            return qs.prefetch_related("appointments", "prescriptions")
+
+        return qs
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset()).order_by("-created_at")
+    # ?ordering= → (filtro, orden keyset); ambos servidos por índice
+    ACTIVITY_ORDERINGS = {
+        "recent": (
+            {"last_appointment_date__isnull": False},
+            ("-last_appointment_date", "id"),
+        ),
+        "upcoming": (
+            {"next_appointment_date__isnull": False},
+            ("next_appointment_date", "id"),
+        ),
+    }
 
-        search = request.query_params.get("search")
+    def get_keyset_ordering(self, queryset):
+        # 🔍 con búsqueda → primero los más parecidos
+        if PatientSearchFilter.is_ranked(queryset):
+            return ("-search_rank", "id")
 
-        # # 🔹 ordenar por última cita
-        # queryset = queryset.annotate(
-        #     last_appointment=Max("appointments__date")
-        # ).order_by("-last_appointment", "-created_at")
+        ordering = self.request.query_params.get("ordering")
+        if ordering in self.ACTIVITY_ORDERINGS:
+            return self.ACTIVITY_ORDERINGS[ordering][1]
+        return None
 
-        # 🔹 sin búsqueda → solo los más recientes
-        if not search:
-            queryset = queryset[:20]
+    def _filter_activity(self, qs):
+        params = self.request.query_params
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        ordering = params.get("ordering")
+        if ordering in self.ACTIVITY_ORDERINGS:
+            qs = qs.filter(**self.ACTIVITY_ORDERINGS[ordering][0])
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        seen_since = parse_date_param(params, "seen_since")
+        if seen_since:
+            qs = qs.filter(last_appointment_date__gte=seen_since)
+
+        next_until = parse_date_param(params, "next_until")
+        if next_until:
+            qs = qs.filter(next_appointment_date__lte=next_until)
+
+        return qs
+
+    def _annotate_summary(self, qs):
+        """
+        Contadores como subconsultas correlacionadas, todo en una
+        sola query (sin JOIN que multiplique filas).
+        """
+        appointments = (
+            Appointment.objects
+            .filter(patient_id=OuterRef("pk"))
+            .order_by()
+            .values("patient_id")
+        )
+        prescriptions = (
+            Prescription.objects
+            .filter(patient_id=OuterRef("pk"))
+            .order_by()
+            .values("patient_id")
+        )
+
+        return qs.annotate(
+            appointment_count=Coalesce(
+                Subquery(
+                    appointments.annotate(total=Count("id")).values("total"),
+                    output_field=IntegerField(),
+                ),
+                0,
+            ),
+            prescription_count=Coalesce(
+                Subquery(
+                    prescriptions.annotate(total=Count("id")).values("total"),
+                    output_field=IntegerField(),
+                ),
+                0,
+            ),
+        )
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Pacientes creados / modificados / borrados desde ?since=<token>
+        (mismo formato que /appointments/changes/). Un paciente cambia
+        también cuando cambian sus citas (fechas y contadores del listado).
+        """
+        return changes_response(self, self._annotate_summary(Patient.objects.all()))
 
     def update(self, request, *args, **kwargs):
-        if not request.user.groups.filter(
-                name__in=["Admin", "Fisio"]
-        ).exists():
+        if not has_role(request.user, ADMIN, FISIO):
             raise PermissionDenied("No tienes permiso para editar pacientes")
         return super().update(request, *args, **kwargs)
 
@@ -59,10 +161,17 @@ class PatientViewSet(ModelViewSet):
         return self.update(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name="Admin").exists():
+        if not has_role(request.user, ADMIN):
             raise PermissionDenied("Solo Admin puede eliminar pacientes")
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        # las citas en bloque: el CASCADE las borraría una por una, cada
+        # una con sus post_delete (rollup, calendario, tombstone, SSE)
+        with transaction.atomic(savepoint=False):
+            bulk_delete(instance.appointments.all())
+            instance.delete()
+
     @action(
         detail=True,
         methods=["delete"],
@@ -81,18 +190,59 @@ class PatientViewSet(ModelViewSet):
             )
 
         # 🔐 permiso clínico (opcional pero recomendado)
-        if not request.user.groups.filter(
-            name__in=["Admin", "Fisio"]
-        ).exists():
+        if not has_role(request.user, ADMIN, FISIO):
             raise PermissionDenied("No tienes permiso para borrar recetas")
 
         prescription.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_file(self, request):
+        """
+        Importación masiva (CSV / NDJSON). La respuesta es NDJSON en
+        streaming: una línea por fila rechazada y al final el resumen.
+        """
+        if not has_role(request.user, ADMIN):
+            raise PermissionDenied("Solo Admin puede importar pacientes")
+
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response(
+                {"detail": "file is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fmt = request.data.get("format") or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response(
+                {"detail": f"format must be one of {IMPORT_FORMATS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            batch_size = int(request.data.get("batch_size", 1000))
+        except ValueError:
+            batch_size = 1000
+
+        events = import_patients(
+            upload,
+            fmt=fmt,
+            batch_size=max(1, min(batch_size, 5000)),
+            dry_run=request.data.get("dry_run") in ("1", "true"),
+        )
+        return StreamingHttpResponse(
+            streaming_content(
+                request,
+                (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+            ),
+            content_type="application/x-ndjson",
+        )
+
     @action(detail=True, methods=["delete"])
     def delete_photo(self, request, pk=None):
         patient = self.get_object()
         if patient.photo:
+            # al guardar, el post_save borra también las miniaturas
             patient.photo.delete(save=True)
         return Response(
             {"message": "Foto eliminada"},
@@ -100,20 +250,65 @@ class PatientViewSet(ModelViewSet):
         )
 
 
+class PatientDetailView(AsyncAPIView):
+    """
+    GET /api/patients/{id}/ async: ficha con citas y recetas en 3
+    queries fijas con el ORM async. PUT / PATCH / DELETE (misma URL)
+    siguen en PatientViewSet.
+    """
+    viewset_view = staticmethod(PatientViewSet.as_view({
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    }))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ("PUT", "PATCH", "DELETE"):
+            return await sync_to_async(self.viewset_view)(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, pk):
+        try:
+            patient = await (
+                Patient.objects
+                .prefetch_related("appointments", "prescriptions")
+                .aget(pk=pk)
+            )
+        except Patient.DoesNotExist:
+            return json_response({"detail": str(NotFound.default_detail)}, status=404)
+
+        # todo ya está cargado: serializar no toca la BD
+        serializer = PatientSerializer(patient, context={"request": request})
+        return json_response(serializer.data)
+
+
 class PrescriptionViewSet(ModelViewSet):
     queryset = Prescription.objects.all().order_by("-created_at")
     serializer_class = PrescriptionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RecentFirstPagination
     http_method_names = ["get", "post"]  # 👈 NO delete
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        patient_id = self.request.query_params.get("patient")
+
+        if patient_id:
+            qs = qs.filter(patient_id=patient_id)
+
+        return qs
+
 
-class ClinicalHistoryViewSet(ModelViewSet):
+class ClinicalHistoryViewSet(ExportMixin, ModelViewSet):
     queryset = ClinicalHistory.objects.all()
     serializer_class = ClinicalHistorySerializer
     permission_classes = [IsAuthenticated]
+    export_dataset = "clinical-history"
+    pagination_class = HistoryPagination
 
     def get_queryset(self):
-        qs = ClinicalHistory.objects.all()
+        # therapist_name sin query por fila
+        qs = ClinicalHistory.objects.select_related("therapist")
         patient_id = self.request.query_params.get("patient")
 
         if patient_id:
@@ -123,3 +318,38 @@ class ClinicalHistoryViewSet(ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(therapist=self.request.user)
+
+    @action(detail=False, methods=["get"])
+    def trends(self, request):
+        """
+        Tendencia de dolor y frecuencia de tratamientos.
+        ?patient= (un paciente) o ?diagnosis= (cohorte), o ninguno
+        (toda la clínica); ?bucket=week|month&start=&end=
+        """
+        bucket = request.query_params.get("bucket") or "week"
+        if bucket not in BUCKETS:
+            return Response(
+                {"detail": f"bucket must be one of {BUCKETS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        qs = self.get_queryset()
+
+        diagnosis = request.query_params.get("diagnosis")
+        if diagnosis:
+            qs = qs.filter(diagnosis__icontains=diagnosis)
+
+        start = parse_date_param(request.query_params, "start")
+        end = parse_date_param(request.query_params, "end")
+        if start:
+            qs = qs.filter(date__gte=start)
+        if end:
+            qs = qs.filter(date__lte=end)
+
+        return Response({
+            "patient": request.query_params.get("patient"),
+            "diagnosis": diagnosis,
+            "bucket": bucket,
+            **pain_trends(qs, bucket),
+            "treatments": treatment_frequency(qs),
+        })
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ExpiredToken(Exception):
+    pass
+
+
+# =========================================================
+# 🎫 TOKENS
+# =========================================================
+# Opacos para el cliente. "<origen>" al terminar un sondeo;
+# "<origen>.<updated_at>.<id>" para pedir la siguiente página.
+# Tiempos en microsegundos desde 1970 (UTC).
+def _micros(moment):
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+
+def _moment(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def encode_token(origin, cursor=None):
+    if cursor is None:
+        return str(_micros(origin))
+    updated_at, pk = cursor
+    return f"{_micros(origin)}.{_micros(updated_at)}.{pk}"
+
+
+def decode_token(token):
+    """Devuelve (origen, cursor | None). InvalidToken si no se entiende."""
+    try:
+        parts = [int(part) for part in token.split(".")]
+    except ValueError:
+        raise InvalidToken(token)
+
+    try:
+        if len(parts) == 1:
+            return _moment(parts[0]), None
+        if len(parts) == 3:
+            return _moment(parts[0]), (_moment(parts[1]), parts[2])
+    except OverflowError:
+        # fuera del rango de datetime (p.ej. ?since=99999999999999999999)
+        raise InvalidToken(token)
+    raise InvalidToken(token)
+
+
+# =========================================================
+# 🪦 BORRADOS
+# =========================================================
+def record_deletion(instance, patient_id=None):
+    """
+    Tombstone de `instance` (llamar desde su post_delete). También al
+    sacarla de un filtro (una cita que cambia de paciente): `patient_id`
+    es el filtro que la pierde.
+    """
+    Tombstone.objects.create(
+        model=instance._meta.label_lower,
+        object_id=instance.pk,
+        patient_id=patient_id,
+    )
+
+
+def record_deletions(model, rows):
+    """
+    Tombstones de un borrado masivo (sin post_delete por fila) en un solo
+    INSERT. `rows`: tuplas (object_id, patient_id).
+    """
+    Tombstone.objects.bulk_create([
+        Tombstone(model=model._meta.label_lower, object_id=pk, patient_id=patient_id)
+        for pk, patient_id in rows
+    ])
+
+
+# =========================================================
+# 🔄 CAMBIOS DESDE UN TOKEN
+# =========================================================
+def changes_since(queryset, token=None, deleted_filter=None, limit=None):
+    """
+    Filas de `queryset` creadas / modificadas desde `token` (por
+    `updated_at`, índice (updated_at, id)) y los ids borrados o que
+    salieron del queryset (tombstones que ya no están en él).
+
+    - Sin token: carga inicial completa, paginada.
+    - Cada sondeo repite SYNC_OVERLAP_SECONDS hacia atrás: una
+      transacción que empezó antes del token pero hizo COMMIT después
+      no se pierde (el cliente aplica los cambios por id, repetir es
+      inofensivo).
+    - Páginas: (updated_at, id) > cursor; al terminar, el token es el
+      origen del sondeo, así lo ocurrido mientras se paginaba vuelve a
+      entrar en el siguiente.
+
+    Devuelve {"changed": [instancias], "deleted": [ids], "token", "more"}.
+    Lanza InvalidToken / ExpiredToken (más viejo que los tombstones).
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    model = queryset.model
+
+    if token:
+        origin, cursor = decode_token(token)
+    else:
+        origin, cursor = timezone.now(), None
+
+    since = None
+    if token and cursor is None:
+        if origin < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise ExpiredToken(token)
+        since = origin - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        # este sondeo es el nuevo origen
+        origin = timezone.now()
+
+    rows = queryset
+    if cursor is not None:
+        updated_at, pk = cursor
+        rows = rows.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+    elif since is not None:
+        rows = rows.filter(updated_at__gte=since)
+
+    changed = list(rows.order_by("updated_at", "pk")[:limit + 1])
+    more = len(changed) > limit
+    changed = changed[:limit]
+
+    # los borrados van en la primera página del sondeo
+    deleted = []
+    if since is not None:
+        tombstones = Tombstone.objects.filter(
+            model=model._meta.label_lower,
+            deleted_at__gte=since,
+            **(deleted_filter or {}),
+        )
+        deleted = set(tombstones.values_list("object_id", flat=True))
+        if deleted:
+            # movidas a otro filtro: siguen en este queryset si no lo filtra
+            deleted -= set(queryset.filter(pk__in=deleted).values_list("pk", flat=True))
+        deleted = sorted(deleted)
+
+    if more:
+        last = changed[-1]
+        next_token = encode_token(origin, (last.updated_at, last.pk))
+    else:
+        next_token = encode_token(origin)
+
+    return {"changed": changed, "deleted": deleted, "token": next_token, "more": more}
+
+
+def changes_response(view, queryset, deleted_filter=None):
+    """Acción `changes` de un ViewSet: ?since=<token> → cambios serializados."""
+    token = view.request.query_params.get("since")
+    try:
+        result = changes_since(queryset, token, deleted_filter)
+    except InvalidToken:
+        return Response(
+            {"detail": "Token de sincronización inválido"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except ExpiredToken:
+        return Response(
+            {"detail": "El token expiró: vuelve a sincronizar sin `since`", "reset": True},
+            status=status.HTTP_410_GONE
+        )
+
+    result["changed"] = view.get_serializer(result["changed"], many=True).data
+    return Response(result)
@@ -0,0 +1,26 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Registro de un borrado: /changes/ lo devuelve en `deleted` para que
+    los clientes lo quiten de su copia local. Se purgan después de
+    SYNC_TOMBSTONE_DAYS (sync/tasks.py); un token más viejo pide resync.
+    """
+    model = models.CharField(max_length=100)  # "appointments.appointment"
+    object_id = models.BigIntegerField()
+    # citas: para filtrar los borrados con ?patient=
+    patient_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["model", "deleted_at"],
+                name="tombstone_model_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.registry import task
+
+from .models import Tombstone
+
+
+@task("sync.purge_tombstones")
+def purge_tombstones(days=None):
+    """Borra los tombstones con más de N días (los tokens anteriores piden resync)."""
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    limit = timezone.now() - timedelta(days=days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=limit).delete()
+    return deleted
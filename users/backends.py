@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+User = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Login por email: un solo SELECT sobre auth_user.email (índice en
+    users/migrations/0001) y el hasher corre sobre ese mismo usuario.
+
+    Emails desconocidos o repetidos también pagan un hash, así el tiempo
+    de respuesta no revela qué correos existen.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        users = list(User._default_manager.filter(email=email)[:2])
+        if len(users) != 1:
+            User().set_password(password)
+            return None
+
+        user = users[0]
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
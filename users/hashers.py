@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 con iteraciones desde PASSWORD_HASH_ITERATIONS (p. ej. bajas
+    en tests / entornos locales). Mismo algoritmo: los hashes existentes
+    siguen siendo válidos y se re-hashean al iniciar sesión si cambia el
+    número de iteraciones.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            "PASSWORD_HASH_ITERATIONS",
+            PBKDF2PasswordHasher.iterations,
+        )
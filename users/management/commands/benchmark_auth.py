@@ -0,0 +1,78 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from auth.authentication import StatelessJWTAuthentication
+from auth.tokens import tokens_for_user
+from users.permissions import IsAdmin
+
+User = get_user_model()
+
+
+class _PingView(APIView):
+    """Vista mínima: solo autenticación + permiso de rol."""
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response({"user": request.user.pk})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara requests/segundo y queries de autenticación: "
+        "JWTAuthentication (SELECT por request) vs StatelessJWTAuthentication"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True, groups__name="Admin").first()
+        if not user:
+            self.stdout.write(self.style.ERROR(
+                "⚠️ No hay usuarios Admin en la BD"
+            ))
+            return
+
+        access = tokens_for_user(user)["access"]
+        total = options["requests"]
+
+        self.stdout.write(f"🗄 Motor: {connection.vendor}, {total} requests")
+        self.stdout.write(
+            f"{'autenticación':>22} {'req/s':>9} {'queries/req':>12}"
+        )
+
+        for label, auth_class, token_ttl in (
+            ("JWTAuthentication", JWTAuthentication, 0),
+            ("stateless", StatelessJWTAuthentication, 0),
+            ("stateless + cache", StatelessJWTAuthentication, 30),
+        ):
+            with override_settings(JWT_TOKEN_CACHE_TTL=token_ttl):
+                rps, queries = self._measure(auth_class, access, total)
+            self.stdout.write(f"{label:>22} {rps:>9.0f} {queries:>12.2f}")
+
+    def _measure(self, auth_class, access, total):
+        view = _PingView.as_view(authentication_classes=[auth_class])
+        factory = APIRequestFactory()
+        requests = [
+            factory.get("/ping/", HTTP_AUTHORIZATION=f"Bearer {access}")
+            for _ in range(total)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for request in requests:
+                response = view(request)
+                response.render()
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200, response.data
+        return total / elapsed, len(queries) / total
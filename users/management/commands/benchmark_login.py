@@ -0,0 +1,148 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from auth.serializers import EmailTokenObtainSerializer
+
+User = get_user_model()
+
+BENCH_EMAIL = "benchmark-login@example.com"
+BENCH_PASSWORD = "benchmark-login-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el login por email: queries y tiempo por login (flujo anterior "
+        "vs EmailBackend) o una ráfaga de logins concurrentes contra un "
+        "servidor en marcha (--url)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=20)
+        parser.add_argument(
+            "--url",
+            help="Base del servidor (p.ej. http://localhost:8000) para la ráfaga",
+        )
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--email")
+        parser.add_argument("--password")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            self._burst(options)
+        else:
+            self._compare(options["logins"])
+
+    # =========================================================
+    # 🧪 EN PROCESO: flujo anterior vs EmailBackend
+    # =========================================================
+    def _compare(self, logins):
+        self.stdout.write(f"🗄 Motor: {connection.vendor}, {logins} logins")
+        self.stdout.write(
+            f"{'flujo':>10} {'email':>11} {'ms/login':>9} {'queries':>8}"
+        )
+
+        try:
+            with transaction.atomic():
+                User.objects.create_user(
+                    "benchmark-login", BENCH_EMAIL, BENCH_PASSWORD
+                )
+                for label, login in (
+                    ("anterior", self._legacy_login),
+                    ("backend", self._backend_login),
+                ):
+                    for kind, email in (
+                        ("existente", BENCH_EMAIL),
+                        ("desconocido", "nadie@example.com"),
+                    ):
+                        ms, queries = self._measure(login, email, logins)
+                        self.stdout.write(
+                            f"{label:>10} {kind:>11} {ms:>9.1f} {queries:>8.1f}"
+                        )
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("↩️ Usuario de prueba revertido")
+
+    def _legacy_login(self, email):
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            return None
+        return authenticate(username=user.username, password=BENCH_PASSWORD)
+
+    def _backend_login(self, email):
+        serializer = EmailTokenObtainSerializer(
+            data={"email": email, "password": BENCH_PASSWORD}
+        )
+        return serializer.is_valid()
+
+    def _measure(self, login, email, logins):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(logins):
+                login(email)
+            elapsed = time.perf_counter() - start
+        return elapsed * 1000 / logins, len(queries) / logins
+
+    # =========================================================
+    # 🌅 RÁFAGA HTTP (p.ej. gunicorn --workers 3)
+    # =========================================================
+    def _burst(self, options):
+        if not options["email"] or not options["password"]:
+            raise CommandError("--url requiere --email y --password")
+
+        url = options["url"].rstrip("/") + "/api/auth/login/"
+        body = json.dumps({
+            "email": options["email"],
+            "password": options["password"],
+        }).encode()
+        concurrency = options["concurrency"]
+        barrier = threading.Barrier(concurrency)
+
+        def login():
+            request = Request(
+                url, data=body, headers={"Content-Type": "application/json"}
+            )
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                with urlopen(request, timeout=300) as response:
+                    status = response.status
+            except HTTPError as exc:
+                status = exc.code
+            except OSError:
+                status = None
+            return status, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: login(), range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        failed = sum(1 for status, _ in results if status != 200)
+
+        self.stdout.write(f"🌅 {concurrency} logins simultáneos → {url}")
+        self.stdout.write(f"   total: {elapsed:.2f} s ({concurrency / elapsed:.1f} logins/s)")
+        self.stdout.write(
+            f"   p50: {statistics.median(latencies):.0f} ms  "
+            f"p95: {latencies[int(len(latencies) * 0.95) - 1]:.0f} ms  "
+            f"máx: {latencies[-1]:.0f} ms"
+        )
+        if failed:
+            self.stdout.write(self.style.ERROR(f"⚠️ {failed} logins fallidos"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Todos los logins OK"))
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 17:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        # auth_user es de django.contrib.auth: índice a mano para EmailBackend
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS auth_user_email_idx ON auth_user (email);",
+            "DROP INDEX IF EXISTS auth_user_email_idx;",
+        ),
+    ]
@@ -1,15 +1,11 @@
 from rest_framework.permissions import BasePermission
 
+from .roles import ADMIN, FISIO, has_role
+
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.groups.filter(name="Admin").exists()
-        )
+        return has_role(request.user, ADMIN)
 
 class IsFisio(BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.groups.filter(name="Fisio").exists()
-        )
\ No newline at end of file
+        return has_role(request.user, FISIO)
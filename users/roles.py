@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+
+ADMIN = "Admin"
+FISIO = "Fisio"
+
+CACHE_KEY = "users:roles:{}"
+
+
+def get_roles(user):
+    """
+    Nombres de grupo del usuario, resueltos una vez por request (se
+    guardan en el objeto user) y cacheados ROLE_CACHE_TTL segundos en
+    el cache de Django (LocMem = por worker). Los signals de
+    users/signals.py invalidan al cambiar la membresía.
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, "_roles", None)
+    if roles is not None:
+        return roles
+
+    key = CACHE_KEY.format(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(user.groups.values_list("name", flat=True))
+        cache.set(key, roles, getattr(settings, "ROLE_CACHE_TTL", 60))
+
+    user._roles = roles
+    return roles
+
+
+def has_role(user, *names):
+    return not get_roles(user).isdisjoint(names)
+
+
+def invalidate_roles(user_ids):
+    cache.delete_many([CACHE_KEY.format(pk) for pk in user_ids])
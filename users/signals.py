@@ -1,6 +1,10 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import m2m_changed, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
-from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.models import Group, Permission, User
+
+from auth.authentication import revoke_tokens
+
+from .roles import invalidate_roles
 
 @receiver(post_migrate)
 def create_roles(sender, **kwargs):
@@ -20,3 +24,49 @@ def create_roles(sender, **kwargs):
         ]
     )
     fisio_group.permissions.set(fisio_perms)
+
+
+# ===== Invalidación del cache de roles (users/roles.py) =====
+# Los access tokens llevan los roles como claim: también se revocan
+def roles_changed(user_ids):
+    user_ids = list(user_ids)
+    invalidate_roles(user_ids)
+    revoke_tokens(user_ids)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # group.user_set.clear(): pk_set no trae a los usuarios
+        roles_changed(instance.user_set.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        roles_changed(pk_set or [])
+    else:
+        roles_changed([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    if instance.pk:
+        roles_changed(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    if created:
+        return
+    if update_fields:
+        # el login solo guarda last_login: no revoca el token recién emitido
+        if "password" not in update_fields and "is_active" not in update_fields:
+            return
+        # check_password() rehashea (p.ej. cambió PASSWORD_HASH_ITERATIONS)
+        # con update_fields=["password"] y sin _password: misma contraseña
+        if set(update_fields) == {"password"} and instance._password is None:
+            return
+    revoke_tokens([instance.pk])
@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auth.tokens import tokens_for_user
+from patients.models import Patient
+
+from .roles import ADMIN, FISIO, has_role
+
+
+class RoleLookupQueryTests(TestCase):
+    """
+    Editar y borrar pacientes no consulta auth_user_groups: los roles
+    vienen en el token y, si no, del cache de users/roles.py.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("admin", password="x")
+        cls.user.groups.add(Group.objects.get(name=ADMIN))
+
+    def setUp(self):
+        # los caches sobreviven entre tests (roles y revocaciones)
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.user)['access']}"
+        )
+
+    def test_roles_resolved_once_per_worker(self):
+        first = User.objects.get(pk=self.user.pk)
+        second = User.objects.get(pk=self.user.pk)
+        cache.clear()
+
+        # una query para el primero; el resto sale del objeto o del cache
+        with self.assertNumQueries(1):
+            self.assertTrue(has_role(first, ADMIN))
+            self.assertFalse(has_role(first, FISIO))
+            self.assertTrue(has_role(second, ADMIN))
+
+    def test_patch_patient(self):
+        patient = Patient.objects.create(full_name="Ana", phone="5550000")
+        url = reverse("p-detail", args=[patient.pk])
+
+        # revocación (cache compartido en la BD; la segunda vez sale de la
+        # copia del proceso) + SELECT + UPDATE + citas y recetas; sin roles
+        for phone, queries in (("5551111", 5), ("5552222", 4)):
+            with self.assertNumQueries(queries):
+                response = self.client.patch(
+                    url, {"full_name": "Ana", "phone": phone}, format="multipart"
+                )
+            self.assertEqual(response.status_code, 200, response.content)
+
+        patient.refresh_from_db()
+        self.assertEqual(patient.phone, "5552222")
+
+    def test_delete_patient(self):
+        for name, queries in (("Ana", 10), ("Luis", 9)):
+            patient = Patient.objects.create(full_name=name, phone="5550000")
+            # revocación (solo la primera) + SELECT + citas (bulk_delete) +
+            # cascada (series, citas, 3 DELETE) + DELETE + tombstone
+            with self.assertNumQueries(queries):
+                response = self.client.delete(reverse("p-detail", args=[patient.pk]))
+            self.assertEqual(response.status_code, 204)
+            self.assertFalse(Patient.objects.filter(pk=patient.pk).exists())
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class TokenRevocationTests(TestCase):
+    password = "clave-de-prueba"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            "fisio", "fisio@example.com", cls.password
+        )
+        cls.user.groups.add(Group.objects.get(name=FISIO))
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": self.user.email, "password": self.password},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["access"]
+
+    def get_patients(self, access):
+        return self.client.get(
+            reverse("p-list"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+    def test_rehash_on_login_keeps_new_token(self):
+        # hash con otro número de iteraciones: el login lo rehashea
+        hasher = PBKDF2PasswordHasher()
+        User.objects.filter(pk=self.user.pk).update(
+            password=hasher.encode(self.password, hasher.salt(), iterations=2000)
+        )
+
+        access = self.login()
+
+        self.assertIn("$1000$", User.objects.get(pk=self.user.pk).password)
+        self.assertEqual(self.get_patients(access).status_code, 200)
+
+    def test_deactivation_revokes_token(self):
+        access = self.login()
+        self.assertEqual(self.get_patients(access).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        response = self.get_patients(access)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_revoked")
+
+    def test_new_password_revokes_token(self):
+        access = self.login()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("otra-clave")
+            self.user.save()
+
+        self.assertEqual(self.get_patients(access).status_code, 401)
+
+    def test_token_issued_right_after_role_change(self):
+        old = tokens_for_user(self.user)["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(Group.objects.get(name=ADMIN))
+
+        # mismo segundo que la revocación: el viejo no, el nuevo sí
+        new = tokens_for_user(self.user)["access"]
+        self.assertEqual(self.get_patients(old).status_code, 401)
+        self.assertEqual(self.get_patients(new).status_code, 200)